@@ -0,0 +1,192 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import numpy as np
+from .embedding_cache import EmbeddingCache
+from .models.schema import Policy
+
+AnswerKey = Tuple[str, Optional[str], Optional[str], frozenset]
+
+
+class _CachedAnswer:
+    def __init__(self, vector: Optional[np.ndarray], answer: str, sources: List[Policy]):
+        self.created = time.time()
+        self.vector = vector
+        self.answer = answer
+        self.sources = sources
+
+
+class AnswerCache:
+    """Semantic cache for generated answers with in-flight request coalescing.
+
+    Entries are keyed on (engine, candidate filter, topic filter, retrieved
+    policy-id set). Within one key, a question hits either on its normalized
+    text or when its embedding's cosine similarity to a cached question is at
+    least ``similarity_threshold``.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600.0, similarity_threshold: float = 0.95):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[Tuple[AnswerKey, str], _CachedAnswer]" = OrderedDict()
+        self._questions_by_key: Dict[AnswerKey, set] = {}
+        self._inflight: Dict[Tuple[AnswerKey, str], asyncio.Future] = {}
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        engine: str,
+        candidate_filter: Optional[str],
+        topic_filter: Optional[str],
+        policy_ids: Iterable[int]
+    ) -> AnswerKey:
+        return (engine, candidate_filter or None, topic_filter or None, frozenset(policy_ids))
+
+    @staticmethod
+    def _unit(vector) -> Optional[np.ndarray]:
+        if vector is None or len(vector) == 0:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def invalidate_if_stale(self, version: Hashable):
+        """Drop every entry when the policy data or index version changes."""
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._questions_by_key.clear()
+                self._version = version
+
+    def _remove(self, entry_key: Tuple[AnswerKey, str]):
+        self._entries.pop(entry_key, None)
+        questions = self._questions_by_key.get(entry_key[0])
+        if questions is not None:
+            questions.discard(entry_key[1])
+            if not questions:
+                del self._questions_by_key[entry_key[0]]
+
+    def _expired(self, entry: _CachedAnswer) -> bool:
+        return self.ttl > 0 and time.time() - entry.created > self.ttl
+
+    def lookup(self, key: AnswerKey, question: str, vector=None) -> Optional[Tuple[str, List[Policy]]]:
+        """Return a cached (answer, sources) pair for an identical or near-duplicate question."""
+        normalized = EmbeddingCache.normalize(question)
+        unit = self._unit(vector)
+        with self._lock:
+            entry_key = (key, normalized)
+            entry = self._entries.get(entry_key)
+            if entry is None and unit is not None:
+                best = self.similarity_threshold
+                for other in self._questions_by_key.get(key, ()):
+                    candidate = self._entries[(key, other)]
+                    if candidate.vector is None or candidate.vector.shape != unit.shape:
+                        continue
+                    similarity = float(np.dot(unit, candidate.vector))
+                    if similarity >= best:
+                        best, entry, entry_key = similarity, candidate, (key, other)
+                if entry is not None and not self._expired(entry):
+                    self.semantic_hits += 1
+            if entry is not None and self._expired(entry):
+                self._remove(entry_key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return entry.answer, entry.sources
+
+    def store(self, key: AnswerKey, question: str, vector, answer: str, sources: List[Policy]):
+        """Cache an answer, evicting the least recently used entries past ``max_size``."""
+        entry_key = (key, EmbeddingCache.normalize(question))
+        with self._lock:
+            self._entries[entry_key] = _CachedAnswer(self._unit(vector), answer, sources)
+            self._entries.move_to_end(entry_key)
+            self._questions_by_key.setdefault(key, set()).add(entry_key[1])
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    async def get_or_generate(
+        self,
+        key: AnswerKey,
+        question: str,
+        vector,
+        generate: Callable[[], Awaitable[Tuple[str, List[Policy]]]]
+    ) -> Tuple[str, List[Policy], bool]:
+        """Return (answer, sources, cached), sharing one generation among identical in-flight questions.
+
+        If the request generating the answer is cancelled (client disconnect,
+        timeout), a waiting request takes over and generates it itself.
+        """
+        cached = self.lookup(key, question, vector)
+        if cached is not None:
+            return cached[0], cached[1], True
+
+        flight_key = (key, EmbeddingCache.normalize(question))
+        future = self._inflight.get(flight_key)
+        while future is not None:
+            # Unlike awaiting the future, wait() only raises if this request is cancelled
+            await asyncio.wait({future})
+            if not future.cancelled():
+                self.coalesced += 1
+                answer, sources = future.result()
+                return answer, sources, True
+            future = self._inflight.get(flight_key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            answer, sources = await generate()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result((answer, sources))
+            self.store(key, question, vector, answer, sources)
+            return answer, sources, False
+        finally:
+            self._inflight.pop(flight_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(
+                max_size=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+                ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+                similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+            )
+        return _cache
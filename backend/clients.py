@@ -0,0 +1,45 @@
+import os
+import threading
+from typing import Optional
+import httpx
+from openai import AsyncOpenAI
+from qdrant_client import AsyncQdrantClient
+
+_lock = threading.Lock()
+_openai: Optional[AsyncOpenAI] = None
+_qdrant: Optional[AsyncQdrantClient] = None
+
+
+def get_async_openai() -> AsyncOpenAI:
+    """Return the process-wide AsyncOpenAI client backed by a pooled HTTP client."""
+    global _openai
+    with _lock:
+        if _openai is None:
+            max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=float(os.getenv("OPENAI_TIMEOUT", "60")),
+            )
+            _openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+        return _openai
+
+
+def get_async_qdrant() -> AsyncQdrantClient:
+    """Return the process-wide AsyncQdrantClient (one pooled connection set per process)."""
+    global _qdrant
+    with _lock:
+        if _qdrant is None:
+            path = os.getenv("QDRANT_PATH")
+            if path:
+                # Embedded Qdrant (local mode) on a storage directory, e.g. for load tests;
+                # only one process can open it
+                _qdrant = AsyncQdrantClient(path=path)
+            else:
+                _qdrant = AsyncQdrantClient(
+                    host=os.getenv("QDRANT_HOST", "localhost"),
+                    port=int(os.getenv("QDRANT_PORT", "6333")),
+                )
+        return _qdrant
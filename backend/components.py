@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Components each search engine needs before it can serve a request
+ENGINE_COMPONENTS = {
+    "faiss": ["policy_table", "encoder", "faiss_index"],
+    "qdrant": ["qdrant"],
+}
+
+
+def enabled_engines() -> List[str]:
+    """Engines listed in ENABLED_ENGINES (default: all of them)."""
+    raw = os.getenv("ENABLED_ENGINES", ",".join(ENGINE_COMPONENTS))
+    engines = [e.strip() for e in raw.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINE_COMPONENTS]
+    if unknown:
+        raise ValueError(f"Unknown engines in ENABLED_ENGINES: {', '.join(unknown)}")
+    return engines
+
+
+class EngineUnavailable(Exception):
+    """Raised when a request targets a disabled engine or one whose components failed to load."""
+
+
+class _Component:
+    def __init__(self, name: str, loader: Callable[[], Union[Any, Awaitable[Any]]]):
+        self.name = name
+        self.loader = loader
+        self.status = "pending"
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.finished_at = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+
+class ComponentRegistry:
+    """Named, lazily initialized heavy components (models, indexes, remote clients).
+
+    Each component is loaded at most once by a background task; blocking
+    loaders run in a worker thread so several components load in parallel
+    and the event loop keeps serving health checks meanwhile. Failed
+    components are retried on demand after ``retry_interval`` seconds.
+    """
+
+    def __init__(self, engines: Optional[List[str]] = None, retry_interval: Optional[float] = None):
+        self.engines = engines if engines is not None else enabled_engines()
+        if retry_interval is None:
+            retry_interval = float(os.getenv("COMPONENT_RETRY_SECONDS", "10"))
+        self.retry_interval = retry_interval
+        self._components: Dict[str, _Component] = {}
+
+    def register(self, name: str, loader: Callable[[], Union[Any, Awaitable[Any]]]):
+        """Register a loader: a plain function (run in a thread) or a coroutine function."""
+        self._components[name] = _Component(name, loader)
+
+    def _required(self) -> List[str]:
+        names: List[str] = []
+        for engine in self.engines:
+            names.extend(n for n in ENGINE_COMPONENTS[engine] if n not in names)
+        return names
+
+    def fail(self, name: str, error: str):
+        """Mark a component as failed without loading it (a configuration problem found up front).
+
+        It is reported by ``status()`` and retried like any failed load.
+        """
+        component = self._components[name]
+        component.status = "failed"
+        component.error = error
+        component.finished_at = time.monotonic()
+        logger.error("Component %s cannot be loaded: %s", name, error)
+
+    async def _load(self, component: _Component):
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(component.loader):
+                value = await component.loader()
+            else:
+                value = await asyncio.to_thread(component.loader)
+        except Exception as e:
+            component.status = "failed"
+            component.error = f"{type(e).__name__}: {e}"
+            logger.warning("Component %s failed to load: %s", component.name, component.error)
+        else:
+            component.value = value
+            component.status = "ready"
+            component.error = None
+        component.seconds = time.perf_counter() - start
+        component.finished_at = time.monotonic()
+
+    def _start(self, component: _Component):
+        """Start (or restart after the retry interval) the component's loader task."""
+        if component.status == "pending" or (
+            component.status == "failed" and time.monotonic() - component.finished_at >= self.retry_interval
+        ):
+            component.status = "loading"
+            component.task = asyncio.create_task(self._load(component))
+
+    def start(self):
+        """Begin loading every component the enabled engines need, in parallel."""
+        for name in self._required():
+            self._start(self._components[name])
+
+    def preload(self, names: List[str]):
+        """Load ``names`` synchronously, before any event loop runs.
+
+        Used by the pre-fork server (backend/serve.py) so forked workers
+        inherit the loaded components; failures are retried by the workers.
+        """
+        async def load():
+            await asyncio.gather(*(self._load(self._components[name]) for name in names))
+
+        asyncio.run(load())
+
+    async def ensure(self, name: str) -> Any:
+        """Return a component's value, loading it (or waiting for its load) if necessary."""
+        component = self._components[name]
+        if component.status != "ready":
+            self._start(component)
+            if component.task is not None:
+                await asyncio.shield(component.task)
+        if component.status != "ready":
+            raise EngineUnavailable(f"{name} is unavailable: {component.error}")
+        return component.value
+
+    async def ensure_engine(self, engine: str):
+        """Make sure every component of ``engine`` is loaded."""
+        if engine not in self.engines:
+            raise EngineUnavailable(f"Search engine '{engine}' is disabled")
+        await asyncio.gather(*(self.ensure(name) for name in ENGINE_COMPONENTS[engine]))
+
+    def engine_ready(self, engine: str) -> bool:
+        return engine in self.engines and all(
+            self._components[name].status == "ready" for name in ENGINE_COMPONENTS[engine]
+        )
+
+    def ready(self) -> bool:
+        """True once every enabled engine can serve requests."""
+        return all(self.engine_ready(engine) for engine in self.engines)
+
+    def status(self) -> Dict[str, Any]:
+        """Per-engine readiness plus per-component state for health endpoints."""
+        # Kick off a retry of failed components so readiness can recover
+        required = self._required()
+        for name in required:
+            self._start(self._components[name])
+        return {
+            "ready": self.ready(),
+            "engines": {
+                engine: {
+                    "enabled": engine in self.engines,
+                    "ready": self.engine_ready(engine),
+                }
+                for engine in ENGINE_COMPONENTS
+            },
+            "components": {
+                c.name: {
+                    "status": "disabled" if c.status == "pending" and c.name not in required else c.status,
+                    "seconds": round(c.seconds, 3) if c.seconds is not None else None,
+                    "error": c.error,
+                }
+                for c in self._components.values()
+            },
+        }
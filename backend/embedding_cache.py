@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+
+
+class EmbeddingCache:
+    """Bounded LRU/TTL cache for query embeddings with an optional SQLite tier.
+
+    Keys are (model name, normalized query text), so the FAISS encoder and the
+    OpenAI embeddings used by Qdrant can share one cache without colliding.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl: float = 86400.0, persist_path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.persist_path = persist_path
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._connect()
+
+    def _connect(self):
+        Path(self.persist_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.persist_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT, text TEXT, created REAL, vector BLOB, PRIMARY KEY (model, text))"
+        )
+        self._db.commit()
+
+    def reopen(self):
+        """Reconnect the SQLite tier; a connection must not be used across fork(),
+        so pre-forked workers call this once after forking."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+            if self.persist_path:
+                self._connect()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize query text so trivially different spellings share an entry."""
+        return unicodedata.normalize("NFC", " ".join(text.split())).lower()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _read_disk(self, key: Tuple[str, str]) -> Optional[Tuple[float, np.ndarray]]:
+        row = self._db.execute(
+            "SELECT created, vector FROM embeddings WHERE model = ? AND text = ?", key
+        ).fetchone()
+        if row is None or self._expired(row[0]):
+            return None
+        vector = np.frombuffer(row[1], dtype=np.float32)
+        return row[0], vector
+
+    def _store(self, key: Tuple[str, str], created: float, vector: np.ndarray):
+        self._entries[key] = (created, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached (read-only) vector, or None on a miss."""
+        key = (model, self.normalize(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if self._db is not None:
+                entry = self._read_disk(key)
+                if entry is not None:
+                    self._store(key, *entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector) -> np.ndarray:
+        """Store a vector and return the cached read-only copy."""
+        key = (model, self.normalize(text))
+        stored = np.array(vector, dtype=np.float32).ravel()
+        stored.setflags(write=False)
+        created = time.time()
+        with self._lock:
+            self._store(key, created, stored)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], created, stored.tobytes())
+                )
+                self._db.commit()
+        return stored
+
+    def get_or_compute(self, model: str, text: str, compute: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Return the cached vector or compute, store and return it."""
+        vector = self.get(model, text)
+        if vector is None:
+            vector = self.put(model, text, compute(text))
+        return vector
+
+    def clear(self):
+        """Drop all in-memory entries (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+                ttl=float(os.getenv("EMBEDDING_CACHE_TTL", "86400")),
+                persist_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+            )
+        return _cache
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from .policy_store import PolicyStore
+
+
+class FacetCounts:
+    """Candidate/topic values with per-(candidate, topic) policy counts."""
+
+    def __init__(self, counts: Dict[Tuple[str, str], int]):
+        self.counts = counts
+        self.candidate_counts: Dict[str, int] = {}
+        self.topic_counts: Dict[str, int] = {}
+        for (candidate, topic), count in counts.items():
+            if candidate:
+                self.candidate_counts[candidate] = self.candidate_counts.get(candidate, 0) + count
+            if topic:
+                self.topic_counts[topic] = self.topic_counts.get(topic, 0) + count
+        self.candidates = sorted(self.candidate_counts)
+        self.topics = sorted(self.topic_counts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "candidates": [{"value": c, "count": self.candidate_counts[c]} for c in self.candidates],
+            "topics": [{"value": t, "count": self.topic_counts[t]} for t in self.topics],
+            "pairs": [
+                {"candidate": c, "topic": t, "count": n}
+                for (c, t), n in sorted(self.counts.items())
+            ],
+            "total": sum(self.counts.values()),
+        }
+
+
+class FacetService:
+    """Cached facet counts for the local policy table and the Qdrant collection.
+
+    Local facets are recomputed when the PolicyStore version changes. Qdrant
+    facets are keyed by the collection behind the alias and its point count,
+    which is re-checked at most every ``check_interval`` seconds, so a new
+    upload (alias swap) or in-place ingestion invalidates them without
+    scanning the collection on every request.
+    """
+
+    def __init__(self, store: PolicyStore, check_interval: Optional[float] = None):
+        self.store = store
+        if check_interval is None:
+            check_interval = float(os.getenv("FACET_CHECK_INTERVAL", "30"))
+        self.check_interval = check_interval
+        self._local: Optional[Tuple[int, FacetCounts]] = None
+        self._qdrant: Optional[Tuple[Tuple[str, int], FacetCounts]] = None
+        self._qdrant_checked = 0.0
+        self._qdrant_lock = asyncio.Lock()
+
+    def local(self) -> FacetCounts:
+        """Facets of the policy table (FAISS engine and the home page)."""
+        self.store.refresh()
+        if self._local is None or self._local[0] != self.store.version:
+            counts: Dict[Tuple[str, str], int] = {}
+            for p in self.store.policies:
+                counts[(p.candidate, p.topic)] = counts.get((p.candidate, p.topic), 0) + 1
+            self._local = (self.store.version, FacetCounts(counts))
+        return self._local[1]
+
+    async def qdrant(self, pipeline) -> FacetCounts:
+        """Facets of the Qdrant collection, recomputed only when it changed."""
+        if self._qdrant is not None and time.monotonic() - self._qdrant_checked < self.check_interval:
+            return self._qdrant[1]
+        async with self._qdrant_lock:
+            if self._qdrant is not None and time.monotonic() - self._qdrant_checked < self.check_interval:
+                return self._qdrant[1]
+            signature = await pipeline.collection_signature()
+            if self._qdrant is None or self._qdrant[0] != signature:
+                self._qdrant = (signature, FacetCounts(await pipeline.facet_counts()))
+            self._qdrant_checked = time.monotonic()
+            return self._qdrant[1]
+
+    def invalidate(self):
+        """Drop cached facets (e.g. after a reindex triggered from this process)."""
+        self._local = None
+        self._qdrant = None
+        self._qdrant_checked = 0.0
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+import openai
+from openai import AsyncOpenAI
+from .clients import get_async_openai
+from .metrics import REGISTRY, CallbackMetric, Counter
+from .models.schema import Policy
+
+logger = logging.getLogger(__name__)
+
+LLM_CALLS = REGISTRY.register(Counter(
+    "policyfinder_llm_calls_total",
+    "LLM call attempts by outcome (ok, retry, hedge, timeout, error, circuit_open).",
+    ["outcome"]
+))
+
+# Transient failures worth another attempt; anything else (4xx) is raised as is
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class LLMUnavailable(Exception):
+    """The LLM did not answer within the deadline, kept failing or the circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail fast for ``reset_seconds``; then one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("LLM circuit opened after %d consecutive failures", self.failures)
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LLMGateway:
+    """Chat completions with a deadline, jittered retries, optional hedging and a circuit breaker.
+
+    Every call gets ``deadline`` seconds in total; each attempt is bounded by
+    what is left of it. Retryable failures (timeouts, connection errors, 429,
+    5xx) are retried with full-jitter exponential backoff while the deadline
+    allows. With ``hedge_after`` set, a second identical request is started
+    when the first has not answered after that many seconds, and the first
+    response wins. When the deadline runs out, the retries are exhausted or
+    the circuit is open, ``LLMUnavailable`` is raised so callers can answer
+    from the retrieved policies instead (see ``extractive_answer``).
+    Connections come from the shared pooled client; the client's own retries
+    are disabled so only the gateway retries.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        deadline: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        hedge_after: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.client = (client or get_async_openai()).with_options(max_retries=0)
+        self.deadline = deadline if deadline is not None else float(os.getenv("LLM_DEADLINE_SECONDS", "15"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self.backoff = backoff if backoff is not None else float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.25"))
+        # 0 disables hedging
+        self.hedge_after = hedge_after if hedge_after is not None else float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        )
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def _request(self, kwargs: Dict[str, Any], timeout: float):
+        return await asyncio.wait_for(self.client.chat.completions.create(timeout=timeout, **kwargs), timeout)
+
+    async def _hedged(self, kwargs: Dict[str, Any], timeout: float):
+        """One attempt, duplicated after ``hedge_after`` seconds without an answer."""
+        if self.hedge_after <= 0 or self.hedge_after >= timeout:
+            return await self._request(kwargs, timeout)
+        end = time.monotonic() + timeout
+        tasks = {asyncio.ensure_future(self._request(kwargs, timeout))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                LLM_CALLS.inc(outcome="hedge")
+                tasks.add(asyncio.ensure_future(self._request(kwargs, end - time.monotonic())))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(0.0, end - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _call(self, kwargs: Dict[str, Any], deadline: Optional[float], attempt_call):
+        """Run ``attempt_call`` (one attempt) under the deadline, retry policy and breaker."""
+        end = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                LLM_CALLS.inc(outcome="circuit_open")
+                raise LLMUnavailable("circuit open")
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                LLM_CALLS.inc(outcome="timeout")
+                raise LLMUnavailable("deadline exceeded")
+            try:
+                result = await attempt_call(kwargs, remaining)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                timed_out = isinstance(e, (asyncio.TimeoutError, openai.APITimeoutError))
+                delay = self._delay(attempt)
+                if attempt >= self.max_retries or time.monotonic() + delay >= end:
+                    LLM_CALLS.inc(outcome="timeout" if timed_out else "error")
+                    raise LLMUnavailable(f"{type(e).__name__}: {e}") from e
+                LLM_CALLS.inc(outcome="retry")
+                logger.info("LLM call failed (%s), retrying in %.2fs", type(e).__name__, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                # Not the LLM's availability (e.g. a bad request): release a half-open trial
+                self.breaker.record_success()
+                LLM_CALLS.inc(outcome="error")
+                raise
+            self.breaker.record_success()
+            LLM_CALLS.inc(outcome="ok")
+            return result
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float = 0.5,
+        model: str = "gpt-4o-mini",
+        deadline: Optional[float] = None
+    ):
+        """Chat completion within ``deadline`` seconds (default LLM_DEADLINE_SECONDS)."""
+        kwargs = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        return await self._call(kwargs, deadline, self._hedged)
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float = 0.5,
+        model: str = "gpt-4o-mini",
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Stream completion tokens. The deadline and retries cover the time to the
+        first token; once tokens flow, the stream is read to the end."""
+        kwargs = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens, "stream": True}
+
+        async def first_token(kwargs: Dict[str, Any], timeout: float):
+            end = time.monotonic() + timeout
+            stream = await self._request(kwargs, timeout)
+            chunks = stream.__aiter__()
+            try:
+                # Wait for the first content chunk so a stalled stream is retried too
+                while True:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, end - time.monotonic()))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        return chunk.choices[0].delta.content, chunks
+            except StopAsyncIteration:
+                return None, None
+            except BaseException:
+                await stream.close()
+                raise
+
+        token, chunks = await self._call(kwargs, deadline, first_token)
+        if token is None:
+            return
+        yield token
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def state(self) -> str:
+        return self.breaker.state
+
+
+def _first_sentence(text: str, limit: int = 160) -> str:
+    text = " ".join(text.split())
+    for end in (". ", "다. ", "니다. "):
+        index = text.find(end)
+        if 0 < index < limit:
+            return text[:index + len(end)].strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def extractive_answer(policies: List[Policy], max_policies: int = 5) -> str:
+    """Answer assembled from the retrieved policies themselves, used when the LLM is unavailable."""
+    if not policies:
+        return "죄송합니다. 검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요."
+    lines = ["AI 답변을 생성하지 못해 질문과 관련도가 높은 공약을 그대로 보여드립니다."]
+    for policy in policies[:max_policies]:
+        lines.append(f"- {policy.candidate} ({policy.topic}): {_first_sentence(policy.text)} [공약: {policy.id}]")
+    return "\n".join(lines)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide LLM gateway (shares one circuit breaker across engines)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+
+REGISTRY.register(CallbackMetric(
+    "policyfinder_llm_circuit_open",
+    "1 while the shared LLM gateway's circuit breaker is open.",
+    [],
+    lambda: {(): float(_gateway is not None and _gateway.state() == "open")}
+))
@@ -2,142 +2,679 @@ from fastapi import FastAPI, Request, Form
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+import asyncio
+import functools
+import logging
 import os
+import secrets
+import signal
+import time
 from dotenv import load_dotenv
 import json
-from fastapi.responses import HTMLResponse
-from typing import List
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 # Set environment variable to disable tokenizers parallelism warning
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from .models.schema import Question, PolicyResponse
+from .models.schema import (
+    BatchQuestion,
+    CandidateComparison,
+    CompareQuestion,
+    ComparisonResponse,
+    PolicyResponse,
+    Question
+)
 from .data_loader import DataLoader
+from .policy_store import get_policy_store
+from .embedding_cache import get_embedding_cache
+from .answer_cache import get_answer_cache
+from .components import ComponentRegistry
+from .facets import FacetCounts, FacetService
+from .metrics import REGISTRY, REQUEST_SECONDS, REQUESTS, CallbackMetric, monitor_event_loop
+from .llm_gateway import LLMUnavailable
+from .rag.batcher import bounded_as_completed
+from .rag.compare import COMPARE_MODES, ComparisonGenerator
 from .rag.embed import PolicyEmbedder
 from .rag.retrieve import PolicyRetriever
+from .rag.summaries import SummaryStore, is_summary_request
 from .rag.generate import ResponseGenerator
+from .qdrant_rag.qdrant_rag_pipeline import QdrantRAGPipeline
 
 # Load environment variables
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="PolicyFinder")
 
 # Setup templates
 templates = Jinja2Templates(directory="backend/templates")
 
-# Initialize components
-data_loader = DataLoader()
+# Initialize components. These are cheap: the encoder model, the FAISS index
+# and the Qdrant connection are loaded by the component registry below.
+policy_store = get_policy_store()
+data_loader = DataLoader(store=policy_store)
 embedder = PolicyEmbedder()
-retriever = PolicyRetriever(embedder)
+retriever = PolicyRetriever(embedder, store=policy_store)
 faiss_generator = ResponseGenerator(use_qdrant=False)
-qdrant_generator = ResponseGenerator(use_qdrant=True)
+comparison_generator = ComparisonGenerator()
+# Precomputed candidate x topic summaries (script/build_summaries.py)
+summary_store = SummaryStore(policy_store) if os.getenv("PRECOMPUTED_SUMMARIES", "1") == "1" else None
+answer_cache = get_answer_cache()
+facet_service = FacetService(policy_store)
+warm_up = os.getenv("WARMUP", "1") == "1"
+# /ask/batch: max questions per request and max concurrent LLM calls
+batch_max_questions = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Seconds between checks for a newly published FAISS index snapshot (0: only on SIGHUP or /admin/reload)
+index_check_interval = float(os.getenv("INDEX_CHECK_INTERVAL", "5"))
+# Token for the /admin endpoints (Authorization: Bearer <token>); without it they only answer loopback clients
+admin_token = os.getenv("ADMIN_TOKEN", "")
+# Seconds between event loop lag samples (policyfinder_event_loop_lag_seconds; 0 disables)
+event_loop_monitor_interval = float(os.getenv("EVENT_LOOP_MONITOR_INTERVAL", "0.1"))
+
+def _load_policy_table():
+    # Parses the policy data and builds the postings and local facet counts
+    return facet_service.local()
+
+def _load_encoder():
+    if warm_up:
+        embedder.warm_up_encoder()
+    return embedder.query_encoder
+
+def _load_faiss_index():
+    if not embedder.load_index():
+        raise FileNotFoundError("No FAISS index found. Please run 'python script/embed_policies.py' first.")
+    if warm_up:
+        embedder.warm_up_index()
+
+async def _load_qdrant() -> QdrantRAGPipeline:
+    pipeline = QdrantRAGPipeline(local_encoder=embedder)
+    if await pipeline.check_ready():
+        # Queries will be encoded locally
+        await components.ensure("encoder")
+    return pipeline
+
+# Engines come from ENABLED_ENGINES; only their components are loaded
+components = ComponentRegistry()
+components.register("policy_table", _load_policy_table)
+components.register("encoder", _load_encoder)
+components.register("faiss_index", _load_faiss_index)
+components.register("qdrant", _load_qdrant)
+try:
+    # ENCODER_BACKEND=onnx needs extra packages and an exported model; report
+    # them on /readyz at startup instead of at the first encoder load
+    embedder.check_query_encoder()
+except (ImportError, FileNotFoundError) as e:
+    components.fail("encoder", f"{type(e).__name__}: {e}")
+
+def fork_safe_components() -> List[str]:
+    """Components a pre-fork master (backend/serve.py) loads once and shares with its workers.
+
+    The policy table (PolicyStore and local facet counts), the PyTorch encoder
+    and the FAISS index are plain memory and survive fork(); ONNX Runtime
+    sessions (own thread pools) and the Qdrant client (sockets) are loaded by
+    each worker instead. The policy table comes first so its many small
+    objects are allocated before the GC is frozen.
+    """
+    names = ["policy_table"]
+    if "faiss" in components.engines:
+        names.append("faiss_index")
+    uses_encoder = "faiss" in components.engines or os.getenv("QDRANT_VECTOR_SPACE", "auto") != "ada"
+    if uses_encoder and embedder.encoder_backend == "torch":
+        names.append("encoder")
+    return names
+
+async def _reload_index() -> bool:
+    """Swap in the published FAISS index snapshot if it is not the one being served.
+
+    Loads in a worker thread; searches already running finish on the old index.
+    """
+    if embedder.index is None:
+        # Not loaded yet: the component loader reads the current snapshot
+        return False
+    reloaded = await asyncio.to_thread(embedder.reload_index)
+    if reloaded:
+        logger.info("Serving FAISS index snapshot %s (%d vectors)", embedder.snapshot, embedder.index.ntotal)
+    return reloaded
+
+_reload_requested = asyncio.Event()
+
+async def _watch_index():
+    """Reload the index when a new snapshot is published, checked every
+    ``index_check_interval`` seconds and immediately on SIGHUP."""
+    failed: Optional[str] = None
+    while True:
+        try:
+            await asyncio.wait_for(_reload_requested.wait(), index_check_interval if index_check_interval > 0 else None)
+        except asyncio.TimeoutError:
+            pass
+        requested = _reload_requested.is_set()
+        _reload_requested.clear()
+        snapshot = embedder.current_snapshot()
+        if snapshot == failed and not requested:
+            continue
+        try:
+            await _reload_index()
+            failed = None
+        except Exception as e:
+            failed = snapshot
+            logger.warning("Could not load index snapshot %s, still serving %s: %s", snapshot, embedder.snapshot, e)
+
+_index_watcher: Optional[asyncio.Task] = None
+_loop_monitor: Optional[asyncio.Task] = None
 
-# Load index on startup
 @app.on_event("startup")
 async def startup_event():
-    if not embedder.load_index():
-        print("Warning: No FAISS index found. Please run 'python script/embed_policies.py' first.")
+    global _index_watcher, _loop_monitor
+    # Load in the background so health checks are served right away
+    components.start()
+    if event_loop_monitor_interval > 0:
+        _loop_monitor = asyncio.create_task(monitor_event_loop(event_loop_monitor_interval))
+    if "faiss" in components.engines:
+        _index_watcher = asyncio.create_task(_watch_index())
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _reload_requested.set)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            # No SIGHUP on this platform, or not running in the main thread
+            pass
+
+async def _qdrant_pipeline() -> QdrantRAGPipeline:
+    """The Qdrant pipeline, waiting for the engine's components if they are still loading."""
+    await components.ensure_engine("qdrant")
+    return await components.ensure("qdrant")
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and the event loop responds."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once every enabled engine can serve, 503 (with per-engine detail) before."""
+    status = components.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Render the home page with search interface."""
-    # Load policy data to get unique candidates and topics
-    with open("data/policy_data.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-        candidates = sorted(set(p["candidate"] for p in data))
-        topics = sorted(set(p["topic"] for p in data))
+    # Candidates and topics (with policy counts) from the cached facets
+    facets = facet_service.local()
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
-            "candidates": candidates,
-            "topics": topics
+            "candidates": facets.candidates,
+            "topics": facets.topics,
+            "candidate_counts": facets.candidate_counts,
+            "topic_counts": facets.topic_counts
+        }
+    )
+
+def _data_version():
+    """Version token for the policy data and FAISS index behind cached answers."""
+    return (policy_store.version, embedder.index_version)
+
+async def _answer_with_cache(engine: str, question: Question, policies, query_vector, generate):
+    """Serve an answer from the answer cache or generate it once for identical in-flight questions."""
+    answer_cache.invalidate_if_stale(_data_version())
+    key = answer_cache.make_key(
+        engine,
+        question.candidate_filter,
+        question.topic_filter,
+        [p.id for p in policies]
+    )
+    return await answer_cache.get_or_generate(key, question.question, query_vector, generate)
+
+async def _retrieve(question: Question):
+    """Run retrieval on the selected engine and return (policies, search strategy, query vector)."""
+    if question.search_engine == "qdrant":
+        pipeline = await _qdrant_pipeline()
+        # Qdrant 검색 파라미터 설정
+        search_params = {
+            "k": 5,  # 상위 5개 결과
+            "score_threshold": 0.7  # 유사도 임계값
         }
+        
+        # Qdrant 검색 실행 (요청별 벡터 공간 선택, 사용한 쿼리 벡터를 함께 반환)
+        policies, query_vector, vector_space = await pipeline.search_policies(
+            question.question,
+            candidate_filter=question.candidate_filter,
+            topic_filter=question.topic_filter,
+            vector_space=question.vector_space,
+            **search_params
+        )
+        return policies, f"qdrant_{vector_space}", query_vector
+
+    # FAISS를 사용하는 경우 (기존 로직)
+    await components.ensure_engine("faiss")
+    # The query vector comes back from retrieval, so the query is encoded once
+    return await retriever.aretrieve_with_strategy(
+        question.question,
+        candidate_filter=question.candidate_filter,
+        topic_filter=question.topic_filter
     )
 
+def _engine(question: Question) -> str:
+    return "qdrant" if question.search_engine == "qdrant" else "faiss"
+
+def _observe_request(engine: str, endpoint: str, start: float, status: str):
+    REQUEST_SECONDS.observe(time.perf_counter() - start, engine=engine, endpoint=endpoint)
+    REQUESTS.inc(engine=engine, endpoint=endpoint, status=status)
+
+def _status(response: PolicyResponse) -> str:
+    if response.search_strategy == "summary":
+        return "summary"
+    if response.fallback:
+        return "fallback"
+    return "cached" if response.cached else "ok"
+
 @app.post("/ask")
 async def ask_question(question: Question) -> PolicyResponse:
     """Process question and return response with sources."""
+    start = time.perf_counter()
     try:
-        # 검색 엔진에 따라 다른 처리
-        if question.search_engine == "qdrant":
-            print("Qdrant 검색 엔진 사용")
-            # Qdrant 검색 파라미터 설정
-            search_params = {
-                "k": 5,  # 상위 5개 결과
-                "score_threshold": 0.7  # 유사도 임계값
-            }
+        response = await _answer_question(question)
+        _observe_request(_engine(question), "ask", start, _status(response))
+        return response
+    except Exception as e:
+        logger.exception("질문 처리 중 오류 발생: %s", e)
+        _observe_request(_engine(question), "ask", start, "error")
+        return PolicyResponse(
+            answer="죄송합니다. 처리 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+            sources=[]
+        )
+
+def _precomputed_summary(question: Question) -> Optional[PolicyResponse]:
+    """Answer a plain summary request on a filter selection from the summary store, without an LLM call."""
+    if summary_store is None or not is_summary_request(
+        question.question, question.candidate_filter, question.topic_filter
+    ):
+        return None
+    summary = summary_store.lookup(question.candidate_filter, question.topic_filter)
+    if summary is None:
+        return None
+    answer, sources = summary
+    return PolicyResponse(answer=answer, sources=sources, search_strategy="summary")
+
+async def _answer_question(question: Question) -> PolicyResponse:
+    """Retrieve and answer one question on the selected engine."""
+    summary = _precomputed_summary(question)
+    if summary is not None:
+        return summary
+
+    policies, strategy, query_vector = await _retrieve(question)
+    return await _respond(question, policies, strategy, query_vector)
+
+async def _respond(question: Question, policies, strategy: str, query_vector) -> PolicyResponse:
+    """Answer a question from its retrieved policies, through the answer cache."""
+    # 검색 엔진에 따라 다른 처리
+    if question.search_engine == "qdrant":
+        pipeline = await _qdrant_pipeline()
+        
+        # 검색 결과가 있는 경우
+        if policies:
+            async def generate():
+                answer = await pipeline.generate_answer(question.question, policies)
+                return answer, policies
+
+            try:
+                answer, sources, cached = await _answer_with_cache(
+                    "qdrant", question, policies, query_vector, generate
+                )
+            except LLMUnavailable as e:
+                return _fallback_response("qdrant", policies, strategy, e)
             
-            # Qdrant 검색 실행
-            policies = qdrant_generator.qdrant_pipeline.run_pledge_query_with_sources(
-                question.question,
-                candidate_filter=question.candidate_filter,
-                topic_filter=question.topic_filter,
-                **search_params
+            # FAISS와 동일한 형식으로 응답 반환
+            return PolicyResponse(
+                answer=answer,
+                sources=sources,
+                search_strategy=strategy,
+                cached=cached
             )
-            
-            # 검색 결과가 있는 경우
-            if policies:
-                # 컨텍스트 생성
-                context = qdrant_generator.qdrant_pipeline._create_context_from_policies(policies)
-                
-                # 응답 생성
-                response = qdrant_generator.qdrant_pipeline.openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": "당신은 대선 후보들의 공약을 분석하고 비교하는 전문가입니다. 주어진 정보만을 사용하여 정확하고 객관적인 답변을 제공해주세요."},
-                        {"role": "user", "content": qdrant_generator.qdrant_pipeline.prompt_template.format(
-                            context=context,
-                            input=question.question
-                        )}
-                    ],
-                    temperature=0.5,
-                    max_tokens=4096
-                )
-                
-                answer = response.choices[0].message.content
-                
-                # FAISS와 동일한 형식으로 응답 반환
-                return PolicyResponse(
-                    answer=answer,
-                    sources=policies
+        else:
+            return PolicyResponse(answer="검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요.", sources=[])
+    else:
+        if not policies:
+            answer, referenced_policies = await faiss_generator.generate_response(question.question, policies)
+            return PolicyResponse(answer=answer, sources=referenced_policies, search_strategy=strategy)
+
+        async def generate():
+            # Fallback answers are produced below, outside the answer cache
+            return await faiss_generator.generate_response(question.question, policies, fallback=False)
+
+        try:
+            answer, referenced_policies, cached = await _answer_with_cache(
+                "faiss", question, policies, query_vector, generate
+            )
+        except LLMUnavailable as e:
+            return _fallback_response("faiss", policies, strategy, e)
+        return PolicyResponse(
+            answer=answer,
+            sources=referenced_policies,
+            search_strategy=strategy,
+            cached=cached
+        )
+
+def _fallback_response(engine: str, policies, strategy: str, error: Exception) -> PolicyResponse:
+    """Extractive answer from the retrieved policies when the LLM gateway gives up (never cached)."""
+    logger.warning("LLM 응답 실패로 추출형 답변 반환 (%s): %s", engine, error)
+    answer, referenced_policies = faiss_generator.fallback_response(policies)
+    return PolicyResponse(answer=answer, sources=referenced_policies, search_strategy=strategy, fallback=True)
+
+async def _retrieve_batch(questions: List[Question]) -> List[Any]:
+    """Batched retrieval: one encoder call and one multi-query search per engine
+    (and per Qdrant vector space).
+
+    Returns (policies, search strategy, query vector) per question, or the
+    exception that failed its group.
+    """
+    results: List[Any] = [None] * len(questions)
+    groups: Dict[Tuple[str, Optional[str]], List[int]] = {}
+    for i, question in enumerate(questions):
+        engine = _engine(question)
+        groups.setdefault((engine, question.vector_space if engine == "qdrant" else None), []).append(i)
+
+    async def run(engine: str, vector_space: Optional[str], indices: List[int]):
+        batch = [questions[i] for i in indices]
+        queries = [(q.question, q.candidate_filter, q.topic_filter) for q in batch]
+        try:
+            if engine == "qdrant":
+                pipeline = await _qdrant_pipeline()
+                found = await pipeline.search_policies_batch(
+                    queries, k=5, score_threshold=0.7, vector_space=vector_space
                 )
+                group = [(policies, f"qdrant_{space}", vector) for policies, vector, space in found]
             else:
-                return PolicyResponse(answer="검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요.", sources=[])
+                await components.ensure_engine("faiss")
+                group = await retriever.aretrieve_batch(queries)
+        except Exception as e:
+            logger.exception("배치 검색 중 오류 발생 (%s): %s", engine, e)
+            group = [e] * len(indices)
+        for i, result in zip(indices, group):
+            results[i] = result
+
+    await asyncio.gather(*(run(engine, space, indices) for (engine, space), indices in groups.items()))
+    return results
+
+async def _answer_batch(questions: List[Question]) -> AsyncIterator[str]:
+    """Yield one NDJSON line per question as its answer finishes."""
+    start = time.perf_counter()
+    summaries = [_precomputed_summary(q) for q in questions]
+    pending = [i for i, summary in enumerate(summaries) if summary is None]
+    retrieved = dict(zip(pending, await _retrieve_batch([questions[i] for i in pending])))
+
+    async def answer(i: int) -> PolicyResponse:
+        if summaries[i] is not None:
+            return summaries[i]
+        if isinstance(retrieved[i], Exception):
+            raise retrieved[i]
+        return await _respond(questions[i], *retrieved[i])
+
+    jobs = [functools.partial(answer, i) for i in range(len(questions))]
+    async for i, response, error in bounded_as_completed(jobs, batch_concurrency):
+        engine = _engine(questions[i])
+        if error is not None:
+            logger.error("배치 질문 %d 처리 중 오류 발생: %s", i, error)
+            _observe_request(engine, "ask_batch", start, "error")
+            line = {"index": i, "error": "죄송합니다. 처리 중 오류가 발생했습니다."}
         else:
-            # FAISS를 사용하는 경우 (기존 로직)
-            policies = retriever.retrieve(
-                question.question,
-                candidate_filter=question.candidate_filter,
-                topic_filter=question.topic_filter
-            )
-            answer, referenced_policies = faiss_generator.generate_response(question.question, policies)
-            return PolicyResponse(answer=answer, sources=referenced_policies)
+            _observe_request(engine, "ask_batch", start, _status(response))
+            line = {"index": i, **response.model_dump()}
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+@app.post("/ask/batch")
+async def ask_batch(batch: BatchQuestion):
+    """Answer many questions at once as NDJSON, one line per question in completion order.
+
+    Retrieval is batched per engine; LLM calls run concurrently up to BATCH_CONCURRENCY.
+    Each line carries the question's ``index`` and either the /ask response fields or ``error``.
+    """
+    if len(batch.questions) > batch_max_questions:
+        return JSONResponse(
+            {"detail": f"최대 {batch_max_questions}개의 질문까지 한 번에 처리할 수 있습니다."},
+            status_code=413
+        )
+    return StreamingResponse(_answer_batch(batch.questions), media_type="application/x-ndjson")
+
+async def _compare(request: CompareQuestion) -> ComparisonResponse:
+    """Embed once, retrieve top-k per candidate in one grouped search, then compare."""
+    engine = "qdrant" if request.search_engine == "qdrant" else "faiss"
+    candidates = request.candidates or (await _facets(engine)).candidates
+    if engine == "qdrant":
+        pipeline = await _qdrant_pipeline()
+        grouped, space = await pipeline.search_policies_grouped(
+            request.question,
+            candidates,
+            topic_filter=request.topic_filter,
+            k=request.k,
+            vector_space=request.vector_space
+        )
+        strategy = f"qdrant_{space}_grouped"
+    else:
+        await components.ensure_engine("faiss")
+        grouped = await retriever.aretrieve_grouped(
+            request.question, candidates, k=request.k, topic_filter=request.topic_filter
+        )
+        strategy = "grouped"
+
+    mode = request.mode or comparison_generator.mode
+    answer, summaries, sources = await comparison_generator.compare(request.question, grouped, engine=engine, mode=mode)
+    return ComparisonResponse(
+        answer=answer,
+        candidates=[
+            CandidateComparison(candidate=c, summary=summaries[c], sources=sources[c])
+            for c in candidates
+        ],
+        mode=mode,
+        search_strategy=strategy
+    )
+
+@app.post("/compare")
+async def compare_candidates(request: CompareQuestion):
+    """Compare candidates on one question with a single embedding, one grouped search
+    and either one comparison prompt (mode=single) or parallel per-candidate summaries (mode=parallel)."""
+    if request.mode is not None and request.mode not in COMPARE_MODES:
+        return JSONResponse({"detail": f"mode must be one of {', '.join(COMPARE_MODES)}"}, status_code=422)
+    engine = "qdrant" if request.search_engine == "qdrant" else "faiss"
+    start = time.perf_counter()
+    try:
+        response = await _compare(request)
+        _observe_request(engine, "compare", start, "ok")
+        return response
     except Exception as e:
-        print(f"질문 처리 중 오류 발생: {str(e)}")
-        return PolicyResponse(
+        logger.exception("후보 비교 중 오류 발생: %s", e)
+        _observe_request(engine, "compare", start, "error")
+        return ComparisonResponse(
             answer="죄송합니다. 처리 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
-            sources=[]
+            candidates=[],
+            mode=request.mode or comparison_generator.mode
+        )
+
+def _sse(event: str, data) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_answer(question: Question) -> AsyncIterator[str]:
+    """Yield sources, answer tokens and the referenced sources as server-sent events."""
+    engine = _engine(question)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        summary = _precomputed_summary(question)
+        if summary is not None:
+            sources = [p.model_dump() for p in summary.sources]
+            yield _sse("sources", {"sources": sources, "search_strategy": "summary"})
+            yield _sse("token", {"text": summary.answer})
+            yield _sse("done", {"answer": summary.answer, "sources": sources, "cached": False})
+            status = "summary"
+            return
+
+        policies, strategy, query_vector = await _retrieve(question)
+        yield _sse("sources", {
+            "sources": [p.model_dump() for p in policies],
+            "search_strategy": strategy
+        })
+        if not policies:
+            yield _sse("done", {
+                "answer": "죄송합니다. 검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요.",
+                "sources": [],
+                "cached": False
+            })
+            status = "ok"
+            return
+
+        answer_cache.invalidate_if_stale(_data_version())
+        key = answer_cache.make_key(
+            engine, question.candidate_filter, question.topic_filter, [p.id for p in policies]
         )
+        cached = answer_cache.lookup(key, question.question, query_vector)
+        fallback = False
+        if cached is not None:
+            answer = cached[0]
+            yield _sse("token", {"text": answer})
+        else:
+            if engine == "qdrant":
+                pipeline = await _qdrant_pipeline()
+                tokens = pipeline.stream_answer(question.question, policies)
+            else:
+                tokens = faiss_generator.stream_response(question.question, policies)
+            parts = []
+            try:
+                async for token in tokens:
+                    parts.append(token)
+                    yield _sse("token", {"text": token})
+            except LLMUnavailable as e:
+                # The gateway only gives up before the first token
+                logger.warning("LLM 응답 실패로 추출형 답변 반환 (%s): %s", engine, e)
+                parts = [faiss_generator.fallback_response(policies)[0]]
+                fallback = True
+                yield _sse("token", {"text": parts[0]})
+            answer = "".join(parts)
+
+        # [공약: ID]로 인용된 공약만 최종 출처로 반환
+        referenced_policies = faiss_generator.referenced_policies(answer, policies, engine=engine)
+        if cached is None and not fallback:
+            # /ask와 같은 형식으로 캐시에 저장 (Qdrant는 검색된 전체 공약)
+            sources = policies if engine == "qdrant" else referenced_policies
+            answer_cache.store(key, question.question, query_vector, answer, sources)
+        yield _sse("done", {
+            "answer": answer,
+            "sources": [p.model_dump() for p in referenced_policies],
+            "cached": cached is not None,
+            "fallback": fallback
+        })
+        status = "fallback" if fallback else "ok" if cached is None else "cached"
+    except Exception as e:
+        logger.exception("스트리밍 질문 처리 중 오류 발생: %s", e)
+        yield _sse("error", {"message": "죄송합니다. 처리 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요."})
+    finally:
+        _observe_request(engine, "ask_stream", start, status)
+
+@app.post("/ask/stream")
+async def ask_question_stream(question: Question) -> StreamingResponse:
+    """Stream the answer as server-sent events: sources, tokens, then referenced sources."""
+    return StreamingResponse(
+        _stream_answer(question),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _facets(search_engine: str) -> FacetCounts:
+    """Cached facets for the selected engine's data."""
+    if search_engine == "qdrant":
+        return await facet_service.qdrant(await _qdrant_pipeline())
+    return facet_service.local()
 
 @app.get("/candidates")
 async def get_candidates(search_engine: str = "faiss") -> List[str]:
     """Get list of candidates."""
     try:
-        if search_engine == "qdrant":
-            return qdrant_generator.qdrant_pipeline.get_candidates()
-        return faiss_generator.retriever.get_candidates()
+        return (await _facets(search_engine)).candidates
     except Exception as e:
-        print(f"후보 목록 가져오기 오류: {str(e)}")
+        logger.error("후보 목록 가져오기 오류: %s", e)
         return []
 
 @app.get("/topics")
 async def get_topics(search_engine: str = "faiss") -> List[str]:
     """Get list of topics."""
     try:
-        if search_engine == "qdrant":
-            return qdrant_generator.qdrant_pipeline.get_topics()
-        return faiss_generator.retriever.get_topics()
+        return (await _facets(search_engine)).topics
+    except Exception as e:
+        logger.error("주제 목록 가져오기 오류: %s", e)
+        return []
+
+@app.get("/facets")
+async def get_facets(search_engine: str = "faiss"):
+    """Candidates and topics with policy counts, plus per-(candidate, topic) counts."""
+    try:
+        return (await _facets(search_engine)).to_dict()
+    except Exception as e:
+        logger.error("facet 가져오기 오류: %s", e)
+        return {"candidates": [], "topics": [], "pairs": [], "total": 0}
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get cache hit/miss counters."""
+    return {
+        "embedding": get_embedding_cache().stats(),
+        "answer": answer_cache.stats()
+    }
+
+def _admin_allowed(request: Request) -> bool:
+    """ADMIN_TOKEN as a bearer token, or a loopback client when no token is configured."""
+    if admin_token:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and secrets.compare_digest(token.encode(), admin_token.encode())
+    return request.client is not None and request.client.host in ("127.0.0.1", "::1", "localhost")
+
+@app.post("/admin/reload")
+async def admin_reload(request: Request):
+    """Load the published FAISS index snapshot now (also done on SIGHUP and by the snapshot watcher)."""
+    if not _admin_allowed(request):
+        return JSONResponse({"detail": "Forbidden"}, status_code=403)
+    if "faiss" not in components.engines:
+        return JSONResponse({"detail": "Search engine 'faiss' is disabled"}, status_code=409)
+    try:
+        reloaded = await _reload_index()
     except Exception as e:
-        print(f"주제 목록 가져오기 오류: {str(e)}")
-        return [] 
\ No newline at end of file
+        logger.warning("Could not load index snapshot %s: %s", embedder.current_snapshot(), e)
+        return JSONResponse({"detail": f"{type(e).__name__}: {e}", "snapshot": embedder.snapshot}, status_code=500)
+    return {"reloaded": reloaded, "snapshot": embedder.snapshot, "index_version": embedder.index_version}
+
+@app.get("/batching/stats")
+async def get_batching_stats():
+    """Get achieved query micro-batch sizes."""
+    return {"query_encoder": embedder.batcher.stats()}
+
+def _cache_samples(field: str):
+    def collect():
+        return {
+            ("embedding",): get_embedding_cache().stats()[field],
+            ("answer",): answer_cache.stats()[field],
+        }
+    return collect
+
+REGISTRY.register(CallbackMetric(
+    "policyfinder_cache_hits_total", "Cache hits.", ["cache"], _cache_samples("hits"), type="counter"
+))
+REGISTRY.register(CallbackMetric(
+    "policyfinder_cache_misses_total", "Cache misses.", ["cache"], _cache_samples("misses"), type="counter"
+))
+REGISTRY.register(CallbackMetric(
+    "policyfinder_cache_hit_ratio", "Cache hit rate since start.", ["cache"], _cache_samples("hit_rate")
+))
+REGISTRY.register(CallbackMetric(
+    "policyfinder_engine_ready", "1 when the engine can serve requests.", ["engine"],
+    lambda: {(engine,): float(components.engine_ready(engine)) for engine in components.engines}
+))
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage and request latency histograms, counters, cache hit rates."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class Policy(BaseModel):
@@ -11,9 +11,36 @@ class Policy(BaseModel):
 class PolicyResponse(BaseModel):
     answer: str
     sources: List[Policy]
+    search_strategy: Optional[str] = None  # 사용된 필터 검색 전략
+    cached: bool = False  # 답변 캐시 적중 여부
+    fallback: bool = False  # LLM 응답 실패/지연으로 검색된 공약에서 추출한 답변인지 여부
 
 class Question(BaseModel):
     question: str
     candidate_filter: Optional[str] = None
     topic_filter: Optional[str] = None
-    search_engine: str = "faiss"  # 기본값은 faiss 
\ No newline at end of file
+    search_engine: str = "faiss"  # 기본값은 faiss
+    vector_space: Optional[str] = None  # Qdrant 벡터 공간: "ada", "local" 또는 "auto" (기본값은 설정값)
+
+class BatchQuestion(BaseModel):
+    questions: List[Question]  # 질문마다 엔진과 필터를 따로 지정할 수 있음
+
+class CompareQuestion(BaseModel):
+    question: str
+    candidates: Optional[List[str]] = None  # 비교할 후보 (기본값은 전체 후보)
+    topic_filter: Optional[str] = None
+    search_engine: str = "faiss"
+    vector_space: Optional[str] = None
+    k: int = Field(3, ge=1, le=10)  # 후보별로 가져올 공약 수
+    mode: Optional[str] = None  # "single"(비교 프롬프트 한 번) 또는 "parallel"(후보별 요약 병렬 생성)
+
+class CandidateComparison(BaseModel):
+    candidate: str
+    summary: Optional[str] = None  # parallel 모드의 후보별 요약
+    sources: List[Policy]
+
+class ComparisonResponse(BaseModel):
+    answer: str
+    candidates: List[CandidateComparison]
+    mode: str
+    search_strategy: Optional[str] = None
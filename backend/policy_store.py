@@ -0,0 +1,168 @@
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+from .models.schema import Policy
+
+
+class _PolicyTable:
+    """Immutable view of the policy data plus its candidate/topic postings."""
+
+    def __init__(self, policies: List[Policy]):
+        self.policies = policies
+        self.by_id: Dict[int, Policy] = {p.id: p for p in policies}
+        self.candidate_ids: Dict[str, Set[int]] = {}
+        self.topic_ids: Dict[str, Set[int]] = {}
+        for p in policies:
+            self.candidate_ids.setdefault(p.candidate, set()).add(p.id)
+            self.topic_ids.setdefault(p.topic, set()).add(p.id)
+        self.candidates = sorted(self.candidate_ids)
+        self.topics = sorted(self.topic_ids)
+
+
+class PolicyStore:
+    """Process-resident policy table shared by the loader, retriever and API.
+
+    The JSON file is parsed once; afterwards it is only re-read when its mtime
+    changes (checked at most every ``check_interval`` seconds). When a binary
+    snapshot written by ``save_snapshot`` matches the JSON file's mtime and
+    size, it is loaded instead, skipping JSON parsing and model validation.
+    """
+
+    def __init__(
+        self,
+        data_path: str = "data/policy_data.json",
+        check_interval: float = 1.0,
+        snapshot_path: Optional[str] = None
+    ):
+        self.data_path = Path(data_path)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else self.data_path.with_suffix(".bin")
+        self.check_interval = check_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._table: Optional[_PolicyTable] = None
+        self._mtime_ns: Optional[int] = None
+        self._last_check = 0.0
+
+    def _read(self) -> _PolicyTable:
+        if not self.data_path.exists():
+            raise FileNotFoundError(f"Policy data file not found at {self.data_path}")
+        policies = self._read_snapshot()
+        if policies is None:
+            with open(self.data_path, 'r', encoding='utf-8') as f:
+                raw_data = json.load(f)
+            policies = [Policy(**item) for item in raw_data]
+        return _PolicyTable(policies)
+
+    def _source_signature(self) -> List[int]:
+        stat = self.data_path.stat()
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _read_snapshot(self) -> Optional[List[Policy]]:
+        """Policies from the binary snapshot, or None if it is missing or stale."""
+        if not self.snapshot_path.exists():
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if snapshot.get("source") != self._source_signature():
+            return None
+        fields = snapshot["fields"]
+        # Rows were validated when the snapshot was written
+        return [Policy.model_construct(**dict(zip(fields, row))) for row in snapshot["rows"]]
+
+    def save_snapshot(self):
+        """Write the current table as a compact binary snapshot (column names + row tuples)."""
+        table = self._current()
+        fields = list(Policy.model_fields)
+        snapshot = {
+            "source": self._source_signature(),
+            "fields": fields,
+            "rows": [tuple(getattr(p, name) for name in fields) for p in table.policies],
+        }
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the data file if it changed on disk. Returns True if reloaded."""
+        now = time.monotonic()
+        if not force and self._table is not None and now - self._last_check < self.check_interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            mtime_ns = self.data_path.stat().st_mtime_ns if self.data_path.exists() else None
+            if not force and self._table is not None and mtime_ns == self._mtime_ns:
+                return False
+            self._table = self._read()
+            self._mtime_ns = mtime_ns
+            self.version += 1
+            return True
+
+    def _current(self) -> _PolicyTable:
+        self.refresh()
+        return self._table
+
+    @property
+    def policies(self) -> List[Policy]:
+        """All policies in file order."""
+        return self._current().policies
+
+    def get(self, policy_id: int) -> Optional[Policy]:
+        """Look up a single policy by id."""
+        return self._current().by_id.get(policy_id)
+
+    def get_many(self, policy_ids: Iterable[int]) -> List[Policy]:
+        """Look up policies by id, preserving order and skipping unknown ids."""
+        by_id = self._current().by_id
+        return [by_id[pid] for pid in policy_ids if pid in by_id]
+
+    def candidates(self) -> List[str]:
+        """Sorted list of unique candidates."""
+        return list(self._current().candidates)
+
+    def topics(self) -> List[str]:
+        """Sorted list of unique topics."""
+        return list(self._current().topics)
+
+    def ids_for(self, candidate: Optional[str] = None, topic: Optional[str] = None) -> Optional[Set[int]]:
+        """Return the ids matching the filters, or None when no filter is set."""
+        if not candidate and not topic:
+            return None
+        table = self._current()
+        ids: Optional[Set[int]] = None
+        if candidate:
+            ids = table.candidate_ids.get(candidate, set())
+        if topic:
+            topic_ids = table.topic_ids.get(topic, set())
+            ids = topic_ids if ids is None else ids & topic_ids
+        return set(ids)
+
+    def filter(self, candidate: Optional[str] = None, topic: Optional[str] = None) -> List[Policy]:
+        """Filter policies by candidate and/or topic using the postings."""
+        table = self._current()
+        ids = self.ids_for(candidate, topic)
+        if ids is None:
+            return list(table.policies)
+        return [p for p in table.policies if p.id in ids]
+
+
+_stores: Dict[str, PolicyStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_policy_store(data_path: str = "data/policy_data.json") -> PolicyStore:
+    """Return the shared PolicyStore for ``data_path``, creating it on first use."""
+    key = str(Path(data_path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = PolicyStore(data_path)
+            _stores[key] = store
+        return store
@@ -1,20 +1,43 @@
-from openai import OpenAI
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
-import os
 from dotenv import load_dotenv
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+import logging
+import os
+import time
+from ..clients import get_async_openai, get_async_qdrant
 from ..models.schema import Policy
+from ..embedding_cache import EmbeddingCache, get_embedding_cache
+from ..llm_gateway import get_llm_gateway
+from ..rag.context import get_context_builder
+from ..metrics import STAGE_SECONDS, record_llm_tokens, span
 import json
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# 컬렉션의 named vector 이름
+ADA_VECTOR = "ada"
+LOCAL_VECTOR = "local"
+
 class QdrantRAGPipeline:
-    def __init__(self):
+    def __init__(self, embedding_cache: Optional[EmbeddingCache] = None, local_encoder=None):
         # 초기 설정
         self.collection_name = "policy_collection"
-        self.qdrant = QdrantClient(host="localhost", port=6333)
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.embedding_model = "text-embedding-ada-002"
+        self.qdrant = get_async_qdrant()
+        self.openai_client = get_async_openai()
+        # 답변 생성은 데드라인/재시도/서킷 브레이커가 있는 공유 LLM 게이트웨이를 사용
+        self.llm_gateway = get_llm_gateway()
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        # FAISS 엔진과 같은 토큰 예산 기반 컨텍스트 구성기
+        self.context_builder = get_context_builder()
+        # 로컬 인코더(PolicyEmbedder)가 있으면 OpenAI 호출 없이 "local" 벡터로 검색할 수 있음
+        self.local_encoder = local_encoder
+        self.vector_space = os.getenv("QDRANT_VECTOR_SPACE", "auto")
+        self.local_score_threshold = float(os.getenv("QDRANT_LOCAL_SCORE_THRESHOLD", "0.3"))
+        self._vector_names: Optional[List[str]] = None
+        self._vector_names_checked = 0.0
 
         # 프롬프트 템플릿 정의
         self.prompt_template = (
@@ -38,18 +61,15 @@ class QdrantRAGPipeline:
         if candidate_filter or topic_filter:
             filter_conditions = []
             if candidate_filter:
-                filter_conditions.append({
-                    "key": "candidate",
-                    "match": {"value": candidate_filter}
-                })
+                filter_conditions.append(
+                    models.FieldCondition(key="candidate", match=models.MatchValue(value=candidate_filter))
+                )
             if topic_filter:
-                filter_conditions.append({
-                    "key": "topic",
-                    "match": {"value": topic_filter}
-                })
-            search_filter = {
-                "must": filter_conditions
-            }
+                filter_conditions.append(
+                    models.FieldCondition(key="topic", match=models.MatchValue(value=topic_filter))
+                )
+            # 임베디드(로컬 모드) Qdrant는 dict 필터를 받지 않으므로 모델 객체로 만든다
+            search_filter = models.Filter(must=filter_conditions)
         
         return {
             "limit": k,
@@ -72,48 +92,87 @@ class QdrantRAGPipeline:
         return policies
 
     def _create_context_from_policies(self, policies: List[Policy]) -> str:
-        """Policy 객체들로부터 컨텍스트를 생성합니다."""
-        return "\n\n".join([
-            f"[공약 ID: {p.id}] - {p.candidate}의 공약\n"
-            f"주제: {p.topic}\n"
-            f"내용: {p.text}\n"
-            f"출처: {p.source}"
-            for p in policies
-        ])
-
-    def _embed_query(self, query: str) -> List[float]:
-        """OpenAI API를 사용하여 쿼리를 임베딩합니다."""
+        """Policy 객체들로부터 토큰 예산 안에서 컨텍스트를 생성합니다. (중복 제거, 긴 본문 절단)"""
+        context, _ = self.context_builder.pack(policies)
+        return context
+
+    async def _embed_query(self, query: str) -> List[float]:
+        """OpenAI API를 사용하여 쿼리를 임베딩합니다. (임베딩 캐시 우선 조회)"""
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
+            cached = self.embedding_cache.get(self.embedding_model, query)
+            if cached is not None:
+                return cached.tolist()
+            response = await self.openai_client.embeddings.create(
+                model=self.embedding_model,
                 input=query
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self.embedding_cache.put(self.embedding_model, query, embedding)
+            return embedding
         except Exception as e:
-            print(f"임베딩 생성 오류: {str(e)}")
+            logger.error("임베딩 생성 오류: %s", e)
             return []
 
-    def run_pledge_query_with_sources(
+    async def _get_vector_names(self) -> List[str]:
+        """컬렉션의 named vector 목록을 반환합니다. (unnamed 단일 벡터면 빈 리스트, 1분간 캐시)"""
+        if self._vector_names is None or time.monotonic() - self._vector_names_checked > 60:
+            info = await self.qdrant.get_collection(collection_name=self.collection_name)
+            vectors = info.config.params.vectors
+            self._vector_names = sorted(vectors.keys()) if isinstance(vectors, dict) else []
+            self._vector_names_checked = time.monotonic()
+        return self._vector_names
+
+    async def check_ready(self) -> bool:
+        """컬렉션에 접근 가능한지 확인하고 벡터 목록을 미리 캐시합니다.
+
+        로컬 인코더로 검색하게 되는 경우(True 반환) 호출 측에서 인코더도 준비해야 합니다.
+        """
+        names = await self._get_vector_names()
+        return self.vector_space in ("auto", LOCAL_VECTOR) and self.local_encoder is not None and LOCAL_VECTOR in names
+
+    async def _resolve_query_vector(self, query: str, vector_space: Optional[str] = None) -> Tuple[str, Any]:
+        """요청별로 사용할 벡터 공간을 고르고 (공간 이름, 검색용 쿼리 벡터)를 반환합니다.
+
+        "local"(또는 "auto"에서 로컬 벡터가 있는 경우)은 프로세스 내 인코더를 사용해
+        OpenAI 임베딩 호출을 생략합니다.
+        """
+        vector_space = vector_space or self.vector_space
+        names = await self._get_vector_names()
+        if vector_space in ("auto", LOCAL_VECTOR) and self.local_encoder is not None and LOCAL_VECTOR in names:
+            vector = (await self.local_encoder.aencode_query(query))[0].tolist()
+            return LOCAL_VECTOR, models.NamedVector(name=LOCAL_VECTOR, vector=vector)
+
+        vector = await self._embed_query(query)
+        if vector and ADA_VECTOR in names:
+            return ADA_VECTOR, models.NamedVector(name=ADA_VECTOR, vector=vector)
+        return ADA_VECTOR, vector
+
+    async def search_policies(
         self,
         query: str,
         candidate_filter: Optional[str] = None,
         topic_filter: Optional[str] = None,
         k: int = 5,
-        score_threshold: float = 0.7
-    ) -> List[Policy]:
-        """질문에 대한 검색을 실행하고 Policy 객체 리스트를 반환합니다."""
+        score_threshold: float = 0.7,
+        vector_space: Optional[str] = None
+    ) -> Tuple[List[Policy], List[float], str]:
+        """검색을 실행하고 (Policy 리스트, 사용한 쿼리 벡터, 벡터 공간)을 반환합니다."""
         try:
-            print(f"=== Debug Info ===")
-            print(f"Query: {query}")
-            print(f"Candidate filter: {candidate_filter}")
-            print(f"Topic filter: {topic_filter}")
-            print(f"Search parameters: k={k}, score_threshold={score_threshold}")
+            logger.debug(
+                "Qdrant 검색: query=%r candidate=%r topic=%r k=%d score_threshold=%s",
+                query, candidate_filter, topic_filter, k, score_threshold
+            )
 
             # 쿼리 임베딩 생성
-            query_vector = self._embed_query(query)
-            if not query_vector:
-                print("임베딩 생성 실패")
-                return []
+            with span("embed", "qdrant"):
+                space, query_vector = await self._resolve_query_vector(query, vector_space)
+            raw_vector = query_vector.vector if isinstance(query_vector, models.NamedVector) else query_vector
+            if not raw_vector:
+                logger.warning("임베딩 생성 실패")
+                return [], [], space
+            if space == LOCAL_VECTOR:
+                # ko-sroberta 코사인 유사도는 ada보다 전반적으로 낮음
+                score_threshold = self.local_score_threshold
 
             # 검색 파라미터 설정
             search_params = self._create_search_params(
@@ -124,90 +183,274 @@ class QdrantRAGPipeline:
                 score_threshold=score_threshold
             )
             
-            # 검색 실행
-            search_results = self.qdrant.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                **search_params
-            )
+            # 검색 실행 (필터는 Qdrant가 검색 중에 적용)
+            with span("search", "qdrant"):
+                search_results = await self.qdrant.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_vector,
+                    **search_params
+                )
             
-            print(f"검색 결과 수: {len(search_results)}")
+            logger.debug("검색 결과 수: %d", len(search_results))
             
             # 검색 결과를 Policy 객체로 변환
-            policies = []
-            for result in search_results:
-                try:
-                    # 메타데이터에서 정책 정보 가져오기
-                    payload = result.payload
-                    
-                    policy = Policy(
-                        id=int(payload.get("id", 0)),
-                        candidate=payload.get("candidate", ""),
-                        topic=payload.get("topic", ""),
-                        text=payload.get("pledge", ""),
-                        source=payload.get("source", "")
-                    )
-                    policies.append(policy)
-                    print(f"정책 변환 성공: {policy.id}")
-                except Exception as e:
-                    print(f"정책 변환 오류: {str(e)}")
-                    print(f"페이로드: {result.payload}")
-                    continue
+            start = time.perf_counter()
+            policies = self._policies_from_results(search_results)
+            STAGE_SECONDS.observe(time.perf_counter() - start, engine="qdrant", stage="filter")
             
-            return policies
+            return policies, raw_vector, space
             
         except Exception as e:
-            print(f"Qdrant 검색 중 오류 발생: {str(e)}")
+            logger.error("Qdrant 검색 중 오류 발생: %s", e)
+            return [], [], vector_space or self.vector_space
+
+    def _policies_from_results(self, search_results) -> List[Policy]:
+        """검색 결과의 payload를 Policy 객체로 변환합니다. (변환할 수 없는 결과는 건너뜀)"""
+        policies = []
+        for result in search_results:
+            try:
+                # 메타데이터에서 정책 정보 가져오기
+                payload = result.payload
+                
+                policies.append(Policy(
+                    id=int(payload.get("id", 0)),
+                    candidate=payload.get("candidate", ""),
+                    topic=payload.get("topic", ""),
+                    text=payload.get("pledge", ""),
+                    source=payload.get("source", "")
+                ))
+            except Exception as e:
+                logger.warning("정책 변환 오류: %s (페이로드: %r)", e, result.payload)
+                continue
+        return policies
+
+    async def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """여러 쿼리를 한 번의 OpenAI 임베딩 호출로 임베딩합니다. (캐시에 없는 쿼리만 요청)"""
+        vectors: List[Optional[List[float]]] = []
+        for query in queries:
+            cached = self.embedding_cache.get(self.embedding_model, query)
+            vectors.append(cached.tolist() if cached is not None else None)
+        misses = [i for i, v in enumerate(vectors) if v is None]
+        if misses:
+            response = await self.openai_client.embeddings.create(
+                model=self.embedding_model,
+                input=[queries[i] for i in misses]
+            )
+            for i, item in zip(misses, sorted(response.data, key=lambda d: d.index)):
+                self.embedding_cache.put(self.embedding_model, queries[i], item.embedding)
+                vectors[i] = item.embedding
+        return vectors
+
+    async def _resolve_query_vectors(self, queries: List[str], vector_space: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """_resolve_query_vector의 배치 버전: 모든 쿼리를 한 번의 인코더(또는 임베딩 API) 호출로 임베딩합니다."""
+        vector_space = vector_space or self.vector_space
+        names = await self._get_vector_names()
+        if vector_space in ("auto", LOCAL_VECTOR) and self.local_encoder is not None and LOCAL_VECTOR in names:
+            matrix = await self.local_encoder.aencode_queries(queries)
+            return LOCAL_VECTOR, [models.NamedVector(name=LOCAL_VECTOR, vector=row.tolist()) for row in matrix]
+
+        vectors = await self._embed_queries(queries)
+        if ADA_VECTOR in names:
+            return ADA_VECTOR, [models.NamedVector(name=ADA_VECTOR, vector=v) for v in vectors]
+        return ADA_VECTOR, vectors
+
+    async def search_policies_batch(
+        self,
+        queries: List[Tuple[str, Optional[str], Optional[str]]],
+        k: int = 5,
+        score_threshold: float = 0.7,
+        vector_space: Optional[str] = None
+    ) -> List[Tuple[List[Policy], List[float], str]]:
+        """(질문, 후보 필터, 주제 필터) 목록을 한 번에 검색합니다.
+
+        쿼리 임베딩은 한 번의 호출로 만들고, 검색은 Qdrant search_batch 한 번으로
+        실행합니다. 질문마다 search_policies와 같은 (Policy 리스트, 쿼리 벡터, 벡터 공간)을 반환합니다.
+        """
+        if not queries:
             return []
+        with span("embed", "qdrant"):
+            space, query_vectors = await self._resolve_query_vectors([q for q, _, _ in queries], vector_space)
+        if space == LOCAL_VECTOR:
+            score_threshold = self.local_score_threshold
 
-    def get_candidates(self) -> List[str]:
-        """Qdrant에서 모든 후보 목록을 가져옵니다."""
-        try:
-            # Qdrant에서 모든 문서의 candidate 필드 값을 가져옴
-            response = self.qdrant.scroll(
+        requests = []
+        for (query, candidate_filter, topic_filter), query_vector in zip(queries, query_vectors):
+            params = self._create_search_params(query, candidate_filter, topic_filter, k, score_threshold)
+            requests.append(models.SearchRequest(
+                vector=query_vector,
+                filter=params["query_filter"],
+                limit=params["limit"],
+                score_threshold=params["score_threshold"],
+                with_payload=True
+            ))
+        with span("search", "qdrant"):
+            batch_results = await self.qdrant.search_batch(collection_name=self.collection_name, requests=requests)
+        logger.debug("배치 검색: 질문 %d개", len(queries))
+
+        start = time.perf_counter()
+        results = []
+        for query_vector, search_results in zip(query_vectors, batch_results):
+            raw_vector = query_vector.vector if isinstance(query_vector, models.NamedVector) else query_vector
+            results.append((self._policies_from_results(search_results), raw_vector, space))
+        STAGE_SECONDS.observe(time.perf_counter() - start, engine="qdrant", stage="filter")
+        return results
+
+    async def search_policies_grouped(
+        self,
+        query: str,
+        candidates: List[str],
+        topic_filter: Optional[str] = None,
+        k: int = 3,
+        score_threshold: float = 0.7,
+        vector_space: Optional[str] = None
+    ) -> Tuple[Dict[str, List[Policy]], str]:
+        """쿼리를 한 번 임베딩하고 Qdrant group-by 검색 한 번으로 후보별 상위 k개 공약을 가져옵니다.
+
+        (후보 -> Policy 리스트, 벡터 공간)을 반환합니다. 결과가 없는 후보는 빈 리스트입니다.
+        """
+        with span("embed", "qdrant"):
+            space, query_vector = await self._resolve_query_vector(query, vector_space)
+        grouped: Dict[str, List[Policy]] = {candidate: [] for candidate in candidates}
+        raw_vector = query_vector.vector if isinstance(query_vector, models.NamedVector) else query_vector
+        if not raw_vector or not candidates:
+            return grouped, space
+        if space == LOCAL_VECTOR:
+            score_threshold = self.local_score_threshold
+
+        conditions = [models.FieldCondition(key="candidate", match=models.MatchAny(any=candidates))]
+        if topic_filter:
+            conditions.append(models.FieldCondition(key="topic", match=models.MatchValue(value=topic_filter)))
+        with span("search", "qdrant"):
+            result = await self.qdrant.search_groups(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                group_by="candidate",
+                query_filter=models.Filter(must=conditions),
+                limit=len(candidates),
+                group_size=k,
+                score_threshold=score_threshold,
+                with_payload=True
+            )
+
+        start = time.perf_counter()
+        for group in result.groups:
+            if group.id in grouped:
+                grouped[group.id] = self._policies_from_results(group.hits)
+        STAGE_SECONDS.observe(time.perf_counter() - start, engine="qdrant", stage="filter")
+        return grouped, space
+
+    async def run_pledge_query_with_sources(
+        self,
+        query: str,
+        candidate_filter: Optional[str] = None,
+        topic_filter: Optional[str] = None,
+        k: int = 5,
+        score_threshold: float = 0.7,
+        vector_space: Optional[str] = None
+    ) -> List[Policy]:
+        """질문에 대한 검색을 실행하고 Policy 객체 리스트를 반환합니다."""
+        policies, _, _ = await self.search_policies(
+            query,
+            candidate_filter=candidate_filter,
+            topic_filter=topic_filter,
+            k=k,
+            score_threshold=score_threshold,
+            vector_space=vector_space
+        )
+        return policies
+
+    async def collection_signature(self) -> Tuple[str, int]:
+        """alias가 가리키는 실제 컬렉션 이름과 포인트 수를 반환합니다. (재적재/변경 감지용)"""
+        target = self.collection_name
+        aliases = await self.qdrant.get_aliases()
+        for alias in aliases.aliases:
+            if alias.alias_name == self.collection_name:
+                target = alias.collection_name
+                break
+        info = await self.qdrant.get_collection(collection_name=target)
+        return target, info.points_count or 0
+
+    async def facet_counts(self, page_size: int = 256) -> Dict[Tuple[str, str], int]:
+        """(후보, 주제)별 공약 수를 계산합니다.
+
+        candidate/topic payload만 페이지 단위로 스크롤하므로 컬렉션 크기와 관계없이
+        잘리지 않습니다.
+        """
+        counts: Dict[Tuple[str, str], int] = {}
+        offset = None
+        while True:
+            points, offset = await self.qdrant.scroll(
                 collection_name=self.collection_name,
-                limit=1000,  # 충분히 큰 수
-                with_payload=True,
+                limit=page_size,
+                offset=offset,
+                with_payload=["candidate", "topic"],
                 with_vectors=False
             )
-            
-            # 고유한 candidate 값 추출
-            candidates = set()
-            for point in response[0]:
-                if point.payload:
-                    candidate = point.payload.get("candidate")
-                    if candidate:
-                        candidates.add(candidate)
-            
-            return sorted(list(candidates))
+            for point in points:
+                payload = point.payload or {}
+                key = (payload.get("candidate", ""), payload.get("topic", ""))
+                counts[key] = counts.get(key, 0) + 1
+            if offset is None:
+                return counts
+
+    async def get_candidates(self) -> List[str]:
+        """Qdrant에서 모든 후보 목록을 가져옵니다."""
+        try:
+            return sorted({candidate for candidate, _ in await self.facet_counts() if candidate})
         except Exception as e:
-            print(f"후보 목록 가져오기 실패: {str(e)}")
+            logger.error("후보 목록 가져오기 실패: %s", e)
             return []
 
-    def get_topics(self) -> List[str]:
+    async def get_topics(self) -> List[str]:
         """Qdrant에서 모든 주제 목록을 가져옵니다."""
         try:
-            # Qdrant에서 모든 문서의 topic 필드 값을 가져옴
-            response = self.qdrant.scroll(
-                collection_name=self.collection_name,
-                limit=1000,  # 충분히 큰 수
-                with_payload=True,
-                with_vectors=False
-            )
-            
-            # 고유한 topic 값 추출
-            topics = set()
-            for point in response[0]:
-                if point.payload:
-                    topic = point.payload.get("topic")
-                    if topic:
-                        topics.add(topic)
-            
-            return sorted(list(topics))
+            return sorted({topic for _, topic in await self.facet_counts() if topic})
         except Exception as e:
-            print(f"주제 목록 가져오기 실패: {str(e)}")
+            logger.error("주제 목록 가져오기 실패: %s", e)
             return []
 
+    def build_messages(self, query: str, policies: List[Policy]) -> List[Dict[str, str]]:
+        """검색된 공약으로 LLM 메시지를 구성합니다."""
+        with span("context", "qdrant"):
+            context = self._create_context_from_policies(policies)
+        return [
+            {"role": "system", "content": "당신은 대선 후보들의 공약을 분석하고 비교하는 전문가입니다. 주어진 정보만을 사용하여 정확하고 객관적인 답변을 제공해주세요."},
+            {"role": "user", "content": self.prompt_template.format(
+                context=context,
+                input=query
+            )}
+        ]
+
+    async def generate_answer(self, query: str, policies: List[Policy]) -> str:
+        """검색된 공약을 컨텍스트로 LLM 답변을 생성합니다.
+
+        데드라인 초과, 재시도 실패, 서킷 오픈 시 LLMUnavailable을 발생시킵니다.
+        """
+        messages = self.build_messages(query, policies)
+        with span("llm", "qdrant"):
+            response = await self.llm_gateway.complete(messages, self.context_builder.completion_budget(query))
+        if response.usage:
+            record_llm_tokens("qdrant", response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    async def stream_answer(self, query: str, policies: List[Policy]) -> AsyncIterator[str]:
+        """LLM 답변을 토큰 단위로 스트리밍합니다."""
+        messages = self.build_messages(query, policies)
+        start = time.perf_counter()
+        parts = []
+        async for token in self.llm_gateway.stream(messages, self.context_builder.completion_budget(query)):
+            if not parts:
+                STAGE_SECONDS.observe(time.perf_counter() - start, engine="qdrant", stage="llm_first_token")
+            parts.append(token)
+            yield token
+        STAGE_SECONDS.observe(time.perf_counter() - start, engine="qdrant", stage="llm")
+        # 스트리밍 응답에는 usage가 없으므로 컨텍스트 구성기의 토크나이저로 계산
+        record_llm_tokens(
+            "qdrant",
+            sum(self.context_builder.count_tokens(m["content"]) for m in messages),
+            self.context_builder.count_tokens("".join(parts))
+        )
+
     def llm(self):
         """LLM 응답을 생성하는 메서드"""
         return self.openai_client.chat.completions.create
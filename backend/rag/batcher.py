@@ -0,0 +1,115 @@
+import asyncio
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+from backend.metrics import BATCH_SIZE
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect concurrent async requests and process them with one executor call.
+
+    A batch is flushed when ``max_batch_size`` items are queued or when the
+    oldest queued item has waited ``max_wait_ms``. ``process_batch`` receives
+    the list of items and must return one result per item, in order.
+    Achieved batch sizes are recorded in ``policyfinder_batch_size{batcher=name}``.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], List[R]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 3.0,
+        executor: Optional[Executor] = None,
+        name: str = "batcher"
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self.name = name
+        self.batch_sizes: Counter = Counter()
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks; hold running batches until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self.batch_sizes[len(batch)] += 1
+        BATCH_SIZE.observe(len(batch), batcher=self.name)
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.process_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Achieved batch-size distribution."""
+        batches = sum(self.batch_sizes.values())
+        items = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+        }
+
+
+async def bounded_as_completed(
+    jobs: List[Callable[[], Awaitable[R]]],
+    limit: int
+) -> AsyncIterator[Tuple[int, Optional[R], Optional[Exception]]]:
+    """Run ``jobs`` with at most ``limit`` in flight and yield (index, result, error) as each finishes.
+
+    A failing job yields its exception instead of stopping the others. Jobs
+    still running when the consumer stops iterating are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, job: Callable[[], Awaitable[R]]):
+        async with semaphore:
+            try:
+                return index, await job(), None
+            except Exception as e:
+                return index, None, e
+
+    tasks = [asyncio.ensure_future(run(i, job)) for i, job in enumerate(jobs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
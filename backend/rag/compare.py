@@ -0,0 +1,134 @@
+import asyncio
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+from backend.llm_gateway import LLMUnavailable, extractive_answer, get_llm_gateway
+from backend.metrics import record_llm_tokens, span
+from backend.models.schema import Policy
+from .context import COMPLETION_BUDGETS, get_context_builder
+
+COMPARE_MODES = ("single", "parallel")
+
+SYSTEM_PROMPT = (
+    "당신은 대선 후보들의 공약을 분석하고 비교하는 전문가입니다. "
+    "주어진 정보만을 사용하여 정확하고 객관적인 답변을 제공해주세요. "
+    "답변에는 참고한 공약 ID [공약: 숫자]를 표시해주세요."
+)
+NO_POLICIES = "관련 공약을 찾을 수 없습니다."
+
+
+def cited_ids(text: str) -> Set[int]:
+    """Policy IDs cited in ``text`` as [공약: ID]."""
+    return {int(i) for i in re.findall(r'\[공약:\s*(\d+)\]', text)}
+
+
+class ComparisonGenerator:
+    """Side-by-side answers for several candidates from per-candidate retrieval results.
+
+    ``single`` mode sends one comparison prompt with a section per candidate
+    (the input token budget is split evenly between them); ``parallel`` mode
+    writes a short summary per candidate with concurrent LLM calls. Either
+    way the latency is about that of one LLM call, not one per candidate.
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        self.gateway = get_llm_gateway()
+        self.context_builder = get_context_builder()
+        self.mode = mode or os.getenv("COMPARE_MODE", "single")
+        if self.mode not in COMPARE_MODES:
+            raise ValueError(f"Unknown compare mode: {self.mode}")
+
+    def build_messages(self, question: str, grouped: Dict[str, List[Policy]]) -> List[Dict[str, str]]:
+        """One prompt comparing all candidates, each with its own share of the context budget."""
+        budget = self.context_builder.max_input_tokens // max(1, len(grouped))
+        blocks = []
+        for candidate, policies in grouped.items():
+            context, _ = self.context_builder.pack(policies, budget)
+            blocks.append(f"### {candidate}\n{context or NO_POLICIES}")
+        sections = "\n\n".join(blocks)
+        prompt = f"""다음은 후보별로 검색한 공약 정보입니다:
+
+{sections}
+
+위 정보를 바탕으로 다음 질문에 대해 후보들을 비교해주세요:
+{question}
+
+주의사항:
+- 후보별로 핵심 내용을 정리한 뒤 공통점과 차이점을 설명해주세요.
+- 주어진 공약 정보만을 사용하고, 정보가 없는 후보는 관련 공약이 없다고 밝혀주세요.
+- 답변에서 참고한 공약은 [공약: ID] 형식으로 표시해주세요.
+
+답변:"""
+        return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+    def build_summary_messages(self, question: str, candidate: str, policies: List[Policy]) -> List[Dict[str, str]]:
+        """Prompt for one candidate's summary in parallel mode."""
+        context, _ = self.context_builder.pack(policies)
+        prompt = f"""다음은 {candidate} 후보의 공약 정보입니다:
+
+{context}
+
+위 정보만을 사용하여 다음 질문에 대한 {candidate} 후보의 입장을 3~5문장으로 요약해주세요:
+{question}
+
+참고한 공약은 [공약: ID] 형식으로 표시해주세요.
+
+요약:"""
+        return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+    async def _complete(self, engine: str, messages: List[Dict[str, str]], max_tokens: int, policies: List[Policy]) -> str:
+        """LLM answer, or an extractive one from ``policies`` when the gateway gives up."""
+        try:
+            with span("llm", engine):
+                response = await self.gateway.complete(messages, max_tokens)
+        except LLMUnavailable:
+            return extractive_answer(policies, max_policies=len(policies))
+        if response.usage:
+            record_llm_tokens(engine, response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    async def compare(
+        self,
+        question: str,
+        grouped: Dict[str, List[Policy]],
+        engine: str = "faiss",
+        mode: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Optional[str]], Dict[str, List[Policy]]]:
+        """Return (answer, per-candidate summary, per-candidate cited policies).
+
+        Summaries are only produced in parallel mode (None otherwise); the
+        answer then lists them side by side.
+        """
+        mode = mode or self.mode
+        if mode not in COMPARE_MODES:
+            raise ValueError(f"Unknown compare mode: {mode}")
+        summaries: Dict[str, Optional[str]] = {candidate: None for candidate in grouped}
+        if not any(grouped.values()):
+            empty: Dict[str, List[Policy]] = {candidate: [] for candidate in grouped}
+            return "죄송합니다. 검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요.", summaries, empty
+
+        if mode == "single":
+            with span("context", engine):
+                messages = self.build_messages(question, grouped)
+            max_tokens = min(COMPLETION_BUDGETS["compare"], self.context_builder.max_completion_tokens)
+            answer = await self._complete(engine, messages, max_tokens, [p for ps in grouped.values() for p in ps])
+            cited = cited_ids(answer)
+        else:
+            with_policies = [candidate for candidate, policies in grouped.items() if policies]
+            with span("context", engine):
+                messages = [self.build_summary_messages(question, c, grouped[c]) for c in with_policies]
+            max_tokens = min(COMPLETION_BUDGETS["fact"], self.context_builder.max_completion_tokens)
+            results = await asyncio.gather(*(
+                self._complete(engine, m, max_tokens, grouped[c]) for c, m in zip(with_policies, messages)
+            ))
+            for candidate in grouped:
+                summaries[candidate] = NO_POLICIES
+            summaries.update(zip(with_policies, results))
+            answer = "\n\n".join(f"**{candidate}**\n{summary}" for candidate, summary in summaries.items())
+            cited = set().union(*(cited_ids(summary) for summary in results))
+
+        sources = {
+            candidate: [p for p in policies if p.id in cited]
+            for candidate, policies in grouped.items()
+        }
+        return answer, summaries, sources
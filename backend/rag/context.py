@@ -0,0 +1,146 @@
+import logging
+import math
+import os
+import re
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+from backend.models.schema import Policy
+
+logger = logging.getLogger(__name__)
+
+# Completion token budgets by question type (see question_type)
+COMPLETION_BUDGETS = {
+    "fact": 400,
+    "default": 700,
+    "summary": 1000,
+    "compare": 1400,
+}
+
+_COMPARE = re.compile(r"비교|차이|다른\s*점|공통점|vs\.?|대비|어느\s*후보|누가\s*더")
+_SUMMARY = re.compile(r"요약|정리|모두|전부|전체|목록|나열|알려\s*줘")
+_FACT = re.compile(r"언제|얼마|몇|누구|어디|있나요|있어\?|인가요")
+
+
+def question_type(question: str) -> str:
+    """Rough question type used to size the completion: compare, summary, fact or default."""
+    if _COMPARE.search(question):
+        return "compare"
+    if _SUMMARY.search(question):
+        return "summary"
+    if _FACT.search(question) and len(question) <= 40:
+        return "fact"
+    return "default"
+
+
+_warned_fallback = False
+
+
+def _tiktoken_encoding(model: str):
+    global _warned_fallback
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Not installed, or the encoding file could not be downloaded
+        if not _warned_fallback:
+            _warned_fallback = True
+            logger.warning("tiktoken is unavailable (%s: %s); token budgets use a bytes/3 estimate", type(e).__name__, e)
+        return None
+
+
+class ContextBuilder:
+    """Packs retrieved policies into a prompt context under a token budget.
+
+    Tokens are counted with tiktoken (a requirement); if it cannot be
+    loaded, a warning is logged once and a conservative UTF-8 byte
+    heuristic is used (one token per 3 bytes, i.e. about one per Hangul
+    syllable). Policies are kept in retrieval order,
+    duplicates (same ID or same candidate and text) are dropped, long pledge
+    texts are cut to ``max_policy_tokens`` and packing stops at
+    ``max_input_tokens``.
+    """
+
+    def __init__(
+        self,
+        max_input_tokens: Optional[int] = None,
+        max_policy_tokens: Optional[int] = None,
+        max_completion_tokens: Optional[int] = None,
+        model: str = "gpt-4o-mini"
+    ):
+        self.max_input_tokens = max_input_tokens or int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+        self.max_policy_tokens = max_policy_tokens or int(os.getenv("CONTEXT_MAX_POLICY_TOKENS", "400"))
+        self.max_completion_tokens = max_completion_tokens or int(os.getenv("LLM_MAX_COMPLETION_TOKENS", "1400"))
+        self._encoding = _tiktoken_encoding(model)
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return math.ceil(len(text.encode("utf-8")) / 3)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to at most ``max_tokens`` tokens, marking the cut with an ellipsis."""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text)[:max_tokens - 1]).rstrip() + "…"
+        # Largest prefix that fits, by bisection over characters
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count_tokens(text[:mid]) <= max_tokens - 1:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low].rstrip() + "…"
+
+    def format_policy(self, policy: Policy) -> str:
+        return (
+            f"[공약 ID: {policy.id}] - {policy.candidate}의 공약\n"
+            f"주제: {policy.topic}\n"
+            f"내용: {self.truncate(policy.text, self.max_policy_tokens)}\n"
+            f"출처: {policy.source}"
+        )
+
+    def pack(self, policies: List[Policy], budget: Optional[int] = None) -> Tuple[str, List[Policy]]:
+        """Return (context, policies actually included) within ``budget`` tokens."""
+        budget = budget or self.max_input_tokens
+        separator_tokens = self.count_tokens("\n\n")
+        blocks: List[str] = []
+        included: List[Policy] = []
+        seen_ids: Set[int] = set()
+        seen_texts: Set[Tuple[str, str]] = set()
+        used = 0
+        for policy in policies:
+            text_key = (policy.candidate, " ".join(policy.text.split()))
+            if policy.id in seen_ids or text_key in seen_texts:
+                continue
+            block = self.format_policy(policy)
+            cost = self.count_tokens(block) + (separator_tokens if blocks else 0)
+            if used + cost > budget:
+                break
+            seen_ids.add(policy.id)
+            seen_texts.add(text_key)
+            blocks.append(block)
+            included.append(policy)
+            used += cost
+        return "\n\n".join(blocks), included
+
+    def completion_budget(self, question: str) -> int:
+        """max_tokens for the answer, by question type and capped by LLM_MAX_COMPLETION_TOKENS."""
+        return min(COMPLETION_BUDGETS[question_type(question)], self.max_completion_tokens)
+
+
+_builder: Optional[ContextBuilder] = None
+_builder_lock = threading.Lock()
+
+
+def get_context_builder() -> ContextBuilder:
+    """Return the process-wide ContextBuilder configured from the environment."""
+    global _builder
+    with _builder_lock:
+        if _builder is None:
+            _builder = ContextBuilder()
+        return _builder
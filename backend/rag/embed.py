@@ -1,60 +1,627 @@
+import asyncio
+import math
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple
 import faiss
 import json
+from datetime import datetime, timezone
 from pathlib import Path
 from backend.models.schema import Policy
+from backend.embedding_cache import EmbeddingCache, get_embedding_cache
+from backend.metrics import span
+from .batcher import MicroBatcher
+from .embedding_store import EmbeddingStore, content_hash, embedding_text
+from .index_factory import (
+    apply_search_params,
+    create_index,
+    default_index_config,
+    is_exhaustive,
+    load_index_config,
+    prepare_vectors,
+    read_index,
+    save_index_config,
+    search_parameters,
+    supports_remove
+)
+
+# Filters matching at most this fraction of the corpus are searched with an
+# ID selector; broader filters are cheaper to serve by over-fetching.
+PREFILTER_MAX_SELECTIVITY = 0.25
+OVERFETCH_MARGIN = 1.5
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_encoder_executor() -> ThreadPoolExecutor:
+    """Bounded thread pool that keeps encoding and index search off the event loop."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("ENCODER_WORKERS", "2")),
+                thread_name_prefix="encoder"
+            )
+        return _executor
+
+class _IndexView:
+    """What a search needs from one index version, published as a unit.
+
+    Searches read ``PolicyEmbedder._view`` once, so a snapshot reload never
+    mixes two versions within one search; the previous index is released
+    (and unmapped) when the last search holding its view returns.
+    """
+
+    def __init__(self, index, config: Dict, policy_ids: List[int], labels_by_policy_id: Dict[int, int], id_mapped: bool):
+        self.index = index
+        self.config = config
+        self.policy_ids = policy_ids
+        self.labels_by_policy_id = labels_by_policy_id
+        self.id_mapped = id_mapped
+
+    def policy_ids_from_labels(self, labels) -> List[int]:
+        """Map one row of FAISS labels to policy IDs, skipping empty (-1) slots."""
+        if self.id_mapped:
+            return [int(i) for i in labels if i >= 0]
+        return [self.policy_ids[i] for i in labels if i >= 0]
+
+    def search_labels(self, query_vector: np.ndarray, k: int, params=None) -> List[int]:
+        """Run one index search and map valid labels back to policy IDs."""
+        query_vector = prepare_vectors(query_vector, self.config)
+        if params is None:
+            _, labels = self.index.search(query_vector, k)
+        else:
+            _, labels = self.index.search(query_vector, k, params=params)
+        return self.policy_ids_from_labels(labels[0])
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> List[List[int]]:
+        """Search an (n, dim) matrix of query vectors in one index call."""
+        _, labels = self.index.search(prepare_vectors(query_vectors, self.config), k)
+        return [self.policy_ids_from_labels(row) for row in labels]
 
 class PolicyEmbedder:
-    def __init__(self, model_name: str = "jhgan/ko-sroberta-multitask"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name: str = "jhgan/ko-sroberta-multitask",
+        cache: Optional[EmbeddingCache] = None,
+        encoder_backend: Optional[str] = None
+    ):
+        self.model_name = model_name
+        # Loaded on first use (or by warm_up) so constructing the embedder is cheap
+        self._model = None
+        self._query_encoder = None
+        self._model_lock = threading.Lock()
+        # Query encoder backend: "torch" (SentenceTransformer) or "onnx" (int8 ONNX Runtime).
+        # Policy embeddings are always created with the PyTorch model.
+        self.encoder_backend = encoder_backend or os.getenv("ENCODER_BACKEND", "torch")
+        if self.encoder_backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown encoder backend: {self.encoder_backend}")
+        # Cached query vectors are kept apart per backend
+        self.cache_namespace = model_name if self.encoder_backend == "torch" else f"{model_name}@onnx-int8"
+        self.cache = cache or get_embedding_cache()
         self.index = None
+        self.index_version = 0
+        self.policy_ids: List[int] = []
+        self._labels_by_policy_id: Dict[int, int] = {}
+        self._id_mapped = False
+        # policy ID -> content hash of what is currently in the index
+        self.manifest: Dict[int, str] = {}
         self.policies_path = Path("data/policy_data.json")
-        self.index_path = Path("data/policy.index")
+        # Index files are published as versioned snapshots (data/snapshots/<version>/,
+        # named by data/snapshots/CURRENT); the files directly under data/ are the
+        # pre-snapshot layout, still loaded when no snapshot exists
+        self.data_dir = Path("data")
+        self.snapshots_dir = Path("data/snapshots")
+        self.snapshot: Optional[str] = None
+        self._set_paths(self.data_dir)
+        self.mmapped = False
+        # Index type and parameters used for the next build (FAISS_INDEX_TYPE);
+        # replaced by the saved config when an index is loaded
+        self.index_config: Dict = default_index_config()
+        # What searches use; replaced in one assignment when an index is built or loaded
+        self._view: Optional[_IndexView] = None
+        self._reload_lock = threading.RLock()
+        # Concurrent async searches are encoded and searched in micro-batches
+        self.batcher = MicroBatcher(
+            self._search_batch,
+            max_batch_size=int(os.getenv("QUERY_BATCH_SIZE", "16")),
+            max_wait_ms=float(os.getenv("QUERY_BATCH_WAIT_MS", "3")),
+            executor=get_encoder_executor(),
+            name="query_encoder"
+        )
         
+    @property
+    def model(self):
+        """The SentenceTransformer, loaded on first access."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def embedding_dimension(self) -> int:
+        """Vector dimension of the policy encoder (loads the model)."""
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def query_encoder(self):
+        """Encoder used for queries: the PyTorch model or the ONNX Runtime encoder."""
+        if self.encoder_backend == "torch":
+            return self.model
+        if self._query_encoder is None:
+            with self._model_lock:
+                if self._query_encoder is None:
+                    from .onnx_encoder import DEFAULT_ONNX_MODEL_DIR, OnnxEncoder
+                    self._query_encoder = OnnxEncoder(os.getenv("ONNX_MODEL_DIR", DEFAULT_ONNX_MODEL_DIR))
+        return self._query_encoder
+
+    def check_query_encoder(self):
+        """Raise if the configured query encoder backend cannot be loaded (missing packages or model files)."""
+        if self.encoder_backend == "onnx":
+            from .onnx_encoder import DEFAULT_ONNX_MODEL_DIR, check_onnx_encoder
+            check_onnx_encoder(os.getenv("ONNX_MODEL_DIR", DEFAULT_ONNX_MODEL_DIR))
+
+    def warm_up_encoder(self):
+        """Load the encoder and run one query through it (bypassing the cache)
+        so model loading and first kernel dispatch happen before real traffic."""
+        self.query_encoder.encode(["청년 주거 지원 공약"], convert_to_numpy=True)
+
+    def warm_up_index(self):
+        """Run one search so a memory-mapped index is paged in before real traffic."""
+        if self.index is not None and self.index.ntotal:
+            self.index.search(np.zeros((1, self.index.d), dtype=np.float32), 1)
+
     def create_embeddings(self, policies: List[Policy]) -> np.ndarray:
         """Create embeddings for policy texts."""
-        texts = [f"{p.candidate} {p.topic} {p.text}" for p in policies]
+        texts = [embedding_text(p) for p in policies]
         return self.model.encode(texts, convert_to_numpy=True)
     
-    def build_index(self, policies: List[Policy], embeddings: np.ndarray):
-        """Build FAISS index from embeddings with policy IDs as metadata."""
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(embeddings)
+    def build_index(self, policies: List[Policy], embeddings: np.ndarray, config: Optional[Dict] = None):
+        """Build FAISS index from embeddings with policy IDs as FAISS labels.
+
+        ``config`` selects the index type and parameters (see index_factory);
+        it defaults to the current ``index_config``.
+        """
+        self.mmapped = False
+        self.index, self.index_config = create_index(
+            config or self.index_config,
+            np.asarray(embeddings, dtype=np.float32),
+            np.asarray([p.id for p in policies], dtype=np.int64)
+        )
+        self.index_version += 1
         
         # Save policy IDs as metadata
-        self.policy_ids = [p.id for p in policies]
-        
-    def save_index(self):
-        """Save FAISS index and policy IDs."""
+        self.manifest = {p.id: content_hash(p) for p in policies}
+        self._set_policy_ids([p.id for p in policies], id_mapped=True)
+        self._publish()
+
+    def update_index(
+        self,
+        policies: List[Policy],
+        store: EmbeddingStore,
+        rebuild: bool = False
+    ) -> Dict[str, int]:
+        """Bring the index in line with ``policies``, re-encoding only added or changed ones.
+
+        Vectors come from ``store`` (keyed by content hash); only hashes that are
+        missing from it are encoded. A store written by another encoder model or
+        dimension is discarded first, and ``rebuild`` re-encodes every policy. When
+        the loaded index cannot be updated in place (legacy row-labelled index, no
+        manifest, different dimension) it is rebuilt from the store.
+        """
+        dim = self.embedding_dimension
+        store.use_encoder(self.model_name, dim)
+        hashes = {p.id: content_hash(p) for p in policies}
+        missing = [p for p in policies if rebuild or hashes[p.id] not in store]
+        if missing:
+            for p, vector in zip(missing, self.create_embeddings(missing)):
+                store.put(hashes[p.id], vector)
+        store.prune(hashes.values())
+        if self.mmapped:
+            # Memory-mapped indexes are read-only; take a private copy first
+            self.index, self.mmapped = read_index(self.index_path, mmap=False)
+            apply_search_params(self.index, self.index_config)
+            self.manifest = self._read_manifest()
+
+        stale = [pid for pid, h in self.manifest.items() if hashes.get(pid) != h]
+        added = [p for p in policies if self.manifest.get(p.id) != hashes[p.id]]
+        if (
+            rebuild or self.index is None or self.index.d != dim or not self._id_mapped or not self.manifest
+            or (stale and not supports_remove(self.index_config))
+        ):
+            self.build_index(policies, store.get_many([hashes[p.id] for p in policies]))
+            return {"encoded": len(missing), "added": len(policies), "removed": 0, "rebuilt": 1}
+
+        if stale:
+            self.index.remove_ids(np.asarray(stale, dtype=np.int64))
+            for pid in stale:
+                del self.manifest[pid]
+        if added:
+            self.index.add_with_ids(
+                prepare_vectors(store.get_many([hashes[p.id] for p in added]), self.index_config),
+                np.asarray([p.id for p in added], dtype=np.int64)
+            )
+            for p in added:
+                self.manifest[p.id] = hashes[p.id]
+        if stale or added:
+            self.index_version += 1
+        self._set_policy_ids(list(self.manifest), id_mapped=True)
+        self._publish()
+        removed = len([pid for pid in stale if pid not in hashes])
+        return {"encoded": len(missing), "added": len(added), "removed": removed, "rebuilt": 0}
+
+    def _set_policy_ids(self, policy_ids: List[int], id_mapped: bool = False):
+        """Store the label -> policy ID mapping and its inverse.
+
+        ID-mapped indexes use policy IDs as labels; legacy flat indexes use row numbers.
+        """
+        self.policy_ids = policy_ids
+        self._id_mapped = id_mapped
+        if id_mapped:
+            self._labels_by_policy_id = {pid: pid for pid in policy_ids}
+        else:
+            self._labels_by_policy_id = {pid: i for i, pid in enumerate(policy_ids)}
+
+    def _publish(self):
+        """Make the current index attributes the version searches use."""
+        self._view = _IndexView(
+            self.index, self.index_config, self.policy_ids, self._labels_by_policy_id, self._id_mapped
+        )
+
+    def _set_paths(self, directory: Path):
+        """Point the index file paths at ``directory`` (a snapshot or the legacy data/)."""
+        self.index_path = directory / "policy.index"
+        self.ids_path = directory / "policy_ids.npy"
+        self.legacy_ids_path = directory / "policy_ids.json"
+        self.manifest_path = directory / "index_manifest.json"
+        self.index_config_path = directory / "policy.index.json"
+
+    def current_snapshot(self) -> Optional[str]:
+        """Snapshot version named by data/snapshots/CURRENT (None before the first snapshot)."""
+        pointer = self.snapshots_dir / "CURRENT"
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding="utf-8").strip() or None
+
+    def save_index(self, keep_snapshots: int = 3) -> str:
+        """Save FAISS index, policy IDs, the content-hash manifest and the index config as a new snapshot.
+
+        The files are written to a fresh directory under data/snapshots/, which
+        is then published by atomically replacing the CURRENT pointer: a server
+        never sees a half-written index/ID pair, and processes still using the
+        previous snapshot (e.g. memory-mapped) keep a consistent copy. Only the
+        newest ``keep_snapshots`` snapshots are kept. Returns the new version.
+        """
         if self.index is None:
             raise ValueError("No index to save")
-            
-        # Save FAISS index
-        faiss.write_index(self.index, str(self.index_path))
-        
-        # Save policy IDs
-        with open("data/policy_ids.json", "w", encoding="utf-8") as f:
-            json.dump(self.policy_ids, f)
-        
-    def load_index(self) -> bool:
-        """Load existing FAISS index and policy IDs if available."""
-        if not self.index_path.exists() or not Path("data/policy_ids.json").exists():
-            return False
-            
-        self.index = faiss.read_index(str(self.index_path))
-        with open("data/policy_ids.json", "r", encoding="utf-8") as f:
-            self.policy_ids = json.load(f)
-        return True
-        
+
+        version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = self.snapshots_dir / f".{version}.tmp"
+        tmp_dir.mkdir()
+        faiss.write_index(self.index, str(tmp_dir / "policy.index"))
+        # Policy IDs as a flat int64 array
+        np.save(tmp_dir / "policy_ids.npy", np.asarray(self.policy_ids, dtype=np.int64))
+        # Which content hash each indexed policy was encoded from
+        with open(tmp_dir / "index_manifest.json", "w", encoding="utf-8") as f:
+            json.dump({str(pid): h for pid, h in self.manifest.items()}, f)
+        save_index_config(tmp_dir / "policy.index.json", self.index_config)
+        os.rename(tmp_dir, self.snapshots_dir / version)
+
+        pointer_tmp = self.snapshots_dir / "CURRENT.tmp"
+        pointer_tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(pointer_tmp, self.snapshots_dir / "CURRENT")
+        self.snapshot = version
+        self._set_paths(self.snapshots_dir / version)
+        self._prune_snapshots(keep_snapshots)
+        return version
+
+    def _prune_snapshots(self, keep: int):
+        """Delete all but the newest ``keep`` snapshots."""
+        versions = sorted(p.name for p in self.snapshots_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+        for version in versions[:-max(1, keep)]:
+            if version != self.snapshot:
+                shutil.rmtree(self.snapshots_dir / version, ignore_errors=True)
+
+    def legacy_index_files(self) -> List[Path]:
+        """Pre-snapshot index files directly under data/.
+
+        They are not deleted when a snapshot is published: servers started
+        before snapshots existed still read them. Remove them (embed_policies.py
+        --remove-legacy) once no such server is left.
+        """
+        names = ("policy.index", "policy_ids.npy", "policy_ids.json", "index_manifest.json", "policy.index.json")
+        return [self.data_dir / name for name in names if (self.data_dir / name).exists()]
+
+    def load_index(self, mmap: Optional[bool] = None, warm_up: bool = False) -> bool:
+        """Load the published index snapshot (or the legacy files under data/) if available.
+
+        With ``mmap`` (default: FAISS_MMAP, on) the index is memory-mapped
+        read-only instead of read into the heap; ``update_index`` transparently
+        switches to a private copy. The content-hash manifest is only needed
+        for updates, so it is not read for mapped indexes. Everything is read
+        (and with ``warm_up`` searched once) before searches switch over.
+        """
+        with self._reload_lock:
+            snapshot = self.current_snapshot()
+            directory = self.snapshots_dir / snapshot if snapshot else self.data_dir
+            index_path = directory / "policy.index"
+            ids_path = directory / "policy_ids.npy"
+            if not ids_path.exists():
+                ids_path = directory / "policy_ids.json"
+            if not index_path.exists() or not ids_path.exists():
+                return False
+            if mmap is None:
+                mmap = os.getenv("FAISS_MMAP", "1") == "1"
+
+            index, mmapped = read_index(index_path, mmap=mmap)
+            # Indexes saved before index types were configurable are flat L2
+            index_config = load_index_config(directory / "policy.index.json") or default_index_config("flat_l2")
+            apply_search_params(index, index_config)
+            if ids_path.suffix == ".npy":
+                policy_ids = np.load(ids_path, mmap_mode="r").tolist()
+            else:
+                with open(ids_path, "r", encoding="utf-8") as f:
+                    policy_ids = json.load(f)
+            if warm_up and index.ntotal:
+                index.search(np.zeros((1, index.d), dtype=np.float32), 1)
+
+            self._set_paths(directory)
+            self.snapshot = snapshot
+            self.index, self.mmapped, self.index_config = index, mmapped, index_config
+            self._set_policy_ids(policy_ids, id_mapped=hasattr(index, "id_map"))
+            self.manifest = {} if mmapped else self._read_manifest()
+            self._publish()
+            self.index_version += 1
+            return True
+
+    def reload_index(self) -> bool:
+        """Load the published snapshot if it is not the one being served.
+
+        Runs in the calling thread while searches continue on the current
+        version, which is released once they finish. Returns True when a new
+        version was swapped in.
+        """
+        with self._reload_lock:
+            snapshot = self.current_snapshot()
+            if snapshot is None or snapshot == self.snapshot:
+                return False
+            return self.load_index(warm_up=True)
+
+    def _read_manifest(self) -> Dict[int, str]:
+        if not self._id_mapped or not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return {int(pid): h for pid, h in json.load(f).items()}
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Encode a single query into a (1, dim) float32 matrix, using the embedding cache."""
+        cached = self.cache.get(self.cache_namespace, query)
+        if cached is not None:
+            return cached.reshape(1, -1)
+        return self._encode_uncached(query)
+
+    def _encode_uncached(self, query: str) -> np.ndarray:
+        """Run the encoder for a cache miss and store the result."""
+        vector = self.query_encoder.encode([query], convert_to_numpy=True)[0]
+        return self.cache.put(self.cache_namespace, query, vector).reshape(1, -1)
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode many queries into an (n, dim) matrix with a single encoder call for the cache misses."""
+        vectors: List[Optional[np.ndarray]] = [self.cache.get(self.cache_namespace, q) for q in queries]
+        misses = [i for i, v in enumerate(vectors) if v is None]
+        if misses:
+            encoded = self.query_encoder.encode([queries[i] for i in misses], convert_to_numpy=True)
+            for i, vector in zip(misses, encoded):
+                vectors[i] = self.cache.put(self.cache_namespace, queries[i], vector)
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    async def aencode_query(self, query: str) -> np.ndarray:
+        """Async encode_query: cache hits return inline, misses run on the encoder executor."""
+        cached = self.cache.get(self.cache_namespace, query)
+        if cached is not None:
+            return cached.reshape(1, -1)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_encoder_executor(), self._encode_uncached, query)
+
+    async def aencode_queries(self, queries: List[str]) -> np.ndarray:
+        """Async encode_queries, run on the encoder executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_encoder_executor(), self.encode_queries, queries)
+
     def search(self, query: str, k: int = 5) -> List[int]:
         """Search for similar policies using query and return policy IDs."""
         if self.index is None:
             raise ValueError("Index not initialized")
             
-        query_vector = self.model.encode([query], convert_to_numpy=True)
-        distances, indices = self.index.search(query_vector, k)
-        
-        return [self.policy_ids[i] for i in indices[0]] 
\ No newline at end of file
+        view = self._view
+        query_vector = self.encode_query(query)
+        return view.search_labels(query_vector, min(k, view.index.ntotal))
+
+    def search_filtered(
+        self,
+        query: str,
+        k: int = 5,
+        allowed_ids: Optional[Set[int]] = None
+    ) -> Tuple[List[int], str]:
+        """Search restricted to ``allowed_ids`` and return (policy IDs, strategy).
+
+        The strategy is chosen from the filter selectivity:
+        ``unfiltered`` when there is no filter, ``prefilter`` (FAISS ID selector)
+        for narrow filters and ``overfetch`` (adaptive widening) for broad ones.
+        """
+        if self.index is None:
+            raise ValueError("Index not initialized")
+
+        return self.search_vector_filtered(self.encode_query(query), k, allowed_ids)
+
+    async def asearch_filtered(
+        self,
+        query: str,
+        k: int = 5,
+        allowed_ids: Optional[Set[int]] = None
+    ) -> Tuple[List[int], str, np.ndarray]:
+        """Async search_filtered that never blocks the event loop; also returns the (1, dim) query vector.
+
+        Requests arriving within the batching window share one encoder call
+        and one multi-query index search.
+        """
+        if self.index is None:
+            raise ValueError("Index not initialized")
+
+        return await self.batcher.submit((query, k, allowed_ids))
+
+    def search_filtered_batch(
+        self,
+        items: List[Tuple[str, int, Optional[Set[int]]]]
+    ) -> List[Tuple[List[int], str, np.ndarray]]:
+        """search_filtered for many (query, k, allowed IDs) items at once.
+
+        All queries are encoded in one encoder call and the unfiltered ones
+        share one multi-query index search. Each result carries its (1, dim)
+        query vector so callers need not encode the query again.
+        """
+        if self.index is None:
+            raise ValueError("Index not initialized")
+        if not items:
+            return []
+        return self._search_batch(items)
+
+    async def asearch_filtered_batch(
+        self,
+        items: List[Tuple[str, int, Optional[Set[int]]]]
+    ) -> List[Tuple[List[int], str, np.ndarray]]:
+        """Async search_filtered_batch, run on the encoder executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_encoder_executor(), self.search_filtered_batch, items)
+
+    def _search_batch(
+        self,
+        items: List[Tuple[str, int, Optional[Set[int]]]]
+    ) -> List[Tuple[List[int], str, np.ndarray]]:
+        """Encode a batch of queries at once and search all unfiltered ones in one call.
+
+        Returns (policy IDs, strategy, query vector) per item. Stage timings
+        are recorded once per batch.
+        """
+        view = self._view
+        with span("embed", "faiss"):
+            query_vectors = self.encode_queries([query for query, _, _ in items])
+        results: List[Optional[Tuple[List[int], str, np.ndarray]]] = [None] * len(items)
+
+        with span("search", "faiss"):
+            unfiltered = [i for i, (_, _, allowed_ids) in enumerate(items) if allowed_ids is None]
+            if unfiltered:
+                max_k = min(max(items[i][1] for i in unfiltered), view.index.ntotal)
+                for i, policy_ids in zip(unfiltered, view.search_vectors(query_vectors[unfiltered], max_k)):
+                    results[i] = (policy_ids[:items[i][1]], "unfiltered", query_vectors[i:i + 1])
+
+            for i, (_, k, allowed_ids) in enumerate(items):
+                if allowed_ids is not None:
+                    query_vector = query_vectors[i:i + 1]
+                    results[i] = (*self.search_vector_filtered(query_vector, k, allowed_ids, view=view), query_vector)
+        return results
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> List[List[int]]:
+        """Search an (n, dim) matrix of query vectors in one index call."""
+        return self._view.search_vectors(query_vectors, k)
+
+    def search_vector_grouped(
+        self,
+        query_vector: np.ndarray,
+        groups: Dict[str, Set[int]],
+        k: int = 5
+    ) -> Dict[str, List[int]]:
+        """Top-``k`` policy IDs per group (e.g. per candidate) from one ranked search.
+
+        One index search is over-fetched enough to fill every group and only
+        widened (doubling, as in the overfetch strategy) when a group is still
+        short, so the cost stays that of a single query regardless of the
+        number of groups.
+        """
+        view = self._view
+        ntotal = view.index.ntotal
+        results: Dict[str, List[int]] = {name: [] for name in groups}
+        wanted = {name: min(k, len(ids)) for name, ids in groups.items()}
+        total_allowed = len(set().union(*groups.values())) if groups else 0
+        if ntotal == 0 or total_allowed == 0:
+            return results
+
+        group_of: Dict[int, List[str]] = {}
+        for name, ids in groups.items():
+            for pid in ids:
+                group_of.setdefault(pid, []).append(name)
+        # Smallest group decides how far down the ranking its k hits are expected
+        smallest = min((len(ids) for ids in groups.values() if ids), default=ntotal)
+        fetch = min(ntotal, max(k, math.ceil(k * ntotal / smallest * OVERFETCH_MARGIN)))
+        while True:
+            results = {name: [] for name in groups}
+            for pid in view.search_labels(query_vector, fetch):
+                for name in group_of.get(pid, ()):
+                    if len(results[name]) < k:
+                        results[name].append(pid)
+            if all(len(results[name]) >= wanted[name] for name in groups) or fetch >= ntotal:
+                return results
+            fetch = min(ntotal, fetch * 2)
+
+    async def asearch_grouped(self, query: str, groups: Dict[str, Set[int]], k: int = 5) -> Dict[str, List[int]]:
+        """Encode ``query`` once and run search_vector_grouped on the encoder executor."""
+        if self.index is None:
+            raise ValueError("Index not initialized")
+        with span("embed", "faiss"):
+            query_vector = await self.aencode_query(query)
+        with span("search", "faiss"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                get_encoder_executor(), self.search_vector_grouped, query_vector, groups, k
+            )
+
+    def search_vector_filtered(
+        self,
+        query_vector: np.ndarray,
+        k: int = 5,
+        allowed_ids: Optional[Set[int]] = None,
+        view: Optional[_IndexView] = None
+    ) -> Tuple[List[int], str]:
+        """Filtered search for an already encoded (1, dim) query vector.
+
+        ``view`` pins the index version (default: the current one). A prefilter
+        search on an approximate index that comes back short is repeated
+        exhaustively (strategy ``prefilter_exhaustive``).
+        """
+        view = view or self._view
+        ntotal = view.index.ntotal
+        if allowed_ids is None:
+            return view.search_labels(query_vector, min(k, ntotal)), "unfiltered"
+
+        labels = [view.labels_by_policy_id[pid] for pid in allowed_ids if pid in view.labels_by_policy_id]
+        if not labels or ntotal == 0:
+            return [], "empty"
+
+        selectivity = len(labels) / ntotal
+        if selectivity <= PREFILTER_MAX_SELECTIVITY:
+            try:
+                selector = faiss.IDSelectorBatch(np.asarray(labels, dtype=np.int64))
+                wanted = min(k, len(labels))
+                results = view.search_labels(query_vector, wanted, params=search_parameters(view.config, selector))
+                if len(results) >= wanted or is_exhaustive(view.config):
+                    return results, "prefilter"
+                # IVF/HNSW only see the probed lists / visited graph nodes, which
+                # can miss most of a narrow filter: repeat over the whole index
+                params = search_parameters(view.config, selector, exhaustive_for=ntotal)
+                return view.search_labels(query_vector, wanted, params=params), "prefilter_exhaustive"
+            except (AttributeError, TypeError, RuntimeError):
+                # Older FAISS builds without search-time ID selectors
+                pass
+
+        fetch = min(ntotal, max(k, math.ceil(k / selectivity * OVERFETCH_MARGIN)))
+        while True:
+            results = [pid for pid in view.search_labels(query_vector, fetch) if pid in allowed_ids]
+            if len(results) >= k or fetch >= ntotal:
+                return results[:k], "overfetch"
+            fetch = min(ntotal, fetch * 2) 
\ No newline at end of file
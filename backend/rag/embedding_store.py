@@ -0,0 +1,96 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from backend.models.schema import Policy
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_text(policy: Policy) -> str:
+    """Text that is encoded for a policy (kept in one place so hashes stay stable)."""
+    return f"{policy.candidate} {policy.topic} {policy.text}"
+
+
+def content_hash(policy: Policy) -> str:
+    """Hash of the encoded text; a policy is re-encoded only when this changes."""
+    return hashlib.sha256(embedding_text(policy).encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Persistent policy embeddings keyed by content hash (stored as one .npz file).
+
+    The file also records the encoder model and vector dimension. Vectors
+    written by a different encoder are discarded rather than reused.
+    """
+
+    def __init__(self, path: str = "data/embedding_store.npz", model: Optional[str] = None, dim: Optional[int] = None):
+        self.path = Path(path)
+        self.model: Optional[str] = None
+        self.dim: Optional[int] = None
+        self._vectors: Dict[str, np.ndarray] = {}
+        if self.path.exists():
+            data = np.load(self.path, allow_pickle=False)
+            # Stores written before the model was recorded have no "model" entry
+            self.model = (str(data["model"]) if "model" in data.files else "") or None
+            for key, vector in zip(data["hashes"], data["vectors"]):
+                self._vectors[str(key)] = vector
+            self.dim = int(data["vectors"].shape[1]) if self._vectors else None
+        if model is not None or dim is not None:
+            self.use_encoder(model, dim)
+
+    def use_encoder(self, model: Optional[str], dim: Optional[int] = None) -> bool:
+        """Bind the store to an encoder, dropping vectors from another model or dimension.
+
+        Returns True when stored vectors were discarded.
+        """
+        mismatch = (model is not None and self.model != model) or (dim is not None and self.dim != dim)
+        discard = bool(self._vectors) and mismatch
+        if discard:
+            logger.warning(
+                "Discarding %d vectors in %s: written by %s (dim %s), current encoder is %s (dim %s)",
+                len(self._vectors), self.path, self.model or "an unknown model", self.dim, model, dim
+            )
+            self._vectors = {}
+        if model is not None:
+            self.model = model
+        if dim is not None or discard:
+            self.dim = dim
+        return discard
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self._vectors.get(key)
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vector.shape[-1]
+        elif vector.shape[-1] != self.dim:
+            raise ValueError(f"Vector dimension {vector.shape[-1]} does not match the store's {self.dim}")
+        self._vectors[key] = vector
+
+    def get_many(self, keys: List[str]) -> np.ndarray:
+        """Stack the vectors for ``keys`` into an (n, dim) matrix."""
+        return np.vstack([self._vectors[key] for key in keys]).astype(np.float32, copy=False)
+
+    def prune(self, keep: Iterable[str]):
+        """Drop vectors whose hash is no longer referenced."""
+        keep = set(keep)
+        self._vectors = {key: vector for key, vector in self._vectors.items() if key in keep}
+
+    def save(self):
+        """Write the store atomically."""
+        if not self._vectors:
+            return
+        keys = sorted(self._vectors)
+        tmp_path = self.path.with_name(self.path.stem + ".tmp.npz")
+        np.savez(tmp_path, hashes=np.array(keys), vectors=self.get_many(keys), model=np.array(self.model or ""))
+        os.replace(tmp_path, self.path)
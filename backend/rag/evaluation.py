@@ -0,0 +1,84 @@
+import json
+import math
+from typing import Dict, List, Sequence
+
+
+def load_evaluation_dataset(path: str = "data/evaluation_dataset.json") -> List[Dict]:
+    """Load evaluation queries with relevant_ids and hard_negative_ids."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def precision_at_k(ranked: Sequence[int], relevant: Sequence[int], k: int = 5) -> float:
+    return len([pid for pid in ranked[:k] if pid in relevant]) / k
+
+
+def recall_at_k(ranked: Sequence[int], relevant: Sequence[int], k: int = 5) -> float:
+    if not relevant:
+        return 0.0
+    return len([pid for pid in ranked[:k] if pid in relevant]) / len(relevant)
+
+
+def hit_at_k(ranked: Sequence[int], relevant: Sequence[int], k: int = 5) -> float:
+    return 1.0 if any(pid in relevant for pid in ranked[:k]) else 0.0
+
+
+def reciprocal_rank(ranked: Sequence[int], relevant: Sequence[int]) -> float:
+    for rank, pid in enumerate(ranked, 1):
+        if pid in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: Sequence[int], relevant: Sequence[int], k: int = 5) -> float:
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, pid in enumerate(ranked[:k], 1) if pid in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def hard_negative_rate(ranked: Sequence[int], hard_negatives: Sequence[int], k: int = 5) -> float:
+    """Fraction of the top-k occupied by known hard negatives."""
+    return len([pid for pid in ranked[:k] if pid in hard_negatives]) / k
+
+
+def evaluate_rankings(dataset: List[Dict], rankings: Dict[str, List[int]], k: int = 5) -> Dict[str, float]:
+    """Average the retrieval metrics over the dataset for {query_id: ranked policy IDs}."""
+    totals = {
+        f"precision@{k}": 0.0,
+        f"recall@{k}": 0.0,
+        f"hit@{k}": 0.0,
+        "mrr": 0.0,
+        f"ndcg@{k}": 0.0,
+        f"hard_negative@{k}": 0.0,
+    }
+    for item in dataset:
+        ranked = rankings.get(item["query_id"], [])
+        relevant = set(item["relevant_ids"])
+        totals[f"precision@{k}"] += precision_at_k(ranked, relevant, k)
+        totals[f"recall@{k}"] += recall_at_k(ranked, relevant, k)
+        totals[f"hit@{k}"] += hit_at_k(ranked, relevant, k)
+        totals["mrr"] += reciprocal_rank(ranked, relevant)
+        totals[f"ndcg@{k}"] += ndcg_at_k(ranked, relevant, k)
+        totals[f"hard_negative@{k}"] += hard_negative_rate(ranked, set(item.get("hard_negative_ids", [])), k)
+    return {name: value / len(dataset) for name, value in totals.items()} if dataset else totals
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Linear-interpolated percentile (p in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * p / 100.0
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def latency_summary(values_ms: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean of a list of millisecond timings."""
+    return {
+        "p50": percentile(values_ms, 50),
+        "p95": percentile(values_ms, 95),
+        "p99": percentile(values_ms, 99),
+        "mean": sum(values_ms) / len(values_ms) if values_ms else 0.0,
+    }
@@ -1,34 +1,30 @@
+import functools
 import os
 import re
-from openai import OpenAI
-from typing import List, Tuple, Dict, Any
+import time
+from typing import AsyncIterator, List, Optional, Tuple, Dict, Any
+from ..llm_gateway import LLMUnavailable, extractive_answer, get_llm_gateway
+from ..metrics import STAGE_SECONDS, record_llm_tokens, span
+from .batcher import bounded_as_completed
+from .context import get_context_builder
 from ..models.schema import Policy
 from ..qdrant_rag.qdrant_rag_pipeline import QdrantRAGPipeline
 
 class ResponseGenerator:
-    def __init__(self, use_qdrant: bool = False):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, use_qdrant: bool = False, local_encoder=None):
+        self.gateway = get_llm_gateway()
+        self.context_builder = get_context_builder()
         self.use_qdrant = use_qdrant
+        self.engine = "qdrant" if use_qdrant else "faiss"
+        # Max concurrent LLM calls for generate_batch
+        self.batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
         if use_qdrant:
-            self.qdrant_pipeline = QdrantRAGPipeline()
+            self.qdrant_pipeline = QdrantRAGPipeline(local_encoder=local_encoder)
 
     def format_context(self, policies: List[Policy]) -> str:
-        """Format retrieved policies into context string."""
-        # Group policies by candidate
-        policies_by_candidate = {}
-        for policy in policies:
-            if policy.candidate not in policies_by_candidate:
-                policies_by_candidate[policy.candidate] = []
-            policies_by_candidate[policy.candidate].append(policy)
-        
-        # Format context
-        context = "관련 공약 정보:\n\n"
-        for policy in policies:
-            context += f"[공약 ID: {policy.id}] - {policy.candidate}의 공약\n"
-            context += f"주제: {policy.topic}\n"
-            context += f"내용: {policy.text}\n"
-            context += f"출처: {policy.source}\n\n"
-        return context
+        """Format retrieved policies into a context string within the input token budget."""
+        context, _ = self.context_builder.pack(policies)
+        return f"관련 공약 정보:\n\n{context}\n\n"
 
     def extract_referenced_policy_ids(self, text: str) -> List[int]:
         """Extract policy IDs referenced in the text."""
@@ -37,13 +33,17 @@ class ResponseGenerator:
         # Convert to integers and remove duplicates
         return list(set(int(id) for id in matches))
 
-    def generate_response(self, question: str, policies: List[Policy]) -> Tuple[str, List[Policy]]:
-        """Generate response using OpenAI API and return referenced policies."""
-        if not policies:
-            return "죄송합니다. 검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요.", []
-            
+    def referenced_policies(self, answer: str, policies: List[Policy], engine: Optional[str] = None) -> List[Policy]:
+        """Return the policies cited in the answer with [공약: ID]."""
+        with span("citations", engine or self.engine):
+            referenced_ids = self.extract_referenced_policy_ids(answer)
+            return [p for p in policies if p.id in referenced_ids]
+
+    def build_messages(self, question: str, policies: List[Policy]) -> List[Dict[str, str]]:
+        """Build the chat messages for a question and its retrieved policies."""
         # Format context from policies
-        context = self.format_context(policies)
+        with span("context", self.engine):
+            context = self.format_context(policies)
         
         # Create prompt
         prompt = f"""다음은 대선 후보들의 공약 정보입니다:
@@ -61,23 +61,78 @@ class ResponseGenerator:
 
 답변:"""
         
+        return [
+            {"role": "system", "content": "당신은 대선 후보들의 공약을 분석하고 비교하는 전문가입니다. 주어진 정보만을 사용하여 정확하고 객관적인 답변을 제공해주세요. 답변에는 참고한 공약 ID [공약: 숫자]를 표시해주세요."},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def generate_response(
+        self,
+        question: str,
+        policies: List[Policy],
+        fallback: bool = True
+    ) -> Tuple[str, List[Policy]]:
+        """Generate response using OpenAI API and return referenced policies.
+
+        When the LLM gateway gives up (deadline, retries, open circuit) the
+        answer is built from the policies themselves; with ``fallback=False``
+        LLMUnavailable is raised instead (e.g. so the caller does not cache it).
+        """
+        if not policies:
+            return "죄송합니다. 검색 조건에 맞는 공약을 찾을 수 없습니다. 다른 검색어나 필터를 사용해보세요.", []
+        
         # Generate response
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "당신은 대선 후보들의 공약을 분석하고 비교하는 전문가입니다. 주어진 정보만을 사용하여 정확하고 객관적인 답변을 제공해주세요. 답변에는 참고한 공약 ID [공약: 숫자]를 표시해주세요."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=4096
-        )
+        messages = self.build_messages(question, policies)
+        try:
+            with span("llm", self.engine):
+                response = await self.gateway.complete(messages, self.context_builder.completion_budget(question))
+        except LLMUnavailable:
+            if not fallback:
+                raise
+            return self.fallback_response(policies)
+        if response.usage:
+            record_llm_tokens(self.engine, response.usage.prompt_tokens, response.usage.completion_tokens)
         
         answer = response.choices[0].message.content
         
-        # Extract referenced policy IDs
-        referenced_ids = self.extract_referenced_policy_ids(answer)
-        
         # Filter policies to only include referenced ones
-        referenced_policies = [p for p in policies if p.id in referenced_ids]
-        
-        return answer, referenced_policies 
\ No newline at end of file
+        return answer, self.referenced_policies(answer, policies)
+
+    def fallback_response(self, policies: List[Policy]) -> Tuple[str, List[Policy]]:
+        """Extractive answer from the retrieved policies, used when the LLM is unavailable."""
+        answer = extractive_answer(policies)
+        return answer, self.referenced_policies(answer, policies)
+
+    async def generate_batch(
+        self,
+        items: List[Tuple[str, List[Policy]]],
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Optional[Tuple[str, List[Policy]]], Optional[Exception]]]:
+        """generate_response for many (question, policies) items.
+
+        At most ``concurrency`` (default BATCH_CONCURRENCY) LLM calls run at once.
+        Yields (index, (answer, referenced policies), error) as each item finishes,
+        so one failed call does not hold back or abort the rest.
+        """
+        jobs = [functools.partial(self.generate_response, question, policies) for question, policies in items]
+        async for result in bounded_as_completed(jobs, concurrency or self.batch_concurrency):
+            yield result
+
+    async def stream_response(self, question: str, policies: List[Policy]) -> AsyncIterator[str]:
+        """Stream the answer as completion tokens arrive."""
+        messages = self.build_messages(question, policies)
+        start = time.perf_counter()
+        parts = []
+        # LLMUnavailable is raised before the first token if the gateway gives up
+        async for token in self.gateway.stream(messages, self.context_builder.completion_budget(question)):
+            if not parts:
+                STAGE_SECONDS.observe(time.perf_counter() - start, engine=self.engine, stage="llm_first_token")
+            parts.append(token)
+            yield token
+        STAGE_SECONDS.observe(time.perf_counter() - start, engine=self.engine, stage="llm")
+        # Streamed responses carry no usage; count with the context builder's tokenizer
+        record_llm_tokens(
+            self.engine,
+            sum(self.context_builder.count_tokens(m["content"]) for m in messages),
+            self.context_builder.count_tokens("".join(parts))
+        )
@@ -0,0 +1,218 @@
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import faiss
+import numpy as np
+
+# Supported index types. Everything except the legacy flat_l2 index runs on
+# L2-normalized vectors with inner product, i.e. cosine similarity.
+# sq8 / sq_fp16 store scalar-quantized (uint8 / float16) vectors: 4x / 2x smaller
+# than flat, still exhaustive, and memory-mappable like flat indexes.
+INDEX_TYPES = ("flat_l2", "flat_ip", "sq8", "sq_fp16", "hnsw", "ivf_flat", "ivf_pq")
+
+
+def default_index_config(index_type: Optional[str] = None) -> Dict:
+    """Index configuration for ``index_type`` (defaults to FAISS_INDEX_TYPE, then flat_l2)."""
+    index_type = index_type or os.getenv("FAISS_INDEX_TYPE", "flat_l2")
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type}")
+    params: Dict = {}
+    if index_type == "hnsw":
+        params = {"M": 32, "efConstruction": 200, "efSearch": 64}
+    elif index_type == "ivf_flat":
+        params = {"nlist": None, "nprobe": 8}
+    elif index_type == "ivf_pq":
+        params = {"nlist": None, "nprobe": 8, "pq_m": None, "pq_nbits": 8}
+    return {"type": index_type, "normalize": index_type != "flat_l2", "params": params}
+
+
+def load_index_config(path: Path) -> Optional[Dict]:
+    """Read the configuration saved next to an index, if any."""
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index_config(path: Path, config: Dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+
+def prepare_vectors(vectors: np.ndarray, config: Dict) -> np.ndarray:
+    """Return a contiguous float32 copy of ``vectors``, L2-normalized when the config asks for it."""
+    vectors = np.array(vectors, dtype=np.float32, order="C", copy=True)
+    if config.get("normalize"):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _resolve_params(config: Dict, n: int, dim: int) -> Dict:
+    """Fill in corpus-dependent parameters (nlist, PQ sizes) left as None."""
+    params = dict(config.get("params", {}))
+    if config["type"] in ("ivf_flat", "ivf_pq") and not params.get("nlist"):
+        params["nlist"] = max(1, min(int(4 * math.sqrt(n)), n // 8 or 1))
+    if config["type"] == "ivf_pq":
+        if not params.get("pq_m"):
+            params["pq_m"] = next((m for m in (64, 32, 16, 8, 4) if dim % m == 0 and m <= dim), 1)
+        # PQ training needs at least 2^nbits points per sub-quantizer
+        params["pq_nbits"] = max(1, min(params.get("pq_nbits") or 8, int(math.log2(max(n, 2)))))
+    return params
+
+
+def create_index(config: Dict, vectors: np.ndarray, ids: np.ndarray) -> Tuple[faiss.Index, Dict]:
+    """Build, train and fill an ID-mapped index. Returns the index and the resolved config."""
+    n, dim = vectors.shape
+    params = _resolve_params(config, n, dim)
+    config = {**config, "params": params}
+    metric = faiss.METRIC_INNER_PRODUCT if config.get("normalize") else faiss.METRIC_L2
+    index_type = config["type"]
+
+    if index_type == "flat_l2":
+        base = faiss.IndexFlatL2(dim)
+    elif index_type == "flat_ip":
+        base = faiss.IndexFlatIP(dim)
+    elif index_type in ("sq8", "sq_fp16"):
+        qtype = faiss.ScalarQuantizer.QT_8bit if index_type == "sq8" else faiss.ScalarQuantizer.QT_fp16
+        base = faiss.IndexScalarQuantizer(dim, qtype, metric)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, params["M"], metric)
+        base.hnsw.efConstruction = params["efConstruction"]
+    else:
+        quantizer = faiss.IndexFlatIP(dim) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            base = faiss.IndexIVFFlat(quantizer, dim, params["nlist"], metric)
+        else:
+            base = faiss.IndexIVFPQ(quantizer, dim, params["nlist"], params["pq_m"], params["pq_nbits"], metric)
+
+    index = faiss.IndexIDMap2(base)
+    prepared = prepare_vectors(vectors, config)
+    if not base.is_trained:
+        base.train(prepared)
+    index.add_with_ids(prepared, np.asarray(ids, dtype=np.int64))
+    apply_search_params(index, config)
+    return index, config
+
+
+def apply_search_params(index: faiss.Index, config: Dict):
+    """Apply query-time parameters (efSearch / nprobe) to a built or loaded index."""
+    params = config.get("params", {})
+    space = faiss.ParameterSpace()
+    if config["type"] == "hnsw" and params.get("efSearch"):
+        space.set_index_parameter(index, "efSearch", params["efSearch"])
+    elif config["type"] in ("ivf_flat", "ivf_pq") and params.get("nprobe"):
+        space.set_index_parameter(index, "nprobe", params["nprobe"])
+
+
+def search_parameters(config: Dict, selector: faiss.IDSelector, exhaustive_for: int = 0) -> faiss.SearchParameters:
+    """Type-specific search parameters carrying an ID selector and the configured efSearch/nprobe.
+
+    With ``exhaustive_for`` (the index size) IVF indexes probe every list and
+    HNSW explores up to that many nodes, so every selected vector is reachable.
+    """
+    params = config.get("params", {})
+    if config["type"] == "hnsw":
+        ef_search = params.get("efSearch", 16)
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(ef_search, exhaustive_for))
+    if config["type"] in ("ivf_flat", "ivf_pq"):
+        nprobe = params.get("nprobe", 1)
+        if exhaustive_for:
+            nprobe = max(nprobe, params.get("nlist") or exhaustive_for)
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def is_exhaustive(config: Dict) -> bool:
+    """Whether every search visits all vectors (flat and scalar-quantized indexes)."""
+    return config["type"] not in ("hnsw", "ivf_flat", "ivf_pq")
+
+
+def read_index(path: Path, mmap: bool = True) -> Tuple[faiss.Index, bool]:
+    """Open a saved index, memory-mapped when possible. Returns (index, mmapped).
+
+    Mapped indexes share pages between processes through the OS page cache
+    and open in constant time, but they are read-only: adding or removing
+    vectors aborts the process, so callers must reload without mmap first.
+    Flat/SQ/HNSW codes map with IO_FLAG_MMAP_IFC (FAISS >= 1.10); IVF lists
+    only with IO_FLAG_MMAP. Anything else falls back to a full read.
+    """
+    if mmap:
+        flags = [getattr(faiss, name) for name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP") if hasattr(faiss, name)]
+        for flag in flags:
+            try:
+                return faiss.read_index(str(path), flag | faiss.IO_FLAG_READ_ONLY), True
+            except RuntimeError:
+                continue
+    return faiss.read_index(str(path)), False
+
+
+def supports_remove(config: Dict) -> bool:
+    """HNSW graphs cannot drop vectors; those indexes are rebuilt instead."""
+    return config["type"] != "hnsw"
+
+
+def _sweep(n: int, dim: int) -> List[Dict]:
+    """Candidate configurations for tuning."""
+    configs = [default_index_config(index_type) for index_type in ("flat_ip", "sq_fp16", "sq8")]
+    for ef in (16, 32, 64, 128, 256):
+        config = default_index_config("hnsw")
+        config["params"]["efSearch"] = ef
+        configs.append(config)
+    nlist = _resolve_params(default_index_config("ivf_flat"), n, dim)["nlist"]
+    nprobes = sorted({p for p in (1, 2, 4, 8, 16, 32, 64) if p <= nlist} | {nlist})
+    for index_type in ("ivf_flat", "ivf_pq"):
+        pq_sizes = [None] if index_type == "ivf_flat" else [m for m in (8, 16, 32, 64) if dim % m == 0]
+        for pq_m in pq_sizes:
+            for nprobe in nprobes:
+                config = default_index_config(index_type)
+                config["params"]["nprobe"] = nprobe
+                if pq_m:
+                    config["params"]["pq_m"] = pq_m
+                configs.append(config)
+    return configs
+
+
+def tune_index_config(
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    query_vectors: np.ndarray,
+    relevant_ids: List[List[int]],
+    target_recall: Optional[float] = None,
+    k: int = 5,
+    repeat: int = 5
+) -> Tuple[Dict, List[Dict]]:
+    """Sweep index types/efSearch/nprobe/PQ sizes and pick the fastest meeting ``target_recall``.
+
+    Recall@k is measured against the evaluation set's relevant IDs. Without an
+    explicit target, the exact cosine (flat_ip) recall minus 2% is used.
+    Returns the chosen config and one report row per candidate.
+    """
+    from .evaluation import recall_at_k
+
+    n, dim = vectors.shape
+    report = []
+    for config in _sweep(n, dim):
+        index, resolved = create_index(config, vectors, ids)
+        queries = prepare_vectors(query_vectors, resolved)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for i in range(len(queries)):
+                index.search(queries[i:i + 1], k)
+        latency_ms = (time.perf_counter() - start) * 1000.0 / (repeat * len(queries))
+        _, labels = index.search(queries, k)
+        recall = float(np.mean([
+            recall_at_k([int(l) for l in row if l >= 0], set(relevant), k)
+            for row, relevant in zip(labels, relevant_ids)
+        ]))
+        report.append({"config": resolved, "recall": recall, "latency_ms": latency_ms})
+
+    if target_recall is None:
+        target_recall = report[0]["recall"] * 0.98
+    eligible = [row for row in report if row["recall"] >= target_recall] or [report[0]]
+    best = min(eligible, key=lambda row: (row["latency_ms"], -row["recall"]))
+    chosen = dict(best["config"])
+    chosen["tuning"] = {"target_recall": target_recall, "recall": best["recall"], "latency_ms": best["latency_ms"], "k": k}
+    return chosen, report
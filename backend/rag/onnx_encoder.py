@@ -0,0 +1,74 @@
+import importlib.util
+import os
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+
+DEFAULT_ONNX_MODEL_DIR = "data/onnx/ko-sroberta-multitask-int8"
+ONNX_MODEL_FILE = "model.onnx"
+# Packages the ONNX backend imports at load time (installed by requirements-onnx.txt)
+ONNX_RUNTIME_PACKAGES = ("onnxruntime", "transformers")
+
+
+def check_onnx_encoder(model_dir: str = DEFAULT_ONNX_MODEL_DIR):
+    """Raise if the ONNX encoder cannot be loaded: missing packages or no exported model.
+
+    Only looks the packages up, so it is cheap enough to run at startup.
+    """
+    missing = [name for name in ONNX_RUNTIME_PACKAGES if importlib.util.find_spec(name) is None]
+    if missing:
+        raise ImportError(
+            f"ENCODER_BACKEND=onnx needs {', '.join(missing)}. Run 'pip install -r requirements-onnx.txt'."
+        )
+    model_path = Path(model_dir) / ONNX_MODEL_FILE
+    if not model_path.exists():
+        raise FileNotFoundError(
+            f"ONNX encoder not found at {model_path}. Run 'python script/export_onnx_encoder.py' first."
+        )
+
+
+class OnnxEncoder:
+    """Sentence encoder running an exported (int8-quantized) transformer on ONNX Runtime.
+
+    Mirrors the ``SentenceTransformer.encode`` call used by PolicyEmbedder:
+    tokenize, run the graph, mean-pool the last hidden state over the
+    attention mask (the pooling ko-sroberta-multitask is trained with).
+    The model directory is produced by ``script/export_onnx_encoder.py``.
+    onnxruntime and transformers are imported lazily so the default
+    PyTorch backend does not need them.
+    """
+
+    def __init__(self, model_dir: str = DEFAULT_ONNX_MODEL_DIR, threads: Optional[int] = None, max_length: int = 128):
+        check_onnx_encoder(model_dir)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = Path(model_dir) / ONNX_MODEL_FILE
+        if threads is None:
+            threads = int(os.getenv("ONNX_THREADS", "2"))
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        """Encode ``texts`` into an (n, dim) float32 matrix."""
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            outputs.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        return np.vstack(outputs).astype(np.float32, copy=False)
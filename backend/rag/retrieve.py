@@ -1,19 +1,15 @@
-from typing import List, Optional, Dict
-import json
-from pathlib import Path
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from backend.models.schema import Policy
+from backend.policy_store import PolicyStore, get_policy_store
+from backend.metrics import STAGE_SECONDS
 from .embed import PolicyEmbedder
 
 class PolicyRetriever:
-    def __init__(self, embedder: PolicyEmbedder):
+    def __init__(self, embedder: PolicyEmbedder, store: Optional[PolicyStore] = None):
         self.embedder = embedder
-        self.policies_path = Path("data/policy_data.json")
-        
-    def _load_policies(self) -> Dict[int, Policy]:
-        """Load all policies from JSON file."""
-        with open(self.policies_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return {p['id']: Policy(**p) for p in data}
+        self.store = store or get_policy_store()
         
     def retrieve(
         self,
@@ -23,25 +19,102 @@ class PolicyRetriever:
         topic_filter: Optional[str] = None
     ) -> List[Policy]:
         """Retrieve relevant policies based on query and filters."""
-        # Get policy IDs from vector search
-        policy_ids = self.embedder.search(query, k=k*2)  # Get more results for filtering
+        policies, _ = self.retrieve_with_strategy(
+            query, k=k, candidate_filter=candidate_filter, topic_filter=topic_filter
+        )
+        return policies
+
+    def retrieve_with_strategy(
+        self,
+        query: str,
+        k: int = 5,
+        candidate_filter: Optional[str] = None,
+        topic_filter: Optional[str] = None
+    ) -> Tuple[List[Policy], str]:
+        """Retrieve policies and report the filtered-search strategy that was used."""
+        # Allowed IDs from the store's candidate/topic postings (None = no filter)
+        allowed_ids = self.store.ids_for(candidate_filter, topic_filter)
+        
+        # Filter-aware vector search always fills k when enough matches exist
+        policy_ids, strategy = self.embedder.search_filtered(query, k=k, allowed_ids=allowed_ids)
+        return self.store.get_many(policy_ids), strategy
         
-        # Load all policies
-        policies = self._load_policies()
+    async def aretrieve_with_strategy(
+        self,
+        query: str,
+        k: int = 5,
+        candidate_filter: Optional[str] = None,
+        topic_filter: Optional[str] = None
+    ) -> Tuple[List[Policy], str, np.ndarray]:
+        """Async retrieve_with_strategy; encoding and search run on the encoder executor.
+
+        Also returns the (1, dim) query vector used for the search.
+        """
+        start = time.perf_counter()
+        allowed_ids = self.store.ids_for(candidate_filter, topic_filter)
+        filter_seconds = time.perf_counter() - start
+        policy_ids, strategy, query_vector = await self.embedder.asearch_filtered(query, k=k, allowed_ids=allowed_ids)
+        start = time.perf_counter()
+        policies = self.store.get_many(policy_ids)
+        # Filter stage = building the allowed-ID set + mapping IDs back to policies
+        STAGE_SECONDS.observe(filter_seconds + time.perf_counter() - start, engine="faiss", stage="filter")
+        return policies, strategy, query_vector
+
+    def retrieve_batch(
+        self,
+        queries: List[Tuple[str, Optional[str], Optional[str]]],
+        k: int = 5
+    ) -> List[Tuple[List[Policy], str, np.ndarray]]:
+        """Retrieve for many (query, candidate_filter, topic_filter) items with one encoder
+        call and one multi-query index search; returns (policies, strategy, query vector) per item."""
+        items = [(query, k, self.store.ids_for(candidate, topic)) for query, candidate, topic in queries]
+        return [
+            (self.store.get_many(policy_ids), strategy, query_vector)
+            for policy_ids, strategy, query_vector in self.embedder.search_filtered_batch(items)
+        ]
+
+    async def aretrieve_batch(
+        self,
+        queries: List[Tuple[str, Optional[str], Optional[str]]],
+        k: int = 5
+    ) -> List[Tuple[List[Policy], str, np.ndarray]]:
+        """Async retrieve_batch; encoding and search run on the encoder executor."""
+        start = time.perf_counter()
+        items = [(query, k, self.store.ids_for(candidate, topic)) for query, candidate, topic in queries]
+        filter_seconds = time.perf_counter() - start
+        results = await self.embedder.asearch_filtered_batch(items)
+        start = time.perf_counter()
+        batch = [
+            (self.store.get_many(policy_ids), strategy, query_vector)
+            for policy_ids, strategy, query_vector in results
+        ]
+        STAGE_SECONDS.observe(filter_seconds + time.perf_counter() - start, engine="faiss", stage="filter")
+        return batch
+
+    async def aretrieve_grouped(
+        self,
+        query: str,
+        candidates: List[str],
+        k: int = 3,
+        topic_filter: Optional[str] = None
+    ) -> Dict[str, List[Policy]]:
+        """Top-``k`` policies per candidate with one query encoding and one grouped search."""
+        start = time.perf_counter()
+        groups = {candidate: self.store.ids_for(candidate, topic_filter) for candidate in candidates}
+        filter_seconds = time.perf_counter() - start
+        policy_ids = await self.embedder.asearch_grouped(query, groups, k=k)
+        start = time.perf_counter()
+        grouped = {candidate: self.store.get_many(policy_ids[candidate]) for candidate in candidates}
+        STAGE_SECONDS.observe(filter_seconds + time.perf_counter() - start, engine="faiss", stage="filter")
+        return grouped
+
+    def get_candidates(self) -> List[str]:
+        """Get list of unique candidates."""
+        return self.store.candidates()
         
-        # Get policies by ID and apply filters
-        results = []
-        for pid in policy_ids:
-            policy = policies[pid]
-            if candidate_filter and policy.candidate != candidate_filter:
-                continue
-            if topic_filter and policy.topic != topic_filter:
-                continue
-            results.append(policy)
-            if len(results) >= k:
-                break
-                
-        return results
+    def get_topics(self) -> List[str]:
+        """Get list of unique topics."""
+        return self.store.topics()
         
     def format_context(self, policies: List[Policy]) -> str:
         """Format retrieved policies into context string for LLM."""
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from backend.models.schema import Policy
+from backend.llm_gateway import LLMGateway
+from backend.policy_store import PolicyStore
+from .compare import SYSTEM_PROMPT, cited_ids
+from .context import COMPLETION_BUDGETS, ContextBuilder, question_type
+from .embedding_store import content_hash
+
+# Bump when the summary prompt changes so every cell is regenerated
+SUMMARY_PROMPT_VERSION = 1
+
+Cell = Tuple[str, str]
+
+# Words of a "just summarize the selection" question, after particles are stripped
+_GENERIC_WORDS = {
+    "공약", "정책", "주요", "핵심", "대표", "전체", "모든", "모두", "전부", "내용", "관련", "분야", "후보",
+    "대해", "대한", "대해서", "관해", "관한", "요약", "정리", "설명", "소개", "알려", "보여", "말해",
+    "요약해", "정리해", "설명해", "소개해", "알려줘", "보여줘", "말해줘", "요약해줘", "정리해줘",
+    "설명해줘", "소개해줘", "알려주세요", "보여주세요", "요약해주세요", "정리해주세요", "설명해주세요",
+    "소개해주세요", "해줘", "해주세요", "주세요", "줘", "뭐야", "뭐예요", "뭔가요", "뭐", "무엇",
+    "무엇인가요", "무엇입니까", "어떤", "어떤게", "어떻게", "있나요", "있어", "있어요", "있습니까", "뭐가",
+    "무슨", "좀", "간단히", "간략히", "짧게", "요", "은", "는", "이", "가",
+}
+_PARTICLES = ("에서는", "에서", "에는", "에게", "으로", "로는", "이란", "란", "은", "는", "이", "가", "을", "를", "의", "에", "도", "와", "과")
+
+
+def _bare(token: str) -> str:
+    for particle in _PARTICLES:
+        if token.endswith(particle) and len(token) > len(particle):
+            return token[:-len(particle)]
+    return token
+
+
+def is_summary_request(question: str, candidate: Optional[str] = None, topic: Optional[str] = None) -> bool:
+    """True when the question only asks to summarize the selected candidate/topic.
+
+    The filter values themselves and generic wording ("공약 요약해줘", "주요 정책
+    알려주세요", ...) are removed; anything left is a specific information need
+    that goes through retrieval and the LLM instead.
+    """
+    if not candidate and not topic:
+        return False
+    if question_type(question) == "compare":
+        return False
+    text = question
+    for value in (candidate, topic, *(topic.split("/") if topic else ())):
+        if value:
+            text = text.replace(value, " ")
+    for token in re.sub(r"[^\w\s]", " ", text).split():
+        if token not in _GENERIC_WORDS and _bare(token) not in _GENERIC_WORDS:
+            return False
+    return True
+
+
+def cell_hash(policies: List[Policy]) -> str:
+    """Version of one (candidate, topic) cell: hash of its policies' content hashes."""
+    digest = hashlib.sha256(f"v{SUMMARY_PROMPT_VERSION}".encode("utf-8"))
+    for policy in sorted(policies, key=lambda p: p.id):
+        digest.update(f"{policy.id}:{content_hash(policy)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def policy_cells(store: PolicyStore) -> Dict[Cell, List[Policy]]:
+    """Policies grouped by (candidate, topic), in file order."""
+    cells: Dict[Cell, List[Policy]] = {}
+    for policy in store.policies:
+        cells.setdefault((policy.candidate, policy.topic), []).append(policy)
+    return cells
+
+
+def build_summary_messages(builder: ContextBuilder, candidate: str, topic: str, policies: List[Policy]) -> List[Dict[str, str]]:
+    """Prompt for one cell's summary (used by script/build_summaries.py)."""
+    context, _ = builder.pack(policies)
+    prompt = f"""다음은 {candidate} 후보의 '{topic}' 분야 공약입니다:
+
+{context}
+
+위 공약만을 사용하여 {candidate} 후보의 {topic} 분야 공약을 요약해주세요.
+
+주의사항:
+- 핵심 공약을 빠짐없이 3~6문장으로 정리해주세요.
+- 주어진 공약 정보에 없는 내용은 지어내지 마세요.
+- 참고한 공약은 [공약: ID] 형식으로 표시해주세요.
+
+요약:"""
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+
+async def generate_cell_summary(
+    gateway: LLMGateway,
+    builder: ContextBuilder,
+    candidate: str,
+    topic: str,
+    policies: List[Policy]
+) -> Tuple[str, List[int]]:
+    """Generate one cell's summary and return (summary, cited policy IDs)."""
+    response = await gateway.complete(
+        build_summary_messages(builder, candidate, topic, policies),
+        max_tokens=min(COMPLETION_BUDGETS["summary"], builder.max_completion_tokens),
+        temperature=0.3
+    )
+    summary = response.choices[0].message.content
+    cell_ids = [p.id for p in policies]
+    cited = cited_ids(summary)
+    # A summary without citations is still based on the whole cell
+    return summary, [pid for pid in cell_ids if pid in cited] or cell_ids
+
+
+class SummaryStore:
+    """Precomputed (candidate, topic) summaries written by ``script/build_summaries.py``.
+
+    Each cell is stored with the hash of the policies it was generated from;
+    a cell is only served while that hash matches the current policy data, so
+    edited pledges never get an outdated summary. The file is re-read when it
+    changes on disk (checked at most every ``check_interval`` seconds).
+    """
+
+    def __init__(self, policy_store: PolicyStore, path: str = "data/summaries.json", check_interval: float = 5.0):
+        self.policy_store = policy_store
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.cells: Dict[Cell, Dict] = {}
+        self._mtime_ns: Optional[int] = None
+        self._last_check = 0.0
+        self._current_hashes: Optional[Tuple[int, Dict[Cell, str]]] = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Read the summary file (missing file = no summaries)."""
+        cells: Dict[Cell, Dict] = {}
+        mtime_ns = None
+        if self.path.exists():
+            mtime_ns = self.path.stat().st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for cell in data.get("cells", []):
+                cells[(cell["candidate"], cell["topic"])] = cell
+        self.cells = cells
+        self._mtime_ns = mtime_ns
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            mtime_ns = self.path.stat().st_mtime_ns if self.path.exists() else None
+            if mtime_ns != self._mtime_ns:
+                self.reload()
+
+    def current_hashes(self) -> Dict[Cell, str]:
+        """Cell hashes of the current policy data (recomputed when the data changes)."""
+        self.policy_store.refresh()
+        cached = self._current_hashes
+        if cached is None or cached[0] != self.policy_store.version:
+            version = self.policy_store.version
+            cached = (version, {cell: cell_hash(p) for cell, p in policy_cells(self.policy_store).items()})
+            self._current_hashes = cached
+        return cached[1]
+
+    def stale_cells(self) -> List[Cell]:
+        """Cells that are missing or were generated from different pledges."""
+        hashes = self.current_hashes()
+        return [cell for cell, h in hashes.items() if self.cells.get(cell, {}).get("hash") != h]
+
+    def put(self, candidate: str, topic: str, summary: str, policy_ids: List[int]):
+        self.cells[(candidate, topic)] = {
+            "candidate": candidate,
+            "topic": topic,
+            "hash": self.current_hashes()[(candidate, topic)],
+            "summary": summary,
+            "policy_ids": policy_ids,
+        }
+
+    def prune(self):
+        """Drop cells that no longer exist in the policy data."""
+        hashes = self.current_hashes()
+        self.cells = {cell: entry for cell, entry in self.cells.items() if cell in hashes}
+
+    def save(self):
+        """Write the store atomically, with the overall data hash for reference."""
+        hashes = self.current_hashes()
+        data_hash = hashlib.sha256("".join(hashes[cell] for cell in sorted(hashes)).encode("utf-8")).hexdigest()
+        data = {
+            "prompt_version": SUMMARY_PROMPT_VERSION,
+            "data_hash": data_hash,
+            "cells": [self.cells[cell] for cell in sorted(self.cells)],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime_ns = self.path.stat().st_mtime_ns
+
+    def lookup(self, candidate: Optional[str], topic: Optional[str]) -> Optional[Tuple[str, List[Policy]]]:
+        """(answer, cited policies) for a candidate and/or topic selection.
+
+        A single cell is served as is; a candidate-only or topic-only selection
+        combines the matching cells under per-topic / per-candidate headings.
+        Returns None unless every matching cell has an up-to-date summary.
+        """
+        if not candidate and not topic:
+            return None
+        self._refresh()
+        hashes = self.current_hashes()
+        matching = sorted(
+            cell for cell in hashes
+            if (not candidate or cell[0] == candidate) and (not topic or cell[1] == topic)
+        )
+        if not matching:
+            return None
+        entries = []
+        for cell in matching:
+            entry = self.cells.get(cell)
+            if entry is None or entry.get("hash") != hashes[cell]:
+                return None
+            entries.append(entry)
+
+        if len(entries) == 1:
+            answer = entries[0]["summary"]
+        else:
+            heading = "topic" if candidate else "candidate"
+            answer = "\n\n".join(f"**{entry[heading]}**\n{entry['summary']}" for entry in entries)
+        policy_ids = [pid for entry in entries for pid in entry["policy_ids"]]
+        return answer, self.policy_store.get_many(policy_ids)
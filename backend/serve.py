@@ -0,0 +1,176 @@
+"""Pre-fork multi-worker server.
+
+    python -m backend.serve --workers 4 --port 8000
+
+The master process imports the app, loads the fork-safe components (policy
+data, FAISS index, PyTorch encoder) once, freezes the garbage collector and
+then forks the workers, so their memory is shared copy-on-write instead of
+being loaded once per worker as with ``uvicorn --workers``. All workers
+accept connections on one listening socket; the master restarts workers that
+die, forwards SIGINT/SIGTERM for a graceful shutdown and SIGHUP to reload the
+FAISS index snapshot.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+logger = logging.getLogger("backend.serve")
+
+# Workers that exit sooner than this after starting are restarted with a delay
+MIN_WORKER_UPTIME = 5.0
+
+
+def set_compute_threads(threads: int):
+    """Limit intra-op threads of the encoder and FAISS in this process."""
+    os.environ["ONNX_THREADS"] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        pass
+    else:
+        torch.set_num_threads(threads)
+    import faiss
+    faiss.omp_set_num_threads(threads)
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, threads: int, args: argparse.Namespace):
+    """Body of a forked worker: per-process setup, then one uvicorn server on the shared socket."""
+    import uvicorn
+    from .embedding_cache import get_embedding_cache
+    from .main import app
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    # The app reloads the index on SIGHUP once it has started
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    set_compute_threads(threads)
+    get_embedding_cache().reopen()
+    config = uvicorn.Config(
+        app,
+        log_level=os.getenv("LOG_LEVEL", "INFO").lower(),
+        timeout_keep_alive=args.keep_alive,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Forks ``workers`` processes sharing ``sock`` and keeps that many running."""
+
+    def __init__(self, sock: socket.socket, workers: int, threads: int, args: argparse.Namespace):
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.args = args
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.sock, self.threads, self.args)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def stop(self, signum, frame):
+        if not self.stopping:
+            logger.info("Shutting down %d workers", len(self.children))
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reload(self, signum, frame):
+        """Forward SIGHUP so every worker loads the published index snapshot."""
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGHUP, self.reload)
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning("Worker %d exited (status %d), restarting", pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(1.0)
+            if not self.stopping:
+                self.spawn()
+        self.sock.close()
+
+
+def main(argv: Optional[list] = None):
+    load_dotenv()
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Serve PolicyFinder with pre-forked workers sharing loaded models and indexes.")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(cpus))))
+    parser.add_argument(
+        "--threads-per-worker", type=int, default=int(os.getenv("WORKER_THREADS", "0")),
+        help="encoder/FAISS threads per worker (default: CPU count / workers)"
+    )
+    parser.add_argument("--keep-alive", type=int, default=5, help="HTTP keep-alive timeout in seconds")
+    args = parser.parse_args(argv)
+    threads = args.threads_per_worker or max(1, cpus // max(1, args.workers))
+
+    sock = _bind(args.host, args.port)
+    # Load single-threaded: OpenMP thread pools started before fork() are not
+    # usable in the children, and workers set their own thread counts
+    set_compute_threads(1)
+    from .main import components, fork_safe_components
+
+    names = fork_safe_components()
+    start = time.perf_counter()
+    components.preload(names)
+    logger.info(
+        "Preloaded %s in %.1fs; forking %d workers x %d threads on %s:%d",
+        ", ".join(names) or "nothing", time.perf_counter() - start, args.workers, threads, args.host, args.port
+    )
+    # Keep the shared objects out of later collections so the GC does not
+    # touch (and copy) their pages in every worker
+    gc.collect()
+    gc.freeze()
+    Master(sock, args.workers, threads, args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from dotenv import load_dotenv
+from backend.embedding_cache import EmbeddingCache
+from backend.policy_store import PolicyStore
+from backend.rag.evaluation import evaluate_rankings, latency_summary, load_evaluation_dataset
+
+load_dotenv()
+
+STAGES = ("encode", "search", "filter", "total")
+QUALITY_METRICS = ("precision@{k}", "recall@{k}", "hit@{k}", "mrr", "ndcg@{k}")
+
+
+class FaissBackend:
+    """FAISS retrieval exactly as PolicyRetriever runs it, with per-stage timing."""
+
+    name = "faiss"
+
+    def __init__(self, store: PolicyStore):
+        from backend.rag.embed import PolicyEmbedder
+        # A zero-size cache makes every query pay the encoder
+        self.embedder = PolicyEmbedder(cache=EmbeddingCache(max_size=0))
+        if not self.embedder.load_index():
+            raise RuntimeError("FAISS index not found; run script/embed_policies.py first")
+        self.store = store
+
+    def run(self, query: str, k: int, candidate_filter=None):
+        t0 = time.perf_counter()
+        vector = self.embedder.encode_query(query)
+        t1 = time.perf_counter()
+        allowed_ids = self.store.ids_for(candidate_filter)
+        t2 = time.perf_counter()
+        policy_ids, _ = self.embedder.search_vector_filtered(vector, k, allowed_ids)
+        t3 = time.perf_counter()
+        ranked = [p.id for p in self.store.get_many(policy_ids)]
+        t4 = time.perf_counter()
+        return ranked, {"encode": t1 - t0, "search": t3 - t2, "filter": (t2 - t1) + (t4 - t3)}
+
+
+class QdrantBackend:
+    """Qdrant retrieval against one named vector space ("ada" or "local")."""
+
+    def __init__(self, vector_space: str):
+        from qdrant_client import QdrantClient
+        self.name = f"qdrant_{vector_space}"
+        self.vector_space = vector_space
+        self.collection_name = "policy_collection"
+        self.client = QdrantClient(
+            host=os.getenv("QDRANT_HOST", "localhost"),
+            port=int(os.getenv("QDRANT_PORT", "6333"))
+        )
+        vectors = self.client.get_collection(self.collection_name).config.params.vectors
+        names = list(vectors.keys()) if isinstance(vectors, dict) else []
+        if vector_space == "local":
+            if "local" not in names:
+                raise RuntimeError("collection has no 'local' vectors")
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer("jhgan/ko-sroberta-multitask")
+            self.encode = lambda query: model.encode([query], convert_to_numpy=True)[0].tolist()
+        else:
+            if not os.getenv("OPENAI_API_KEY"):
+                raise RuntimeError("OPENAI_API_KEY is not set")
+            from openai import OpenAI
+            openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.encode = lambda query: openai_client.embeddings.create(
+                model="text-embedding-ada-002", input=query
+            ).data[0].embedding
+        self.vector_name = vector_space if vector_space in names else None
+
+    def run(self, query: str, k: int, candidate_filter=None):
+        from qdrant_client.http import models
+        t0 = time.perf_counter()
+        vector = self.encode(query)
+        t1 = time.perf_counter()
+        query_filter = None
+        if candidate_filter:
+            query_filter = models.Filter(must=[
+                models.FieldCondition(key="candidate", match=models.MatchValue(value=candidate_filter))
+            ])
+        query_vector = models.NamedVector(name=self.vector_name, vector=vector) if self.vector_name else vector
+        t2 = time.perf_counter()
+        results = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector,
+            query_filter=query_filter,
+            limit=k
+        )
+        t3 = time.perf_counter()
+        ranked = [int(r.payload.get("id", 0)) for r in results]
+        t4 = time.perf_counter()
+        return ranked, {"encode": t1 - t0, "search": t3 - t2, "filter": (t2 - t1) + (t4 - t3)}
+
+
+def candidate_filter_for(item: dict, store: PolicyStore):
+    """Candidate filter for --filtered runs: the relevant policies' candidate when it is unique."""
+    candidates = {p.candidate for p in store.get_many(item["relevant_ids"])}
+    return candidates.pop() if len(candidates) == 1 else None
+
+
+def benchmark_backend(backend, dataset: list, store: PolicyStore, k: int, repeat: int, filtered: bool) -> dict:
+    """Run every query ``repeat`` times and collect metrics and per-stage latencies."""
+    for item in dataset[:3]:
+        # Warm-up so model/index loading is not counted
+        backend.run(item["query"], k)
+
+    rankings = {}
+    timings = {stage: [] for stage in STAGES}
+    for _ in range(repeat):
+        for item in dataset:
+            candidate_filter = candidate_filter_for(item, store) if filtered else None
+            ranked, stage_times = backend.run(item["query"], k, candidate_filter)
+            rankings[item["query_id"]] = ranked
+            for stage, seconds in stage_times.items():
+                timings[stage].append(seconds * 1000.0)
+            timings["total"].append(sum(stage_times.values()) * 1000.0)
+
+    return {
+        "metrics": evaluate_rankings(dataset, rankings, k),
+        "latency_ms": {stage: latency_summary(values) for stage, values in timings.items()},
+        "rankings": rankings,
+    }
+
+
+def check_regressions(result: dict, baseline: dict, k: int, tolerance: float, latency_tolerance: float) -> list:
+    """Compare against a previous result file and describe every regression."""
+    problems = []
+    for name, current in result["backends"].items():
+        previous = baseline.get("backends", {}).get(name)
+        if previous is None:
+            continue
+        for metric in (m.format(k=k) for m in QUALITY_METRICS):
+            if current["metrics"][metric] < previous["metrics"][metric] - tolerance:
+                problems.append(
+                    f"{name} {metric}: {current['metrics'][metric]:.3f} < baseline {previous['metrics'][metric]:.3f}"
+                )
+        now_p95 = current["latency_ms"]["total"]["p95"]
+        was_p95 = previous["latency_ms"]["total"]["p95"]
+        if was_p95 and now_p95 > was_p95 * (1 + latency_tolerance):
+            problems.append(f"{name} total p95: {now_p95:.1f}ms > baseline {was_p95:.1f}ms")
+    return problems
+
+
+def make_backend(name: str, store: PolicyStore):
+    if name == "faiss":
+        return FaissBackend(store)
+    if name in ("qdrant_ada", "qdrant_local"):
+        return QdrantBackend(name.split("_", 1)[1])
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality and latency on the evaluation set (no LLM calls).")
+    parser.add_argument("--dataset", default="data/evaluation_dataset.json")
+    parser.add_argument("--backends", default="faiss,qdrant_local,qdrant_ada", help="comma-separated backends to run")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the dataset for latency percentiles")
+    parser.add_argument("--filtered", action="store_true", help="apply a candidate filter derived from the relevant policies")
+    parser.add_argument("--output", default="data/benchmark_result.json")
+    parser.add_argument("--baseline", help="previous result JSON to regression-check against")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="allowed absolute drop in quality metrics")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5, help="allowed relative increase in total p95 latency")
+    args = parser.parse_args()
+
+    dataset = load_evaluation_dataset(args.dataset)
+    store = PolicyStore("data/policy_data.json")
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "dataset": args.dataset,
+        "queries": len(dataset),
+        "k": args.k,
+        "repeat": args.repeat,
+        "filtered": args.filtered,
+        "backends": {},
+        "skipped": {},
+    }
+
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            backend = make_backend(name, store)
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+            result["skipped"][name] = str(e)
+            continue
+        result["backends"][name] = benchmark_backend(backend, dataset, store, args.k, args.repeat, args.filtered)
+
+    print(f"{'backend':<14} {'P@k':>6} {'R@k':>6} {'Hit@k':>6} {'MRR':>6} {'nDCG':>6} {'HN@k':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+    for name, data in result["backends"].items():
+        m = data["metrics"]
+        lat = data["latency_ms"]["total"]
+        print(
+            f"{name:<14} {m[f'precision@{args.k}']:6.3f} {m[f'recall@{args.k}']:6.3f} {m[f'hit@{args.k}']:6.3f} "
+            f"{m['mrr']:6.3f} {m[f'ndcg@{args.k}']:6.3f} {m[f'hard_negative@{args.k}']:6.3f} "
+            f"{lat['p50']:8.2f} {lat['p95']:8.2f} {lat['p99']:8.2f}"
+        )
+        print("    " + "  ".join(
+            f"{stage} p50={data['latency_ms'][stage]['p50']:.2f}ms" for stage in ("encode", "search", "filter")
+        ))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = check_regressions(result, baseline, args.k, args.tolerance, args.latency_tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import asyncio
+import argparse
+import functools
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from backend.llm_gateway import CircuitBreaker, LLMGateway
+from backend.policy_store import PolicyStore
+from backend.rag.batcher import bounded_as_completed
+from backend.rag.context import get_context_builder
+from backend.rag.summaries import SummaryStore, generate_cell_summary, policy_cells
+
+
+async def build(store: SummaryStore, cells, concurrency: int, deadline: float) -> int:
+    """Generate summaries for ``cells`` concurrently and return the number of failures."""
+    # Offline job: generous per-cell deadline, and no circuit breaker short-cuts
+    gateway = LLMGateway(deadline=deadline, max_retries=4, breaker=CircuitBreaker(failure_threshold=len(cells) + 1))
+    builder = get_context_builder()
+    policies = policy_cells(store.policy_store)
+    jobs = [
+        functools.partial(generate_cell_summary, gateway, builder, candidate, topic, policies[(candidate, topic)])
+        for candidate, topic in cells
+    ]
+    failures = 0
+    async for i, result, error in bounded_as_completed(jobs, concurrency):
+        candidate, topic = cells[i]
+        if error is not None:
+            failures += 1
+            print(f"  failed: {candidate} / {topic}: {error}")
+            continue
+        summary, policy_ids = result
+        store.put(candidate, topic, summary, policy_ids)
+        print(f"  {candidate} / {topic}: {len(policy_ids)} cited")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute a summary for every (candidate, topic) cell of the policy data.")
+    parser.add_argument("--data", default="data/policy_data.json")
+    parser.add_argument("--output", default="data/summaries.json")
+    parser.add_argument("--force", action="store_true", help="regenerate every cell, not only missing or changed ones")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent LLM calls")
+    parser.add_argument("--deadline", type=float, default=120.0, help="seconds per cell, including retries")
+    parser.add_argument("--dry-run", action="store_true", help="only list the cells that would be regenerated")
+    args = parser.parse_args()
+    load_dotenv()
+
+    store = SummaryStore(PolicyStore(args.data), path=args.output)
+    store.prune()
+    cells = sorted(store.current_hashes()) if args.force else sorted(store.stale_cells())
+    print(f"{len(cells)} of {len(store.current_hashes())} cells to generate")
+    if args.dry_run:
+        for candidate, topic in cells:
+            print(f"  {candidate} / {topic}")
+        return
+
+    failures = asyncio.run(build(store, cells, args.concurrency, args.deadline)) if cells else 0
+    store.save()
+    print(f"Summaries written to {args.output}" + (f" ({failures} failed, re-run to retry)" if failures else ""))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,94 @@
 import sys
+import argparse
+import numpy as np
 from pathlib import Path
-import json
 
 # Add backend directory to Python path
 backend_dir = Path(__file__).parent.parent
 sys.path.append(str(backend_dir))
 
 from backend.rag.embed import PolicyEmbedder
-from backend.models.schema import Policy
+from backend.rag.embedding_store import EmbeddingStore, content_hash
+from backend.rag.evaluation import load_evaluation_dataset
+from backend.rag.index_factory import INDEX_TYPES, default_index_config, tune_index_config
+from backend.policy_store import PolicyStore
+
+
+def tune(embedder: PolicyEmbedder, policies, store: EmbeddingStore, target_recall, dataset_path: str):
+    """Sweep index configurations on the evaluation set and return the chosen one."""
+    dataset = load_evaluation_dataset(dataset_path)
+    vectors = store.get_many([content_hash(p) for p in policies])
+    ids = np.asarray([p.id for p in policies], dtype=np.int64)
+    query_vectors = embedder.encode_queries([item["query"] for item in dataset])
+    config, report = tune_index_config(
+        vectors, ids, query_vectors, [item["relevant_ids"] for item in dataset], target_recall=target_recall
+    )
+
+    print(f"{'type':<10} {'params':<48} {'R@5':>6} {'ms/query':>9}")
+    for row in report:
+        params = ", ".join(f"{k}={v}" for k, v in row["config"]["params"].items())
+        print(f"{row['config']['type']:<10} {params:<48} {row['recall']:6.3f} {row['latency_ms']:9.4f}")
+    tuning = config["tuning"]
+    print(
+        f"Selected {config['type']} (recall@5 {tuning['recall']:.3f} >= target {tuning['target_recall']:.3f}, "
+        f"{tuning['latency_ms']:.4f} ms/query)"
+    )
+    return config
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Create or incrementally update the FAISS policy index.")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from scratch, re-encoding every policy")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="FAISS index type (default: FAISS_INDEX_TYPE or the saved index's type)")
+    parser.add_argument("--tune", action="store_true", help="pick the fastest index configuration meeting --target-recall on the evaluation set")
+    parser.add_argument("--target-recall", type=float, help="Recall@5 required by --tune (default: exact search recall minus 2%%)")
+    parser.add_argument("--dataset", default="data/evaluation_dataset.json")
+    parser.add_argument("--keep-snapshots", type=int, default=3, help="index snapshots to keep under data/snapshots/")
+    parser.add_argument("--remove-legacy", action="store_true", help="delete the pre-snapshot index files under data/ (once no server reads them)")
+    args = parser.parse_args()
+
     # Load policy data
-    with open("data/policy_data.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-        policies = [Policy(**p) for p in data]
+    policy_store = PolicyStore("data/policy_data.json")
+    policies = policy_store.policies
     
-    # Create embeddings
+    # Load the existing index and per-policy embedding store
     embedder = PolicyEmbedder()
-    embeddings = embedder.create_embeddings(policies)
+    embedder.load_index(mmap=False)
+    store = EmbeddingStore()
     
-    # Build and save index
-    embedder.build_index(policies, embeddings)
-    embedder.save_index()
+    # Changing the index type always needs a full rebuild
+    rebuild = args.rebuild
+    if args.index_type and args.index_type != embedder.index_config["type"]:
+        embedder.index_config = default_index_config(args.index_type)
+        rebuild = True
+
+    # Re-encode only added/changed policies and apply the diff to the index
+    stats = embedder.update_index(policies, store, rebuild=rebuild)
+    if args.tune:
+        embedder.build_index(policies, store.get_many([content_hash(p) for p in policies]),
+                             config=tune(embedder, policies, store, args.target_recall, args.dataset))
+        stats["rebuilt"] = 1
+    # Published as a new snapshot; running servers switch to it without a restart
+    snapshot = embedder.save_index(keep_snapshots=args.keep_snapshots)
+    store.save()
+    # Binary policy table so servers start without parsing/validating the JSON
+    policy_store.save_snapshot()
     
-    print("Embeddings created and saved successfully!")
+    print(
+        f"Index updated: {stats['encoded']} encoded, {stats['added']} added/changed, "
+        f"{stats['removed']} removed" + (" (full rebuild)" if stats["rebuilt"] else "")
+        + f", index type {embedder.index_config['type']}, snapshot {snapshot}"
+    )
+    legacy = embedder.legacy_index_files()
+    if legacy and args.remove_legacy:
+        for path in legacy:
+            path.unlink()
+        print(f"Removed legacy index files: {', '.join(p.name for p in legacy)}")
+    elif legacy:
+        print(
+            f"Legacy index files are still in {embedder.data_dir}/ ({', '.join(p.name for p in legacy)}); "
+            "rerun with --remove-legacy once no server started before snapshots is running"
+        )
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from backend.rag.embed import PolicyEmbedder
+from backend.rag.evaluation import evaluate_rankings, latency_summary, load_evaluation_dataset
+from backend.rag.onnx_encoder import DEFAULT_ONNX_MODEL_DIR, ONNX_MODEL_FILE
+
+
+def export(model_name: str, output_dir: Path, opset: int):
+    """Export the transformer to ONNX and quantize its weights to int8 (dynamic quantization)."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.config.return_dict = False
+    model.eval()
+
+    sample = tokenizer(["청년 주거 지원 공약"], return_tensors="pt")
+    fp32_path = output_dir / "model.fp32.onnx"
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "last_hidden_state": dynamic},
+            opset_version=opset
+        )
+    quantize_dynamic(str(fp32_path), str(output_dir / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    tokenizer.save_pretrained(str(output_dir))
+
+
+def evaluate(embedder: PolicyEmbedder, dataset: list, k: int) -> dict:
+    """Recall and per-query encode latency of ``embedder``'s query encoder on the FAISS index."""
+    queries = [item["query"] for item in dataset]
+    embedder.warm_up_encoder()
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        embedder.query_encoder.encode([query], convert_to_numpy=True)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    vectors = embedder.query_encoder.encode(queries, convert_to_numpy=True)
+    rankings = {
+        item["query_id"]: ranked
+        for item, ranked in zip(dataset, embedder.search_vectors(vectors, k))
+    }
+    return {"metrics": evaluate_rankings(dataset, rankings, k), "latency_ms": latency_summary(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the query encoder to int8 ONNX and check retrieval quality.")
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask")
+    parser.add_argument("--output", default=DEFAULT_ONNX_MODEL_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--dataset", default="data/evaluation_dataset.json")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.02, help="allowed absolute Recall@k drop versus PyTorch")
+    parser.add_argument("--skip-export", action="store_true", help="only re-run the quality check")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output)
+    if not args.skip_export:
+        export(args.model, output_dir, args.opset)
+        print(f"Quantized ONNX encoder written to {output_dir}")
+
+    dataset = load_evaluation_dataset(args.dataset)
+    # The ONNX backend loads its model from ONNX_MODEL_DIR
+    os.environ["ONNX_MODEL_DIR"] = str(output_dir)
+    results = {}
+    for backend in ("torch", "onnx"):
+        embedder = PolicyEmbedder(args.model, encoder_backend=backend)
+        if not embedder.load_index():
+            raise RuntimeError("FAISS index not found; run script/embed_policies.py first")
+        results[backend] = evaluate(embedder, dataset, args.k)
+
+    recall = f"recall@{args.k}"
+    for backend, result in results.items():
+        lat = result["latency_ms"]
+        print(
+            f"{backend:<6} {recall}={result['metrics'][recall]:.3f} mrr={result['metrics']['mrr']:.3f} "
+            f"encode p50={lat['p50']:.2f}ms p95={lat['p95']:.2f}ms"
+        )
+
+    drop = results["torch"]["metrics"][recall] - results["onnx"]["metrics"][recall]
+    if drop > args.tolerance:
+        print(f"FAIL: ONNX {recall} is {drop:.3f} below PyTorch (tolerance {args.tolerance})")
+        sys.exit(1)
+    print(f"OK: {recall} drop {drop:.3f} within tolerance {args.tolerance}. Set ENCODER_BACKEND=onnx to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import re
+import sys
+import math
+import json
+import time
+import random
+import asyncio
+import hashlib
+import functools
+import argparse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Local OpenAI-compatible server for testing timeouts, retries, hedging and the
+# extractive fallback, and for load tests (script/load_test.py), without calling
+# the real API. Point the app at it with
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test
+# Answers cite the first policy IDs found in the prompt. Embeddings are hashed
+# character bigrams on top of a direction shared by all texts, so unrelated
+# texts score around 0.7 as with ada-002 and texts sharing words score higher.
+
+CONFIG = {
+    "latency": 0.3,       # seconds before the first completion token
+    "jitter": 0.1,        # extra uniform random latency
+    "token_delay": 0.02,  # seconds per completion token (streamed or not)
+    "completion_tokens": 40,
+    "embedding_latency": 0.05,
+    "error_rate": 0.0,    # fraction of requests answered with HTTP 500
+    "hang_rate": 0.0,     # fraction of requests that stall for --hang-seconds
+    "hang_seconds": 60.0,
+    "embedding_dim": 1536,
+}
+
+app = FastAPI(title="Fake OpenAI")
+
+
+async def _delay_or_fail(latency: float):
+    """Wait ``latency`` (plus jitter); return an error response for injected failures."""
+    if random.random() < CONFIG["error_rate"]:
+        return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+    if random.random() < CONFIG["hang_rate"]:
+        await asyncio.sleep(CONFIG["hang_seconds"])
+    await asyncio.sleep(latency + random.uniform(0, CONFIG["jitter"]))
+    return None
+
+
+def _answer(messages, max_tokens: int) -> str:
+    ids = re.findall(r"\[공약 ID: (\d+)\]", messages[-1]["content"] if messages else "")[:2]
+    words = ["검색된", "공약에", "따르면", "다음과", "같습니다."] + [f"[공약: {i}]" for i in ids]
+    length = min(CONFIG["completion_tokens"], max_tokens)
+    while len(words) < length:
+        words.append("내용입니다.")
+    return " ".join(words)
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "fake"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    error = await _delay_or_fail(CONFIG["latency"])
+    if error is not None:
+        return error
+    text = _answer(body.get("messages", []), body.get("max_tokens") or CONFIG["completion_tokens"])
+    created = int(time.time())
+    if body.get("stream"):
+        async def events():
+            for word in text.split(" "):
+                chunk = {
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(CONFIG["token_delay"])
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+    await asyncio.sleep(CONFIG["token_delay"] * len(text.split(" ")))
+    prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 2
+    return {
+        "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 2,
+                  "total_tokens": prompt_tokens + len(text) // 2},
+    }
+
+
+def _unit(vector: list) -> list:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_direction(dim: int) -> tuple:
+    rng = random.Random(0)
+    return tuple(_unit([rng.gauss(0, 1) for _ in range(dim)]))
+
+
+def _embed(text: str) -> list:
+    dim = CONFIG["embedding_dim"]
+    vector = [0.0] * dim
+    text = re.sub(r"\s+", " ", text.strip())
+    for a, b in zip(text, text[1:]):
+        digest = hashlib.md5(f"{a}{b}".encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dim] += 1.0 if digest[4] & 1 else -1.0
+    # 0.85^2 ~ 0.72: cosine similarity of texts without common bigrams
+    return _unit([0.85 * c + 0.53 * x for c, x in zip(_shared_direction(dim), _unit(vector))])
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    error = await _delay_or_fail(CONFIG["embedding_latency"])
+    if error is not None:
+        return error
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    data = [{"object": "embedding", "index": i, "embedding": _embed(str(text))} for i, text in enumerate(inputs)]
+    return {"object": "list", "data": data, "model": body.get("model"),
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server for local testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=CONFIG["latency"])
+    parser.add_argument("--jitter", type=float, default=CONFIG["jitter"])
+    parser.add_argument("--token-delay", type=float, default=CONFIG["token_delay"], help="seconds per completion token")
+    parser.add_argument("--completion-tokens", type=int, default=CONFIG["completion_tokens"], help="answer length (capped by max_tokens)")
+    parser.add_argument("--embedding-latency", type=float, default=CONFIG["embedding_latency"])
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"])
+    parser.add_argument("--hang-rate", type=float, default=CONFIG["hang_rate"])
+    parser.add_argument("--hang-seconds", type=float, default=CONFIG["hang_seconds"])
+    parser.add_argument("--embedding-dim", type=int, default=CONFIG["embedding_dim"])
+    args = parser.parse_args()
+    for key in CONFIG:
+        CONFIG[key] = getattr(args, key)
+
+    import uvicorn
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1", file=sys.stderr)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
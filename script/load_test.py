@@ -0,0 +1,376 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+# Add backend directory to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.append(str(backend_dir))
+
+from backend.policy_store import PolicyStore
+from backend.rag.evaluation import latency_summary, load_evaluation_dataset
+
+# Request mix names (as in benchmark_retrieval.py) -> (search_engine, vector_space)
+BACKENDS = {
+    "faiss": ("faiss", None),
+    "qdrant_local": ("qdrant", "local"),
+    "qdrant_ada": ("qdrant", "ada"),
+}
+LAG_METRIC = "policyfinder_event_loop_lag_seconds"
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    """"faiss=2,qdrant_local=1" -> normalized weights."""
+    weights = {}
+    for part in raw.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown backend in --mix: {name} (choose from {', '.join(BACKENDS)})")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items() if weight > 0}
+
+
+class RequestMix:
+    """Random /ask payloads from the evaluation queries in the configured backend and filter mix."""
+
+    def __init__(self, dataset: list, store: PolicyStore, mix: Dict[str, float], filtered: float, seed: int):
+        self.dataset = dataset
+        self.store = store
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.filtered = filtered
+        self.rng = random.Random(seed)
+
+    def _filters(self, item: dict) -> Dict[str, str]:
+        # Filters derived from the relevant policies so filtered queries still have answers
+        relevant = self.store.get_many(item["relevant_ids"]) or self.store.policies[:1]
+        policy = self.rng.choice(relevant)
+        filters = {"candidate_filter": policy.candidate}
+        if self.rng.random() < 0.5:
+            filters["topic_filter"] = policy.topic
+        return filters
+
+    def next(self) -> Tuple[str, dict]:
+        """(label, payload) of the next request."""
+        name = self.rng.choices(self.names, self.weights)[0]
+        engine, vector_space = BACKENDS[name]
+        item = self.rng.choice(self.dataset)
+        payload = {"question": item["query"], "search_engine": engine}
+        if vector_space:
+            payload["vector_space"] = vector_space
+        filtered = self.rng.random() < self.filtered
+        if filtered:
+            payload.update(self._filters(item))
+        return f"{name}/{'filtered' if filtered else 'unfiltered'}", payload
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_process(cmd: List[str], env: Dict[str, str], log_path: Path) -> subprocess.Popen:
+    log = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(cmd, cwd=backend_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(proc: Optional[subprocess.Popen]):
+    if proc is None or proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def wait_for(url: str, proc: Optional[subprocess.Popen], timeout: float, log_path: Optional[Path] = None):
+    """Poll ``url`` until it answers 200; fail early if ``proc`` exits."""
+    deadline = time.monotonic() + timeout
+    last = ""
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            break
+        try:
+            response = httpx.get(url, timeout=2.0)
+            if response.status_code == 200:
+                return
+            last = response.text
+        except httpx.HTTPError as e:
+            last = str(e)
+        time.sleep(0.5)
+    tail = log_path.read_text(encoding="utf-8")[-2000:] if log_path and log_path.exists() else ""
+    raise RuntimeError(f"{url} not ready: {last}\n{tail}")
+
+
+def prepare_qdrant(path: Path, env: Dict[str, str], local_vectors: bool, workdir: Path):
+    """Fill an embedded Qdrant at ``path`` with the policy data (OpenAI embeddings from the fake server)."""
+    cmd = [
+        sys.executable, "script/upload_to_qdrant.py", "--fresh",
+        "--checkpoint", str(workdir / "qdrant_upload_checkpoint.json"),
+    ]
+    if not local_vectors:
+        cmd.append("--no-local-vectors")
+    result = subprocess.run(cmd, cwd=backend_dir, env={**env, "QDRANT_PATH": str(path)}, capture_output=True, text=True)
+    if "데이터 업로드가 완료되었습니다." not in result.stdout:
+        raise RuntimeError(f"Embedded Qdrant upload failed:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+
+
+def scrape_lag(url: str) -> Optional[Dict]:
+    """Event loop lag histogram (cumulative buckets, sum, count) from /metrics."""
+    try:
+        text = httpx.get(f"{url}/metrics", timeout=10.0).text
+    except httpx.HTTPError:
+        return None
+    buckets: Dict[float, float] = {}
+    values = {"sum": 0.0, "count": 0.0}
+    for line in text.splitlines():
+        if not line.startswith(LAG_METRIC):
+            continue
+        name, value = line.rsplit(" ", 1)
+        if name.startswith(f"{LAG_METRIC}_bucket"):
+            le = name.split('le="', 1)[1].split('"', 1)[0]
+            buckets[float("inf") if le == "+Inf" else float(le)] = float(value)
+        elif name == f"{LAG_METRIC}_sum":
+            values["sum"] = float(value)
+        elif name == f"{LAG_METRIC}_count":
+            values["count"] = float(value)
+    if not buckets:
+        return None
+    return {"buckets": buckets, **values}
+
+
+def lag_delta(before: Optional[Dict], after: Optional[Dict], duration: float) -> Optional[Dict]:
+    """Stall time and lag percentiles (bucket upper bounds) accumulated during the run."""
+    if before is None or after is None:
+        return None
+    count = after["count"] - before["count"]
+    if count <= 0:
+        return None
+    stall = after["sum"] - before["sum"]
+
+    def bound(q: float) -> float:
+        for le in sorted(after["buckets"]):
+            if after["buckets"][le] - before["buckets"].get(le, 0.0) >= q * count:
+                return le * 1000.0
+        return float("inf")
+
+    return {
+        "samples": int(count),
+        "stall_seconds": stall,
+        "stall_fraction": stall / duration if duration else 0.0,
+        "mean_ms": stall / count * 1000.0,
+        "p50_ms_le": bound(0.50),
+        "p99_ms_le": bound(0.99),
+        "max_ms_le": bound(1.0),
+    }
+
+
+async def send(client: httpx.AsyncClient, label: str, payload: dict, started: float, records: List[dict]):
+    record = {"label": label, "ok": False, "fallback": False}
+    try:
+        response = await client.post("/ask", json=payload)
+        record["status"] = response.status_code
+        if response.status_code == 200:
+            record["ok"] = True
+            record["fallback"] = bool(response.json().get("fallback"))
+    except httpx.HTTPError as e:
+        record["status"] = type(e).__name__
+    record["latency"] = time.perf_counter() - started
+    records.append(record)
+
+
+async def run_load(url: str, mix: RequestMix, duration: float, concurrency: int, rate: Optional[float], timeout: float) -> List[dict]:
+    """Closed loop (``concurrency`` clients back to back) or open loop at ``rate`` requests/s.
+
+    In the open loop, latency is measured from each request's scheduled start,
+    so queueing behind a saturated server is not hidden.
+    """
+    records: List[dict] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        end = time.perf_counter() + duration
+        if rate is None:
+            async def user():
+                while time.perf_counter() < end:
+                    label, payload = mix.next()
+                    await send(client, label, payload, time.perf_counter(), records)
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+        else:
+            tasks = []
+            scheduled = time.perf_counter()
+            while scheduled < end:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                label, payload = mix.next()
+                tasks.append(asyncio.create_task(send(client, label, payload, scheduled, records)))
+                scheduled += mix.rng.expovariate(rate)
+            await asyncio.gather(*tasks)
+    return records
+
+
+def summarize(records: List[dict], duration: float) -> Dict:
+    def stats(rows: List[dict]) -> Dict:
+        ok = [r for r in rows if r["ok"]]
+        return {
+            "requests": len(rows),
+            "throughput_rps": len(rows) / duration if duration else 0.0,
+            "error_rate": (len(rows) - len(ok)) / len(rows) if rows else 0.0,
+            "fallback_rate": sum(r["fallback"] for r in ok) / len(rows) if rows else 0.0,
+            "latency_ms": latency_summary([r["latency"] * 1000.0 for r in ok]),
+        }
+
+    labels = sorted({r["label"] for r in records})
+    errors: Dict[str, int] = {}
+    for r in records:
+        if not r["ok"]:
+            errors[str(r["status"])] = errors.get(str(r["status"]), 0) + 1
+    return {
+        "overall": stats(records),
+        "by_request_type": {label: stats([r for r in records if r["label"] == label]) for label in labels},
+        "errors": errors,
+    }
+
+
+def print_report(summary: Dict, lag: Optional[Dict], workers: int):
+    print(f"{'request type':<26} {'n':>6} {'rps':>8} {'err%':>6} {'fb%':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+    rows = list(summary["by_request_type"].items()) + [("overall", summary["overall"])]
+    for label, s in rows:
+        lat = s["latency_ms"]
+        print(
+            f"{label:<26} {s['requests']:6d} {s['throughput_rps']:8.1f} {s['error_rate'] * 100:6.2f} "
+            f"{s['fallback_rate'] * 100:6.2f} {lat['p50']:8.1f} {lat['p95']:8.1f} {lat['p99']:8.1f}"
+        )
+    if summary["errors"]:
+        print("errors: " + ", ".join(f"{status} x{n}" for status, n in sorted(summary["errors"].items())))
+    if lag is None:
+        print("event loop lag: not available (server without policyfinder_event_loop_lag_seconds)")
+    else:
+        scope = " (one worker's /metrics)" if workers > 1 else ""
+        print(
+            f"event loop lag{scope}: stalled {lag['stall_seconds']:.2f}s ({lag['stall_fraction'] * 100:.1f}% of the run), "
+            f"mean {lag['mean_ms']:.2f}ms, p50 <= {lag['p50_ms_le']:g}ms, p99 <= {lag['p99_ms_le']:g}ms, "
+            f"max <= {lag['max_ms_le']:g}ms over {lag['samples']} samples"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test /ask against local stand-ins: a fake OpenAI server and an embedded Qdrant."
+    )
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--mix", default="faiss=1", help=f"weighted backends, e.g. faiss=2,qdrant_local=1 ({', '.join(BACKENDS)})")
+    parser.add_argument("--filtered", type=float, default=0.3, help="fraction of requests with a candidate (and topic) filter")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients (max in-flight requests with --rate)")
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate in requests/s instead of closed-loop clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds of load before the run")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes (python -m backend.serve)")
+    parser.add_argument("--cache", action="store_true", help="keep the answer/embedding caches on (off by default so every request does the full work)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake OpenAI seconds to the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="fake OpenAI seconds per completion token")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="fake OpenAI answer length")
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="fake OpenAI embeddings latency")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of fake OpenAI calls failing with 500")
+    parser.add_argument("--qdrant-host", help="use this Qdrant server (collection already uploaded) instead of an embedded one")
+    parser.add_argument("--dataset", default="data/evaluation_dataset.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="data/load_test_result.json")
+    args = parser.parse_args()
+
+    mix_weights = parse_mix(args.mix)
+    engines = sorted({BACKENDS[name][0] for name in mix_weights})
+    dataset = load_evaluation_dataset(args.dataset)
+    store = PolicyStore("data/policy_data.json")
+    mix = RequestMix(dataset, store, mix_weights, args.filtered, args.seed)
+    if args.url is None and "qdrant" in engines and not args.qdrant_host and args.workers > 1:
+        parser.error("the embedded Qdrant can only be opened by one process; use --workers 1 or --qdrant-host")
+
+    workdir = Path(tempfile.mkdtemp(prefix="policyfinder-loadtest-"))
+    fake, server = None, None
+    try:
+        url = args.url
+        if url is not None:
+            wait_for(f"{url}/readyz", None, 30)
+        else:
+            fake_port, port = free_port(), free_port()
+            env = {
+                **os.environ,
+                "OPENAI_API_KEY": "load-test",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+                "ENABLED_ENGINES": ",".join(engines),
+                "PRECOMPUTED_SUMMARIES": "0",
+                "LOG_LEVEL": "WARNING",
+            }
+            if not args.cache:
+                env.update({"ANSWER_CACHE_SIZE": "0", "EMBEDDING_CACHE_SIZE": "0", "EMBEDDING_CACHE_PATH": ""})
+            print(f"Starting fake OpenAI server on port {fake_port}")
+            fake = start_process([
+                sys.executable, "script/fake_openai_server.py", "--port", str(fake_port),
+                "--latency", str(args.llm_latency), "--jitter", "0",
+                "--token-delay", str(args.token_delay), "--completion-tokens", str(args.completion_tokens),
+                "--embedding-latency", str(args.embedding_latency), "--error-rate", str(args.llm_error_rate),
+            ], env, workdir / "fake_openai.log")
+            wait_for(f"http://127.0.0.1:{fake_port}/v1/models", fake, 30, workdir / "fake_openai.log")
+
+            if "qdrant" in engines:
+                if args.qdrant_host:
+                    env["QDRANT_HOST"] = args.qdrant_host
+                else:
+                    print("Uploading the policy data to an embedded Qdrant")
+                    prepare_qdrant(workdir / "qdrant", env, "qdrant_local" in mix_weights, workdir)
+                    env["QDRANT_PATH"] = str(workdir / "qdrant")
+
+            print(f"Starting server on port {port} with {args.workers} worker(s), engines {','.join(engines)}")
+            server = start_process([
+                sys.executable, "-m", "backend.serve", "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(args.workers),
+            ], env, workdir / "server.log")
+            url = f"http://127.0.0.1:{port}"
+            wait_for(f"{url}/readyz", server, 300, workdir / "server.log")
+
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:g}s")
+            asyncio.run(run_load(url, mix, args.warmup, args.concurrency, args.rate, args.timeout))
+        mode = f"{args.rate:g} req/s open loop" if args.rate else f"{args.concurrency} closed-loop clients"
+        print(f"Running {args.duration:g}s with {mode}, mix {args.mix}, {args.filtered:.0%} filtered")
+        before = scrape_lag(url)
+        start = time.perf_counter()
+        records = asyncio.run(run_load(url, mix, args.duration, args.concurrency, args.rate, args.timeout))
+        elapsed = time.perf_counter() - start
+        lag = lag_delta(before, scrape_lag(url), elapsed)
+    finally:
+        stop_process(server)
+        stop_process(fake)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarize(records, elapsed)
+    print_report(summary, lag, args.workers)
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "duration_seconds": elapsed,
+        **summary,
+        "event_loop_lag": lag,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,106 +1,334 @@
 import os
 import json
+import time
+import random
+import hashlib
+import sys
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from openai import OpenAI
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
+# Add backend directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
 # 환경 변수 로드
 load_dotenv()
 
+# 검색은 항상 이 alias를 통해 최신 컬렉션을 조회합니다.
+COLLECTION_ALIAS = "policy_collection"
+CHECKPOINT_PATH = Path("data/qdrant_upload_checkpoint.json")
+EMBEDDING_MODEL = "text-embedding-ada-002"
+LOCAL_MODEL = "jhgan/ko-sroberta-multitask"
+# named vector 이름 (backend/qdrant_rag/qdrant_rag_pipeline.py와 동일)
+ADA_VECTOR = "ada"
+LOCAL_VECTOR = "local"
+EMBEDDING_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 128
+MAX_RETRIES = 5
+
 def load_policy_data():
     """정책 데이터를 로드합니다."""
     with open('data/policy_data.json', 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def create_qdrant_collection():
-    """Qdrant 컬렉션을 생성합니다."""
-    client = QdrantClient("localhost", port=6333)
-    
-    try:
-        # 기존 컬렉션 삭제
-        client.delete_collection(collection_name="policy_collection")
-        print("기존 컬렉션이 삭제되었습니다.")
-    except Exception as e:
-        print(f"컬렉션 삭제 중 오류 (무시됨): {str(e)}")
-    
-    # 새 컬렉션 생성
-    client.create_collection(
-        collection_name="policy_collection",
-        vectors_config=models.VectorParams(
+def policy_data_hash(policies: list) -> str:
+    """정책 데이터의 해시 (체크포인트가 같은 데이터에 대한 것인지 확인용)."""
+    raw = json.dumps(policies, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+def get_qdrant_client() -> QdrantClient:
+    """Qdrant 클라이언트를 생성합니다. (QDRANT_PATH가 있으면 해당 디렉터리의 임베디드 Qdrant)"""
+    if os.getenv("QDRANT_PATH"):
+        return QdrantClient(path=os.getenv("QDRANT_PATH"))
+    return QdrantClient(
+        host=os.getenv("QDRANT_HOST", "localhost"),
+        port=int(os.getenv("QDRANT_PORT", "6333"))
+    )
+
+def with_retry(func, *args, retries: int = MAX_RETRIES, base_delay: float = 1.0, **kwargs):
+    """지수 백오프 + 지터로 재시도합니다."""
+    for attempt in range(retries):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            delay = base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"재시도 {attempt + 1}/{retries - 1} ({delay:.1f}s 후): {str(e)}")
+            time.sleep(delay)
+
+def collection_exists(client: QdrantClient, name: str) -> bool:
+    """컬렉션 존재 여부를 확인합니다."""
+    return any(c.name == name for c in client.get_collections().collections)
+
+def get_alias_target(client: QdrantClient, alias: str):
+    """alias가 가리키는 컬렉션 이름을 반환합니다. (없으면 None)"""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+def create_qdrant_collection(client: QdrantClient, collection_name: str, local_dim: int = None):
+    """새 Qdrant 컬렉션을 생성합니다. (기존 컬렉션은 건드리지 않음)"""
+    vectors_config = {
+        ADA_VECTOR: models.VectorParams(
             size=1536,  # OpenAI embeddings 크기
             distance=models.Distance.COSINE
         )
+    }
+    if local_dim:
+        # 로컬 인코더 벡터 (쿼리 시 OpenAI 호출 없이 검색 가능)
+        vectors_config[LOCAL_VECTOR] = models.VectorParams(
+            size=local_dim,
+            distance=models.Distance.COSINE
+        )
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vectors_config
     )
-    print("새 컬렉션이 생성되었습니다.")
+    # 후보/주제 필터와 facet 집계용 payload 인덱스
+    for field in ("candidate", "topic"):
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=models.PayloadSchemaType.KEYWORD
+        )
+    print(f"새 컬렉션이 생성되었습니다: {collection_name}")
 
-def get_embedding(text: str, client: OpenAI) -> list:
-    """OpenAI API를 사용하여 텍스트의 임베딩을 생성합니다."""
-    try:
-        response = client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
+def get_embeddings(texts: list, client: OpenAI) -> list:
+    """OpenAI API로 여러 텍스트의 임베딩을 한 번에 생성합니다."""
+    response = client.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts
+    )
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def create_local_embeddings(policies: list) -> dict:
+    """로컬 인코더 벡터를 생성합니다. (embed_policies.py의 임베딩 저장소를 재사용)"""
+    from sentence_transformers import SentenceTransformer
+    from backend.models.schema import Policy
+    from backend.rag.embedding_store import EmbeddingStore, content_hash, embedding_text
+
+    # 다른 모델로 만든 벡터가 저장되어 있으면 버리고 다시 생성합니다
+    store = EmbeddingStore(model=LOCAL_MODEL)
+    items = [Policy(**p) for p in policies]
+    missing = [p for p in items if content_hash(p) not in store]
+    if missing:
+        model = SentenceTransformer(LOCAL_MODEL)
+        store.use_encoder(LOCAL_MODEL, model.get_sentence_embedding_dimension())
+        missing = [p for p in items if content_hash(p) not in store]
+        vectors = model.encode([embedding_text(p) for p in missing], convert_to_numpy=True)
+        for p, vector in zip(missing, vectors):
+            store.put(content_hash(p), vector)
+        store.save()
+    print(f"로컬 임베딩: {len(items) - len(missing)}개 재사용, {len(missing)}개 생성")
+    return {p.id: store.get(content_hash(p)).tolist() for p in items}
+
+def build_points(policies: list, embeddings: list, local_embeddings: dict = None) -> list:
+    """정책과 임베딩으로 Qdrant 포인트를 만듭니다."""
+    def vectors(policy, embedding):
+        named = {ADA_VECTOR: embedding}
+        if local_embeddings:
+            named[LOCAL_VECTOR] = local_embeddings[policy["id"]]
+        return named
+
+    return [
+        models.PointStruct(
+            id=policy["id"],
+            vector=vectors(policy, embedding),
+            payload={
+                "id": str(policy["id"]),
+                "candidate": policy["candidate"],
+                "topic": policy["topic"],
+                "source": policy["source"],
+                "pledge": policy["text"]
+            }
         )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"임베딩 생성 오류: {str(e)}")
+        for policy, embedding in zip(policies, embeddings)
+    ]
+
+def process_batch(
+    policies: list,
+    collection_name: str,
+    openai_client: OpenAI,
+    qdrant_client: QdrantClient,
+    local_embeddings: dict = None
+) -> list:
+    """한 배치를 임베딩하고 업로드한 뒤 완료된 정책 ID를 반환합니다."""
+    embeddings = with_retry(get_embeddings, [p["text"] for p in policies], openai_client)
+    points = build_points(policies, embeddings, local_embeddings)
+    for start in range(0, len(points), UPSERT_BATCH_SIZE):
+        with_retry(
+            qdrant_client.upsert,
+            collection_name=collection_name,
+            points=points[start:start + UPSERT_BATCH_SIZE],
+            wait=True
+        )
+    return [p["id"] for p in policies]
+
+def load_checkpoint(data_hash: str, client: QdrantClient, local_vectors: bool):
+    """같은 데이터/벡터 구성에 대한 체크포인트가 있고 컬렉션이 남아 있으면 반환합니다."""
+    if not CHECKPOINT_PATH.exists():
+        return None
+    with open(CHECKPOINT_PATH, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("data_hash") != data_hash or checkpoint.get("local_vectors", False) != local_vectors:
         return None
+    if not collection_exists(client, checkpoint["collection"]):
+        return None
+    return checkpoint
+
+def save_checkpoint(checkpoint: dict):
+    """체크포인트를 원자적으로 저장합니다."""
+    tmp_path = CHECKPOINT_PATH.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+def create_alias(client: QdrantClient, collection_name: str, operations: list = None, retries: int = 3):
+    """alias 변경(이전 alias 삭제 + 새 alias 생성)을 한 번에 적용하고, alias가 새 컬렉션을 가리키는지 확인합니다.
+
+    실패하면 잠시 후 다시 시도하고, 끝내 실패하면 RuntimeError를 발생시킵니다.
+    """
+    operations = (operations or []) + [models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=COLLECTION_ALIAS)
+    )]
+    error = None
+    for attempt in range(retries):
+        try:
+            client.update_collection_aliases(change_aliases_operations=operations)
+        except Exception as e:
+            error = e
+        if get_alias_target(client, COLLECTION_ALIAS) == collection_name:
+            return
+        time.sleep(2 ** attempt)
+    raise RuntimeError(f"alias '{COLLECTION_ALIAS}' -> {collection_name} 전환에 실패했습니다: {error}")
+
+def swap_alias(client: QdrantClient, collection_name: str, expected_points: int):
+    """새 컬렉션을 검증한 뒤 alias를 원자적으로 전환하고 이전 컬렉션 이름을 반환합니다."""
+    count = client.count(collection_name=collection_name, exact=True).count
+    if count != expected_points:
+        raise RuntimeError(
+            f"새 컬렉션 {collection_name}의 포인트 수({count})가 정책 수({expected_points})와 달라 alias를 전환하지 않습니다."
+        )
+
+    previous = get_alias_target(client, COLLECTION_ALIAS)
+    if previous is None and collection_exists(client, COLLECTION_ALIAS):
+        # 예전 버전은 alias 이름과 같은 실제 컬렉션을 사용했습니다. Qdrant는 컬렉션과 같은 이름의
+        # alias를 만들 수 없으므로 이 한 번의 전환에서만 삭제 직후 alias를 만들기까지 검색이 실패합니다.
+        # alias 생성이 끝내 실패하면 중단하며, 다시 실행하면 체크포인트의 새 컬렉션으로 alias만 만듭니다.
+        print(f"기존 '{COLLECTION_ALIAS}' 컬렉션을 삭제하고 alias로 전환합니다. (전환 중 잠시 검색 불가)")
+        client.delete_collection(collection_name=COLLECTION_ALIAS)
+        create_alias(client, collection_name)
+        print(f"alias '{COLLECTION_ALIAS}' -> {collection_name}")
+        return None
+
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(
+            delete_alias=models.DeleteAlias(alias_name=COLLECTION_ALIAS)
+        ))
+    create_alias(client, collection_name, operations)
+    print(f"alias '{COLLECTION_ALIAS}' -> {collection_name}")
+    return previous
 
-def upload_to_qdrant():
-    """정책 데이터를 Qdrant에 업로드합니다."""
+def upload_to_qdrant(
+    fresh: bool = False,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    concurrency: int = 4,
+    local_vectors: bool = True
+):
+    """정책 데이터를 새 컬렉션에 업로드하고 alias를 전환합니다."""
     # OpenAI 클라이언트 초기화
     openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
+
     # Qdrant 클라이언트 초기화
-    qdrant_client = QdrantClient("localhost", port=6333)
-    
-    # 컬렉션 재생성
-    create_qdrant_collection()
-    
+    qdrant_client = get_qdrant_client()
+
     # 정책 데이터 로드
     policies = load_policy_data()
+    data_hash = policy_data_hash(policies)
     print(f"로드된 정책 수: {len(policies)}")
-    
-    # 각 정책을 Qdrant에 업로드
-    for i, policy in enumerate(policies):
-        try:
-            # 텍스트 임베딩 생성
-            embedding = get_embedding(policy["text"], openai_client)
-            if embedding is None:
-                print(f"정책 {policy['id']} 임베딩 생성 실패, 건너뜀")
+
+    # 체크포인트가 있으면 이어서 진행, 없으면 새 컬렉션 생성
+    # 로컬 인코더 벡터 (named vector "local")
+    local_embeddings = create_local_embeddings(policies) if local_vectors else None
+    local_dim = len(next(iter(local_embeddings.values()))) if local_embeddings else None
+
+    checkpoint = None if fresh else load_checkpoint(data_hash, qdrant_client, local_vectors)
+    if checkpoint is None:
+        collection_name = f"{COLLECTION_ALIAS}_{int(time.time())}"
+        create_qdrant_collection(qdrant_client, collection_name, local_dim)
+        checkpoint = {
+            "collection": collection_name,
+            "data_hash": data_hash,
+            "local_vectors": local_vectors,
+            "done_ids": []
+        }
+        save_checkpoint(checkpoint)
+    else:
+        print(f"체크포인트에서 이어서 진행합니다: {checkpoint['collection']} ({len(checkpoint['done_ids'])}개 완료)")
+    collection_name = checkpoint["collection"]
+
+    done_ids = set(checkpoint["done_ids"])
+    pending = [p for p in policies if p["id"] not in done_ids]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    # 배치 단위 임베딩 + 업로드를 제한된 동시성으로 실행
+    failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                process_batch, batch, collection_name, openai_client, qdrant_client, local_embeddings
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            try:
+                done_ids.update(future.result())
+            except Exception as e:
+                failed += len(futures[future])
+                print(f"배치 업로드 오류 (정책 {futures[future][0]['id']}~): {str(e)}")
                 continue
-            
-            # Qdrant에 포인트 추가
-            qdrant_client.upsert(
-                collection_name="policy_collection",
-                points=[
-                    models.PointStruct(
-                        id=policy["id"],
-                        vector=embedding,
-                        payload={
-                            "id": str(policy["id"]),
-                            "candidate": policy["candidate"],
-                            "topic": policy["topic"],
-                            "source": policy["source"],
-                            "pledge": policy["text"]
-                        }
-                    )
-                ]
-            )
-            
-            if (i + 1) % 10 == 0:
-                print(f"진행률: {i + 1}/{len(policies)}")
-                
-        except Exception as e:
-            print(f"정책 {policy['id']} 업로드 오류: {str(e)}")
-            continue
-    
+            checkpoint["done_ids"] = sorted(done_ids)
+            save_checkpoint(checkpoint)
+            print(f"진행률: {len(done_ids)}/{len(policies)}")
+
+    if failed:
+        print(f"{failed}개 정책 업로드 실패. 다시 실행하면 체크포인트에서 이어서 진행합니다.")
+        return
+
+    # 업로드가 끝난 뒤에만 alias를 전환하므로 검색 중에 빈 컬렉션이 노출되지 않습니다.
+    previous = swap_alias(qdrant_client, collection_name, len(policies))
+    if previous and previous != collection_name:
+        qdrant_client.delete_collection(collection_name=previous)
+        print(f"이전 컬렉션이 삭제되었습니다: {previous}")
+    CHECKPOINT_PATH.unlink(missing_ok=True)
+
     print("데이터 업로드가 완료되었습니다.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="정책 데이터를 Qdrant에 업로드합니다.")
+    parser.add_argument("--fresh", action="store_true", help="체크포인트를 무시하고 새 컬렉션에 처음부터 업로드")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="임베딩 요청당 정책 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리할 배치 수")
+    parser.add_argument("--no-local-vectors", action="store_true", help="로컬 인코더(ko-sroberta) 벡터를 업로드하지 않음")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH), help="체크포인트 파일 경로")
+    args = parser.parse_args()
+    CHECKPOINT_PATH = Path(args.checkpoint)
     try:
-        upload_to_qdrant()
+        upload_to_qdrant(
+            fresh=args.fresh,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            local_vectors=not args.no_local_vectors
+        )
     except Exception as e:
         print(f"오류 발생: {str(e)}")
         import traceback
-        print(f"상세 오류: {traceback.format_exc()}") 
\ No newline at end of file
+        print(f"상세 오류: {traceback.format_exc()}")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+import pytest
+
+# Tests import the app as the scripts do: from the repository root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.models.schema import Policy
+
+DIM = 16
+
+
+def make_policies(n: int, candidates: Optional[List[str]] = None, topics: Optional[List[str]] = None) -> List[Policy]:
+    """``n`` policies spread round-robin over the given candidates and topics."""
+    candidates = candidates or ["가", "나", "다", "라"]
+    topics = topics or ["경제", "복지", "교육"]
+    return [
+        Policy(
+            id=i,
+            candidate=candidates[i % len(candidates)],
+            topic=topics[i % len(topics)],
+            text=f"공약 {i}",
+            source="test"
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
+
+
+def write_policies(path: Path, policies: List[Policy]) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([p.model_dump() for p in policies], f, ensure_ascii=False)
+    return path
+
+
+class CountingEncoder:
+    """Stand-in for the SentenceTransformer: deterministic vectors per text, with call counts."""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self.calls = 0
+        self.texts: List[str] = []
+
+    def encode(self, texts, convert_to_numpy: bool = True) -> np.ndarray:
+        self.calls += 1
+        self.texts.extend(texts)
+        return np.stack([self.vector(text) for text in texts])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).normal(size=self.dim).astype(np.float32)
+
+
+@pytest.fixture
+def policy_file(tmp_path: Path) -> Path:
+    return write_policies(tmp_path / "policy_data.json", make_policies(40))
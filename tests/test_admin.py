@@ -0,0 +1,30 @@
+import asyncio
+import os
+import httpx
+
+# The app creates its OpenAI clients at import time
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import backend.main as main  # noqa: E402
+
+
+def post_reload(client_host: str, headers=None) -> int:
+    async def run():
+        transport = httpx.ASGITransport(app=main.app, client=(client_host, 40000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.post("/admin/reload", headers=headers)).status_code
+
+    return asyncio.run(run())
+
+
+def test_without_a_token_only_loopback_clients_may_reload(monkeypatch):
+    monkeypatch.setattr(main, "admin_token", "")
+    assert post_reload("203.0.113.7") == 403
+    assert post_reload("127.0.0.1") == 200
+
+
+def test_with_a_token_the_bearer_token_is_required(monkeypatch):
+    monkeypatch.setattr(main, "admin_token", "s3cret")
+    assert post_reload("127.0.0.1") == 403
+    assert post_reload("203.0.113.7", {"Authorization": "Bearer wrong"}) == 403
+    assert post_reload("203.0.113.7", {"Authorization": "Bearer s3cret"}) == 200
@@ -0,0 +1,118 @@
+import asyncio
+import numpy as np
+import pytest
+from conftest import make_policies
+
+import backend.answer_cache as answer_cache_module
+from backend.answer_cache import AnswerCache
+
+POLICIES = make_policies(3)
+KEY = AnswerCache.make_key("faiss", None, None, [p.id for p in POLICIES])
+
+
+def generator(answer: str = "답변", delay: float = 0.05, error: Exception = None):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return answer, POLICIES
+
+    return generate, calls
+
+
+def test_identical_inflight_questions_share_one_generation():
+    cache = AnswerCache()
+    generate, calls = generator()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_generate(KEY, "청년 주거 공약?", None, generate) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [cached for _, _, cached in results] == [False, True, True, True, True]
+    assert cache.stats()["coalesced"] == 4
+    assert cache.lookup(KEY, "청년  주거 공약?") is not None
+
+
+def test_follower_takes_over_when_the_leader_is_cancelled():
+    cache = AnswerCache()
+    generate, calls = generator()
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_generate(KEY, "질문", None, generate))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_generate(KEY, "질문", None, generate)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(run())
+    # The cancelled leader's call plus exactly one takeover
+    assert len(calls) == 2
+    assert sorted(cached for _, _, cached in results) == [False, True, True]
+    assert all(answer == "답변" for answer, _, _ in results)
+
+
+def test_cancelled_follower_does_not_affect_the_leader():
+    cache = AnswerCache()
+    generate, calls = generator()
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_generate(KEY, "질문", None, generate))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_generate(KEY, "질문", None, generate))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(run()) == ("답변", POLICIES, False)
+    assert len(calls) == 1
+
+
+def test_generation_errors_reach_every_waiter_and_are_not_cached():
+    cache = AnswerCache()
+    generate, calls = generator(error=RuntimeError("LLM down"))
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_generate(KEY, "질문", None, generate) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.lookup(KEY, "질문") is None
+
+
+def test_semantic_hit_requires_same_key_and_similar_vector():
+    cache = AnswerCache(similarity_threshold=0.95)
+    vector = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    cache.store(KEY, "청년 주거 지원", vector, "답변", POLICIES)
+    assert cache.lookup(KEY, "청년 주거 지원책", np.array([0.99, 0.05, 0.0])) is not None
+    assert cache.lookup(KEY, "다른 질문", np.array([0.0, 1.0, 0.0])) is None
+    other_key = AnswerCache.make_key("faiss", "가", None, [p.id for p in POLICIES])
+    assert cache.lookup(other_key, "청년 주거 지원", vector) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_version_change_ttl_and_lru_eviction(monkeypatch):
+    cache = AnswerCache(max_size=2, ttl=10.0)
+    cache.invalidate_if_stale((1, 1))
+    for question in ("a", "b", "c"):
+        cache.store(KEY, question, None, question, POLICIES)
+    assert cache.lookup(KEY, "a") is None and cache.lookup(KEY, "c") is not None
+
+    cache.invalidate_if_stale((1, 2))
+    assert cache.lookup(KEY, "c") is None
+
+    cache.store(KEY, "d", None, "d", POLICIES)
+    now = answer_cache_module.time.time()
+    monkeypatch.setattr(answer_cache_module.time, "time", lambda: now + 11)
+    assert cache.lookup(KEY, "d") is None
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+from backend.metrics import REGISTRY
+from backend.rag.batcher import MicroBatcher, bounded_as_completed
+
+
+def test_concurrent_items_share_one_batch_in_order():
+    calls = []
+
+    def process(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=16, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert batcher.stats()["batch_size_histogram"] == {"5": 1}
+
+
+def test_full_batches_flush_without_waiting():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=4, max_wait_ms=10_000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(8))), 1.0)
+
+    assert asyncio.run(run()) == list(range(8))
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["mean_batch_size"] == 4.0
+
+
+def test_a_lone_item_is_flushed_after_max_wait():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=16, max_wait_ms=30)
+
+    async def run():
+        start = time.monotonic()
+        result = await batcher.submit("x")
+        return result, time.monotonic() - start
+
+    result, waited = asyncio.run(run())
+    assert result == "x" and 0.02 <= waited < 0.5
+
+
+def test_batch_errors_reach_every_item():
+    def process(items):
+        raise RuntimeError("encoder failed")
+
+    batcher = MicroBatcher(process, max_batch_size=16, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_batches_run_off_the_event_loop_thread():
+    threads = []
+
+    def process(items):
+        threads.append(threading.get_ident())
+        return items
+
+    batcher = MicroBatcher(process, max_wait_ms=1)
+
+    async def run():
+        await batcher.submit(1)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert threads and threads[0] != loop_thread
+
+
+def test_bounded_as_completed_limits_concurrency_and_reports_errors():
+    running = [0]
+    peak = [0]
+
+    def job(i):
+        async def run():
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.01 * (5 - i))
+            running[0] -= 1
+            if i == 2:
+                raise ValueError(i)
+            return i
+        return run
+
+    async def collect():
+        return [item async for item in bounded_as_completed([job(i) for i in range(5)], limit=2)]
+
+    results = asyncio.run(collect())
+    assert peak[0] == 2
+    assert sorted(i for i, _, _ in results) == list(range(5))
+    errors = {i: error for i, _, error in results if error is not None}
+    assert list(errors) == [2] and isinstance(errors[2], ValueError)
+    assert {i: result for i, result, error in results if error is None} == {0: 0, 1: 1, 3: 3, 4: 4}
+
+
+def test_batch_sizes_are_exported_as_a_histogram():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=3, max_wait_ms=5, name="test_batcher")
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+    assert not batcher._tasks
+    lines = REGISTRY.render().splitlines()
+    assert 'policyfinder_batch_size_count{batcher="test_batcher"} 2' in lines
+    assert 'policyfinder_batch_size_sum{batcher="test_batcher"} 4' in lines
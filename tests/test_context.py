@@ -0,0 +1,64 @@
+import logging
+import sys
+import pytest
+from conftest import make_policies
+
+import backend.rag.context as context_module
+from backend.models.schema import Policy
+from backend.rag.context import ContextBuilder, question_type
+
+
+@pytest.fixture
+def builder(monkeypatch) -> ContextBuilder:
+    # The byte heuristic, so budgets do not depend on whether tiktoken is installed
+    monkeypatch.setattr(context_module, "_tiktoken_encoding", lambda model: None)
+    return ContextBuilder(max_input_tokens=300, max_policy_tokens=40, max_completion_tokens=1000)
+
+
+def test_duplicates_are_dropped_in_retrieval_order(builder):
+    a, b, c = make_policies(3)
+    copy_of_a = Policy(id=99, candidate=a.candidate, topic="기타", text=f"  {a.text} ", source="other")
+    context, included = builder.pack([b, a, b, copy_of_a, c])
+    assert [p.id for p in included] == [b.id, a.id, c.id]
+    assert context.index("[공약 ID: 1]") < context.index("[공약 ID: 0]") < context.index("[공약 ID: 2]")
+
+
+def test_packing_stops_at_the_budget(builder):
+    policies = make_policies(30)
+    context, included = builder.pack(policies)
+    assert builder.count_tokens(context) <= 300
+    assert 0 < len(included) < 30
+    assert included == policies[:len(included)]
+    _, fewer = builder.pack(policies, budget=100)
+    assert len(fewer) < len(included)
+
+
+def test_long_policy_texts_are_truncated(builder):
+    text = "가나다라마바사아자차" * 50
+    truncated = builder.truncate(text, 40)
+    assert builder.count_tokens(truncated) <= 40 and truncated.endswith("…")
+    assert text.startswith(truncated[:-1])
+    assert builder.truncate("짧은 공약", 40) == "짧은 공약"
+    long_policy = Policy(id=1, candidate="가", topic="경제", text=text, source="s")
+    assert "…" in builder.format_policy(long_policy)
+
+
+@pytest.mark.parametrize("question, kind", [
+    ("두 후보의 주거 공약 차이를 비교해줘", "compare"),
+    ("교육 공약을 모두 정리해줘", "summary"),
+    ("기본소득은 얼마인가요", "fact"),
+    ("청년 주거 정책에 대해 설명해주세요", "default"),
+])
+def test_completion_budget_by_question_type(builder, question, kind):
+    assert question_type(question) == kind
+    assert builder.completion_budget(question) == min(context_module.COMPLETION_BUDGETS[kind], 1000)
+
+
+def test_missing_tiktoken_is_warned_about_once(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    monkeypatch.setattr(context_module, "_warned_fallback", False)
+    with caplog.at_level(logging.WARNING, logger="backend.rag.context"):
+        first, second = ContextBuilder(), ContextBuilder()
+    assert first._encoding is None and second._encoding is None
+    assert first.count_tokens("가나다") == 3
+    assert len([r for r in caplog.records if "tiktoken" in r.getMessage()]) == 1
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import backend.embedding_cache as embedding_cache_module
+from backend.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_normalized_keys_per_model_and_read_only_vectors():
+    cache = EmbeddingCache(max_size=8)
+    stored = cache.put("model-a", "  청년  주거 Policy ", [1.0, 2.0])
+    assert not stored.flags.writeable
+    np.testing.assert_array_equal(cache.get("model-a", "청년 주거 policy"), [1.0, 2.0])
+    assert cache.get("model-b", "청년 주거 policy") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = EmbeddingCache(max_size=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")
+    cache.put("m", "c", [3.0])
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") is not None and cache.get("m", "c") is not None
+
+
+def test_ttl_expiry(clock):
+    cache = EmbeddingCache(max_size=8, ttl=60.0)
+    cache.put("m", "q", [1.0])
+    clock[0] += 59
+    assert cache.get("m", "q") is not None
+    clock[0] += 2
+    assert cache.get("m", "q") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_get_or_compute_computes_once():
+    cache = EmbeddingCache(max_size=8)
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        return np.ones(3)
+
+    cache.get_or_compute("m", "q", compute)
+    cache.get_or_compute("m", "Q", compute)
+    assert calls == ["q"]
+
+
+def test_sqlite_tier_survives_restarts_and_honours_ttl(tmp_path, clock):
+    path = str(tmp_path / "cache" / "embeddings.sqlite")
+    cache = EmbeddingCache(max_size=8, ttl=60.0, persist_path=path)
+    cache.put("m", "q", [1.0, 2.0, 3.0])
+
+    restarted = EmbeddingCache(max_size=8, ttl=60.0, persist_path=path)
+    np.testing.assert_array_equal(restarted.get("m", "q"), [1.0, 2.0, 3.0])
+    assert restarted.stats()["disk_hits"] == 1
+    # Promoted to memory: the next hit does not touch the disk
+    restarted.get("m", "q")
+    assert restarted.stats()["disk_hits"] == 1
+
+    clock[0] += 61
+    assert EmbeddingCache(max_size=8, ttl=60.0, persist_path=path).get("m", "q") is None
+
+
+def test_clear_keeps_the_disk_tier_and_reopen_reconnects(tmp_path):
+    cache = EmbeddingCache(max_size=8, persist_path=str(tmp_path / "embeddings.sqlite"))
+    cache.put("m", "q", [1.0])
+    cache.clear()
+    cache.reopen()
+    assert cache.get("m", "q") is not None
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_zero_size_caches_nothing_in_memory():
+    cache = EmbeddingCache(max_size=0)
+    cache.put("m", "q", [1.0])
+    assert cache.get("m", "q") is None
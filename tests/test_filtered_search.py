@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from conftest import DIM, make_policies
+
+from backend.embedding_cache import EmbeddingCache
+from backend.rag.embed import PolicyEmbedder
+from backend.rag.index_factory import default_index_config
+
+
+def build(index_type: str, n: int, rng: np.random.Generator):
+    embedder = PolicyEmbedder(cache=EmbeddingCache(max_size=0))
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    embedder.build_index(make_policies(n), vectors, default_index_config(index_type))
+    return embedder, vectors
+
+
+def exact_top(vectors: np.ndarray, query: np.ndarray, allowed: set, k: int, normalize: bool):
+    if normalize:
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        query = query / np.linalg.norm(query)
+        scores = -(vectors @ query[0])
+    else:
+        scores = np.linalg.norm(vectors - query, axis=1)
+    ranked = [int(i) for i in np.argsort(scores) if int(i) in allowed]
+    return ranked[:k]
+
+
+@pytest.mark.parametrize("index_type", ["flat_l2", "flat_ip", "ivf_flat", "hnsw"])
+def test_narrow_filter_is_filled_on_every_index_type(index_type, rng):
+    embedder, vectors = build(index_type, 400, rng)
+    for _ in range(20):
+        allowed = set(rng.choice(400, 3, replace=False).tolist())
+        query = rng.normal(size=(1, DIM)).astype(np.float32)
+        ids, strategy = embedder.search_vector_filtered(query, 5, allowed)
+        assert strategy.startswith("prefilter")
+        assert len(ids) == 3 and set(ids) == allowed
+
+
+@pytest.mark.parametrize("index_type", ["flat_l2", "flat_ip", "sq_fp16"])
+def test_prefilter_matches_exact_ranking(index_type, rng):
+    embedder, vectors = build(index_type, 400, rng)
+    config = embedder.index_config
+    for _ in range(20):
+        allowed = set(rng.choice(400, 40, replace=False).tolist())
+        query = rng.normal(size=(1, DIM)).astype(np.float32)
+        ids, _ = embedder.search_vector_filtered(query, 5, allowed)
+        assert ids == exact_top(vectors, query, allowed, 5, config["normalize"])
+
+
+def test_exhaustive_retry_is_reported(rng):
+    embedder, _ = build("ivf_flat", 400, rng)
+    strategies = set()
+    for _ in range(20):
+        allowed = set(rng.choice(400, 3, replace=False).tolist())
+        _, strategy = embedder.search_vector_filtered(rng.normal(size=(1, DIM)).astype(np.float32), 5, allowed)
+        strategies.add(strategy)
+    # nprobe 8 of 50 lists misses most 3-policy filters
+    assert "prefilter_exhaustive" in strategies
+    flat, _ = build("flat_l2", 400, rng)
+    _, strategy = flat.search_vector_filtered(rng.normal(size=(1, DIM)).astype(np.float32), 5, {1, 2, 3})
+    assert strategy == "prefilter"
+
+
+def test_broad_filter_overfetches_and_fills_k(rng):
+    embedder, vectors = build("flat_l2", 200, rng)
+    allowed = set(range(0, 200, 2))
+    query = rng.normal(size=(1, DIM)).astype(np.float32)
+    ids, strategy = embedder.search_vector_filtered(query, 5, allowed)
+    assert strategy == "overfetch"
+    assert ids == exact_top(vectors, query, allowed, 5, normalize=False)
+
+
+def test_unfiltered_and_empty_filters(rng):
+    embedder, vectors = build("flat_l2", 50, rng)
+    query = rng.normal(size=(1, DIM)).astype(np.float32)
+    ids, strategy = embedder.search_vector_filtered(query, 5, None)
+    assert strategy == "unfiltered" and ids == exact_top(vectors, query, set(range(50)), 5, normalize=False)
+    assert embedder.search_vector_filtered(query, 5, {999}) == ([], "empty")
@@ -0,0 +1,47 @@
+import pytest
+from conftest import CountingEncoder, make_policies
+
+from backend.embedding_cache import EmbeddingCache
+from backend.rag.embed import PolicyEmbedder
+from backend.rag.embedding_store import EmbeddingStore, embedding_text
+from backend.rag.index_factory import default_index_config
+
+
+def make_embedder(data_dir, index_type: str = "flat_l2"):
+    embedder = PolicyEmbedder(cache=EmbeddingCache(max_size=0))
+    embedder._model = CountingEncoder()
+    embedder.index_config = default_index_config(index_type)
+    embedder.data_dir = data_dir
+    embedder.snapshots_dir = data_dir / "snapshots"
+    embedder._set_paths(data_dir)
+    return embedder
+
+
+@pytest.mark.parametrize("index_type", ["flat_l2", "sq8", "hnsw"])
+def test_mapped_index_searches_like_the_saved_one(tmp_path, index_type):
+    writer = make_embedder(tmp_path, index_type)
+    writer.update_index(make_policies(30), EmbeddingStore(str(tmp_path / "store.npz")))
+    writer.save_index()
+
+    reader = make_embedder(tmp_path)
+    assert reader.load_index(mmap=True)
+    assert reader.mmapped and reader.index_config["type"] == index_type
+    query = reader._model.vector("query").reshape(1, -1)
+    assert reader.search_vector_filtered(query, 5) == writer.search_vector_filtered(query, 5)
+
+
+def test_updating_a_mapped_index_switches_to_a_private_copy(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store.npz"))
+    policies = make_policies(20)
+    writer = make_embedder(tmp_path)
+    writer.update_index(policies, store)
+    writer.save_index()
+
+    reader = make_embedder(tmp_path)
+    reader.load_index(mmap=True)
+    assert reader.mmapped and reader.manifest == {}
+    changed = policies[:-1] + [policies[-1].model_copy(update={"text": "바뀐 공약"})]
+    assert reader.update_index(changed, store) == {"encoded": 1, "added": 1, "removed": 0, "rebuilt": 0}
+    assert not reader.mmapped and reader.index.ntotal == 20
+    query = reader._model.vector(embedding_text(changed[-1])).reshape(1, -1)
+    assert reader.search_vector_filtered(query, 1)[0] == [19]
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from conftest import DIM, CountingEncoder, make_policies
+
+from backend.embedding_cache import EmbeddingCache
+from backend.models.schema import Policy
+from backend.rag.embed import PolicyEmbedder
+from backend.rag.embedding_store import EmbeddingStore, content_hash, embedding_text
+from backend.rag.index_factory import default_index_config
+
+
+def make_embedder(index_type: str = "flat_l2"):
+    embedder = PolicyEmbedder(cache=EmbeddingCache(max_size=0))
+    embedder._model = CountingEncoder()
+    embedder.index_config = default_index_config(index_type)
+    return embedder
+
+
+def edit(policies, policy_id, text):
+    return [
+        Policy(**{**p.model_dump(), "text": text}) if p.id == policy_id else p
+        for p in policies
+    ]
+
+
+def top_ids(embedder, query_vector, k=5):
+    return embedder.search_vector_filtered(query_vector, k)[0]
+
+
+def test_unchanged_policies_are_not_re_encoded(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store.npz"))
+    policies = make_policies(30)
+    embedder = make_embedder()
+    assert embedder.update_index(policies, store) == {"encoded": 30, "added": 30, "removed": 0, "rebuilt": 1}
+    version = embedder.index_version
+
+    assert embedder.update_index(policies, store) == {"encoded": 0, "added": 0, "removed": 0, "rebuilt": 0}
+    assert embedder.index_version == version
+    assert embedder._model.calls == 1
+
+
+@pytest.mark.parametrize("index_type", ["flat_l2", "flat_ip", "ivf_flat"])
+def test_changes_and_removals_match_a_full_rebuild(tmp_path, index_type):
+    store = EmbeddingStore(str(tmp_path / "store.npz"))
+    policies = make_policies(30)
+    embedder = make_embedder(index_type)
+    embedder.update_index(policies, store)
+
+    updated = edit(policies, 4, "완전히 바뀐 공약 내용")[:-3]
+    result = embedder.update_index(updated, store)
+    assert result == {"encoded": 1, "added": 1, "removed": 3, "rebuilt": 0}
+    assert embedder._model.texts[-1] == embedding_text(updated[4])
+    assert embedder.index.ntotal == 27
+    assert set(embedder.policy_ids) == {p.id for p in updated}
+    # Unreferenced vectors are pruned from the store
+    assert len(store) == 27
+
+    fresh = make_embedder("flat_l2")
+    fresh.build_index(updated, fresh.create_embeddings(updated))
+    query = embedder._model.vector(embedding_text(updated[4])).reshape(1, -1)
+    exact = top_ids(fresh, query)
+    assert top_ids(embedder, query)[0] == exact[0] == 4
+    if index_type == "flat_l2":
+        assert top_ids(embedder, query) == exact
+
+
+def test_hnsw_is_rebuilt_when_policies_change(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store.npz"))
+    policies = make_policies(30)
+    embedder = make_embedder("hnsw")
+    embedder.update_index(policies, store)
+    result = embedder.update_index(edit(policies, 2, "새 내용"), store)
+    assert result["rebuilt"] == 1 and result["encoded"] == 1
+    assert embedder.index.ntotal == 30
+
+
+def test_store_round_trip(tmp_path):
+    path = tmp_path / "store.npz"
+    store = EmbeddingStore(str(path))
+    store.put("a", np.arange(4))
+    store.put("b", np.ones(4))
+    store.save()
+    reloaded = EmbeddingStore(str(path))
+    assert "a" in reloaded and len(reloaded) == 2
+    np.testing.assert_array_equal(reloaded.get_many(["b", "a"]), [np.ones(4), np.arange(4)])
+
+
+def test_rebuild_re_encodes_every_policy(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store.npz"))
+    policies = make_policies(10)
+    embedder = make_embedder()
+    embedder.update_index(policies, store)
+    result = embedder.update_index(policies, store, rebuild=True)
+    assert result == {"encoded": 10, "added": 10, "removed": 0, "rebuilt": 1}
+    assert embedder._model.calls == 2
+
+
+def test_vectors_from_another_encoder_are_discarded(tmp_path):
+    path = tmp_path / "store.npz"
+    policies = make_policies(10)
+    stale = EmbeddingStore(str(path))
+    stub = CountingEncoder(dim=32)
+    for p in policies:
+        stale.put(content_hash(p), stub.vector(embedding_text(p)))
+    stale.save()
+
+    store = EmbeddingStore(str(path))
+    assert store.model is None and store.dim == 32
+    embedder = make_embedder()
+    assert embedder.update_index(policies, store)["encoded"] == 10
+    assert embedder.index.d == DIM
+    store.save()
+
+    reloaded = EmbeddingStore(str(path), model=embedder.model_name, dim=DIM)
+    assert len(reloaded) == 10 and reloaded.model == embedder.model_name
+    assert len(EmbeddingStore(str(path), model="other-model")) == 0
+    with pytest.raises(ValueError):
+        reloaded.put("x", np.ones(DIM + 1))
@@ -0,0 +1,201 @@
+import asyncio
+import time
+import httpx
+import pytest
+from conftest import make_policies
+from openai import AsyncOpenAI
+
+import backend.rag.generate as generate_module
+from backend.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable, extractive_answer
+from script import fake_openai_server as fake
+
+MESSAGES = [{"role": "user", "content": "질문: 청년 주거\n[공약 ID: 3] 공약 내용\n[공약 ID: 7] 공약 내용"}]
+
+
+class CountingTransport(httpx.ASGITransport):
+    """The fake OpenAI server in-process, counting the requests it receives."""
+
+    def __init__(self):
+        super().__init__(app=fake.app)
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        return await super().handle_async_request(request)
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    for key, value in {
+        "latency": 0.0, "jitter": 0.0, "token_delay": 0.0, "completion_tokens": 12,
+        "error_rate": 0.0, "hang_rate": 0.0,
+    }.items():
+        monkeypatch.setitem(fake.CONFIG, key, value)
+    return fake.CONFIG
+
+
+@pytest.fixture
+def transport(fake_server):
+    return CountingTransport()
+
+
+def gateway(transport, **options) -> LLMGateway:
+    client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake/v1",
+        http_client=httpx.AsyncClient(transport=transport, base_url="http://fake/v1")
+    )
+    options.setdefault("deadline", 5.0)
+    options.setdefault("max_retries", 2)
+    options.setdefault("backoff", 0.0)
+    options.setdefault("hedge_after", 0.0)
+    options.setdefault("breaker", CircuitBreaker(failure_threshold=5, reset_seconds=30.0))
+    return LLMGateway(client=client, **options)
+
+
+def test_complete_against_fake_server(transport):
+    response = asyncio.run(gateway(transport).complete(MESSAGES, max_tokens=20))
+    answer = response.choices[0].message.content
+    assert "[공약: 3]" in answer and "[공약: 7]" in answer
+    assert transport.requests == 1
+
+
+def test_stream_against_fake_server(transport):
+    async def collect():
+        return [token async for token in gateway(transport).stream(MESSAGES, max_tokens=20)]
+
+    tokens = asyncio.run(collect())
+    assert len(tokens) > 1 and "".join(tokens).strip() == fake._answer(MESSAGES, 20)
+
+
+def test_deadline_bounds_a_slow_llm(transport, fake_server):
+    fake_server["latency"] = 2.0
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(gateway(transport, deadline=0.3).complete(MESSAGES, max_tokens=20))
+    assert time.monotonic() - start < 1.0
+
+
+def test_server_errors_are_retried_then_given_up(transport, fake_server):
+    fake_server["error_rate"] = 1.0
+    with pytest.raises(LLMUnavailable, match="InternalServerError"):
+        asyncio.run(gateway(transport, max_retries=2).complete(MESSAGES, max_tokens=20))
+    assert transport.requests == 3
+
+
+class ScriptedClient:
+    """Stub AsyncOpenAI: each create() call runs the next scripted step."""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.calls = 0
+        self.cancelled = 0
+        self.chat = self
+        self.completions = self
+
+    def with_options(self, **options):
+        return self
+
+    async def create(self, timeout=None, **kwargs):
+        step = self.steps[min(self.calls, len(self.steps) - 1)]
+        self.calls += 1
+        delay, result = step
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+def scripted(steps, **options) -> LLMGateway:
+    options.setdefault("deadline", 5.0)
+    options.setdefault("max_retries", 2)
+    options.setdefault("backoff", 0.0)
+    options.setdefault("hedge_after", 0.0)
+    options.setdefault("breaker", CircuitBreaker(failure_threshold=5, reset_seconds=30.0))
+    return LLMGateway(client=ScriptedClient(steps), **options)
+
+
+def test_retry_succeeds_after_transient_failures():
+    llm = scripted([(0, asyncio.TimeoutError()), (0, asyncio.TimeoutError()), (0, "ok")])
+    assert asyncio.run(llm.complete(MESSAGES, max_tokens=20)) == "ok"
+    assert llm.client.calls == 3
+    assert llm.breaker.state == "closed"
+
+
+def test_non_retryable_errors_are_raised_without_retry():
+    llm = scripted([(0, ValueError("bad request")), (0, "ok")])
+    with pytest.raises(ValueError):
+        asyncio.run(llm.complete(MESSAGES, max_tokens=20))
+    assert llm.client.calls == 1
+
+
+def test_hedged_request_wins_over_a_stalled_one():
+    llm = scripted([(5.0, "slow"), (0.0, "hedged")], hedge_after=0.05)
+    start = time.monotonic()
+    assert asyncio.run(llm.complete(MESSAGES, max_tokens=20)) == "hedged"
+    assert time.monotonic() - start < 1.0
+    assert llm.client.calls == 2 and llm.client.cancelled == 1
+
+
+def test_fast_answer_is_not_hedged():
+    llm = scripted([(0.0, "fast")], hedge_after=0.2)
+    assert asyncio.run(llm.complete(MESSAGES, max_tokens=20)) == "fast"
+    assert llm.client.calls == 1
+
+
+def test_circuit_opens_fails_fast_and_recovers_through_half_open():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.2)
+    llm = scripted([(0, asyncio.TimeoutError())], max_retries=0, breaker=breaker)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await llm.complete(MESSAGES, max_tokens=20)
+        assert breaker.state == "open"
+        with pytest.raises(LLMUnavailable, match="circuit open"):
+            await llm.complete(MESSAGES, max_tokens=20)
+        assert llm.client.calls == 2
+
+        # Half-open: one failing trial re-opens the circuit at once
+        await asyncio.sleep(0.25)
+        assert breaker.state == "half_open"
+        with pytest.raises(LLMUnavailable):
+            await llm.complete(MESSAGES, max_tokens=20)
+        assert llm.client.calls == 3 and breaker.state == "open"
+
+        # Half-open again: while the trial runs other calls fail fast, its success closes the circuit
+        await asyncio.sleep(0.25)
+        llm.client.steps = [(0.1, "ok")]
+        trial = asyncio.create_task(llm.complete(MESSAGES, max_tokens=20))
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMUnavailable, match="circuit open"):
+            await llm.complete(MESSAGES, max_tokens=20)
+        assert await trial == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_generator_falls_back_to_extractive_answer(monkeypatch):
+    policies = make_policies(3)
+    llm = scripted([(0, asyncio.TimeoutError())], max_retries=0)
+    monkeypatch.setattr(generate_module, "get_llm_gateway", lambda: llm)
+    generator = generate_module.ResponseGenerator()
+
+    answer, sources = asyncio.run(generator.generate_response("청년 주거", policies))
+    assert answer == extractive_answer(policies)
+    assert [p.id for p in sources] == [p.id for p in policies]
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(generator.generate_response("청년 주거", policies, fallback=False))
+
+
+def test_extractive_answer_cites_each_policy():
+    policies = make_policies(7)
+    lines = extractive_answer(policies).splitlines()
+    assert len(lines) == 6
+    assert all(f"[공약: {p.id}]" in line for p, line in zip(policies, lines[1:]))
+    assert "찾을 수 없습니다" in extractive_answer([])
@@ -0,0 +1,47 @@
+import asyncio
+import importlib.util
+import pytest
+
+import backend.rag.onnx_encoder as onnx_encoder
+from backend.components import ComponentRegistry
+from backend.rag.onnx_encoder import ONNX_MODEL_FILE, OnnxEncoder, check_onnx_encoder
+
+
+def fake_find_spec(missing):
+    real = importlib.util.find_spec
+    return lambda name, *args: None if name in missing else (real(name, *args) or object())
+
+
+def test_missing_packages_point_at_requirements_onnx(monkeypatch, tmp_path):
+    monkeypatch.setattr(onnx_encoder.importlib.util, "find_spec", fake_find_spec({"onnxruntime"}))
+    with pytest.raises(ImportError, match="requirements-onnx.txt"):
+        check_onnx_encoder(str(tmp_path))
+    with pytest.raises(ImportError, match="onnxruntime"):
+        OnnxEncoder(str(tmp_path))
+
+
+def test_missing_model_points_at_the_export_script(monkeypatch, tmp_path):
+    monkeypatch.setattr(onnx_encoder.importlib.util, "find_spec", fake_find_spec(set()))
+    with pytest.raises(FileNotFoundError, match="export_onnx_encoder.py"):
+        check_onnx_encoder(str(tmp_path))
+    (tmp_path / ONNX_MODEL_FILE).write_bytes(b"")
+    check_onnx_encoder(str(tmp_path))
+
+
+def test_a_component_failed_up_front_is_reported_and_not_ready():
+    registry = ComponentRegistry(engines=["faiss"], retry_interval=60)
+    registry.register("policy_table", lambda: "policies")
+    registry.register("encoder", lambda: "encoder")
+    registry.register("faiss_index", lambda: "index")
+    registry.fail("encoder", "ImportError: ENCODER_BACKEND=onnx needs onnxruntime.")
+
+    async def run():
+        registry.start()
+        await asyncio.sleep(0.05)
+        return registry.status()
+
+    status = asyncio.run(run())
+    assert status["ready"] is False
+    assert status["components"]["encoder"]["status"] == "failed"
+    assert "onnxruntime" in status["components"]["encoder"]["error"]
+    assert status["components"]["faiss_index"]["status"] == "ready"
@@ -0,0 +1,58 @@
+import json
+import os
+from conftest import make_policies, write_policies
+
+from backend.policy_store import PolicyStore
+
+
+def test_postings_filter_by_candidate_topic_or_both(policy_file):
+    store = PolicyStore(str(policy_file))
+    policies = make_policies(40)
+    assert store.ids_for() is None
+    assert store.ids_for(candidate="가") == {p.id for p in policies if p.candidate == "가"}
+    assert store.ids_for(topic="복지") == {p.id for p in policies if p.topic == "복지"}
+    assert store.ids_for("가", "복지") == {p.id for p in policies if p.candidate == "가" and p.topic == "복지"}
+    assert store.ids_for(candidate="없는 후보") == set()
+    # Callers may modify the returned set without touching the postings
+    store.ids_for(candidate="가").clear()
+    assert store.ids_for(candidate="가")
+
+    assert [p.id for p in store.filter("나", None)] == [p.id for p in policies if p.candidate == "나"]
+    assert store.candidates() == ["가", "나", "다", "라"]
+    assert store.topics() == sorted({p.topic for p in policies})
+
+
+def test_get_many_keeps_order_and_skips_unknown_ids(policy_file):
+    store = PolicyStore(str(policy_file))
+    assert [p.id for p in store.get_many([5, 999, 2, 7])] == [5, 2, 7]
+    assert store.get(999) is None
+
+
+def test_reloads_when_the_data_file_changes(tmp_path):
+    path = write_policies(tmp_path / "policy_data.json", make_policies(10))
+    store = PolicyStore(str(path), check_interval=0)
+    assert len(store.policies) == 10 and store.version == 1
+
+    write_policies(path, make_policies(12))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert len(store.policies) == 12 and store.version == 2
+    assert store.ids_for(candidate="가") == {p.id for p in make_policies(12) if p.candidate == "가"}
+    assert store.refresh() is False
+
+
+def test_binary_snapshot_is_used_until_the_source_changes(tmp_path):
+    path = write_policies(tmp_path / "policy_data.json", make_policies(10))
+    PolicyStore(str(path)).save_snapshot()
+    snapshot = tmp_path / "policy_data.bin"
+    assert snapshot.exists()
+
+    store = PolicyStore(str(path))
+    assert store._read_snapshot() is not None
+    assert [p.model_dump() for p in store.policies] == [p.model_dump() for p in make_policies(10)]
+
+    # A rewritten JSON file makes the snapshot stale
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([p.model_dump() for p in make_policies(11)], f)
+    assert PolicyStore(str(path))._read_snapshot() is None
+    assert len(PolicyStore(str(path)).policies) == 11
@@ -0,0 +1,19 @@
+import os
+
+# The app creates its OpenAI clients at import time
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import backend.main as main  # noqa: E402
+
+
+def test_the_policy_table_is_preloaded_first():
+    names = main.fork_safe_components()
+    assert names[0] == "policy_table"
+    assert "qdrant" not in names
+
+
+def test_preloading_the_policy_table_parses_the_policy_data():
+    main.components.preload(["policy_table"])
+    facets = main.components._components["policy_table"].value
+    assert main.policy_store._table is not None
+    assert sum(facets.counts.values()) == len(main.policy_store.policies) > 0
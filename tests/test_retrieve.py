@@ -0,0 +1,41 @@
+import asyncio
+import numpy as np
+from conftest import CountingEncoder, make_policies
+
+from backend.embedding_cache import EmbeddingCache
+from backend.policy_store import PolicyStore
+from backend.rag.embed import PolicyEmbedder
+from backend.rag.retrieve import PolicyRetriever
+
+
+def make_retriever(policy_file):
+    store = PolicyStore(str(policy_file))
+    # No cache: every encoding reaches the encoder
+    embedder = PolicyEmbedder(cache=EmbeddingCache(max_size=0))
+    encoder = CountingEncoder()
+    embedder._model = encoder
+    policies = store.policies
+    embedder.build_index(policies, embedder.create_embeddings(policies))
+    encoder.calls = 0
+    return PolicyRetriever(embedder, store), encoder
+
+
+def test_retrieval_returns_the_query_vector_without_encoding_twice(policy_file):
+    retriever, encoder = make_retriever(policy_file)
+    policies, strategy, vector = asyncio.run(
+        retriever.aretrieve_with_strategy("청년 주거 공약", candidate_filter="가")
+    )
+    assert encoder.calls == 1
+    assert strategy == "prefilter" and {p.candidate for p in policies} == {"가"}
+    np.testing.assert_allclose(vector[0], encoder.vector("청년 주거 공약"))
+
+
+def test_batch_retrieval_encodes_all_queries_in_one_call(policy_file):
+    retriever, encoder = make_retriever(policy_file)
+    queries = [("일자리", None, None), ("복지", "나", None), ("교육", None, "교육")]
+    results = asyncio.run(retriever.aretrieve_batch(queries))
+    assert encoder.calls == 1
+    assert [strategy for _, strategy, _ in results] == ["unfiltered", "prefilter", "overfetch"]
+    for (query, _, _), (policies, _, vector) in zip(queries, results):
+        assert len(policies) == 5
+        np.testing.assert_allclose(vector[0], encoder.vector(query))
@@ -0,0 +1,15 @@
+import pytest
+from pydantic import ValidationError
+
+from backend.models.schema import CompareQuestion
+
+
+@pytest.mark.parametrize("k", [0, -1, 11, 1000])
+def test_compare_k_is_bounded(k):
+    with pytest.raises(ValidationError):
+        CompareQuestion(question="주거 공약 비교", k=k)
+
+
+def test_compare_k_default_and_range():
+    assert CompareQuestion(question="주거 공약 비교").k == 3
+    assert CompareQuestion(question="주거 공약 비교", k=10).k == 10
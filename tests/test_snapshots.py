@@ -0,0 +1,128 @@
+import threading
+import numpy as np
+import pytest
+from conftest import CountingEncoder, make_policies
+
+from backend.embedding_cache import EmbeddingCache
+from backend.rag.embed import PolicyEmbedder
+
+
+def make_embedder(data_dir):
+    embedder = PolicyEmbedder(cache=EmbeddingCache(max_size=0))
+    embedder._model = CountingEncoder()
+    embedder.data_dir = data_dir
+    embedder.snapshots_dir = data_dir / "snapshots"
+    embedder._set_paths(data_dir)
+    return embedder
+
+
+def build(embedder, n):
+    policies = make_policies(n)
+    embedder.build_index(policies, embedder.create_embeddings(policies))
+    return policies
+
+
+def query(embedder, policy_id: int = 0) -> np.ndarray:
+    return embedder._model.vector(f"query {policy_id}").reshape(1, -1)
+
+
+def test_save_publishes_a_snapshot_that_another_process_loads(tmp_path):
+    writer = make_embedder(tmp_path)
+    build(writer, 20)
+    version = writer.save_index()
+    assert (tmp_path / "snapshots" / "CURRENT").read_text().strip() == version
+    assert not list((tmp_path / "snapshots").glob(".*.tmp"))
+
+    reader = make_embedder(tmp_path)
+    assert reader.load_index(mmap=False)
+    assert reader.snapshot == version and reader.index.ntotal == 20
+    assert reader.manifest == writer.manifest
+    assert reader.search_vector_filtered(query(reader), 5) == writer.search_vector_filtered(query(writer), 5)
+    assert reader.reload_index() is False
+
+
+def test_reload_swaps_in_a_new_snapshot_and_pinned_views_keep_the_old_one(tmp_path):
+    writer = make_embedder(tmp_path)
+    build(writer, 20)
+    writer.save_index()
+    reader = make_embedder(tmp_path)
+    reader.load_index(mmap=False)
+    old_view = reader._view
+    old_version = reader.index_version
+
+    build(writer, 30)
+    new_snapshot = writer.save_index()
+    assert reader.reload_index() is True
+    assert reader.snapshot == new_snapshot and reader.index_version > old_version
+    assert reader.index.ntotal == 30
+
+    # A search that pinned the previous view still sees a consistent old index
+    ids, _ = reader.search_vector_filtered(query(reader), 30, view=old_view)
+    assert len(ids) == 20 and max(ids) < 20
+    assert max(reader.search_vector_filtered(query(reader), 30)[0]) >= 20
+
+
+def test_concurrent_searches_during_reloads_never_fail(tmp_path):
+    writer = make_embedder(tmp_path)
+    build(writer, 20)
+    writer.save_index()
+    reader = make_embedder(tmp_path)
+    reader.load_index(mmap=False)
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                ids, _ = reader.search_vector_filtered(query(reader), 5, {1, 2, 3, 25})
+                assert set(ids) <= {1, 2, 3, 25} and len(ids) >= 3
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for n in (30, 20, 30, 20, 30):
+        build(writer, n)
+        writer.save_index()
+        assert reader.reload_index()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_old_snapshots_are_pruned_and_legacy_files_kept(tmp_path):
+    (tmp_path / "policy.index").write_bytes(b"legacy")
+    (tmp_path / "policy_ids.json").write_text("[]")
+    writer = make_embedder(tmp_path)
+    build(writer, 10)
+    versions = [writer.save_index(keep_snapshots=2) for _ in range(4)]
+    remaining = sorted(p.name for p in (tmp_path / "snapshots").iterdir() if p.is_dir())
+    assert remaining == versions[-2:]
+    # A server started before snapshots may still be reading these
+    assert writer.legacy_index_files() == [tmp_path / "policy.index", tmp_path / "policy_ids.json"]
+
+
+def test_a_corrupt_snapshot_leaves_the_served_index_in_place(tmp_path):
+    writer = make_embedder(tmp_path)
+    build(writer, 20)
+    writer.save_index()
+    reader = make_embedder(tmp_path)
+    reader.load_index(mmap=False)
+    served = reader.snapshot
+
+    broken = tmp_path / "snapshots" / "99999999T000000000000Z"
+    broken.mkdir()
+    (broken / "policy.index").write_bytes(b"not an index")
+    np.save(broken / "policy_ids.npy", np.arange(3))
+    (tmp_path / "snapshots" / "CURRENT").write_text(broken.name + "\n")
+
+    with pytest.raises(RuntimeError):
+        reader.reload_index()
+    assert reader.snapshot == served and reader.index.ntotal == 20
+    assert len(reader.search_vector_filtered(query(reader), 5)[0]) == 5
+
+
+def test_load_without_snapshot_or_legacy_files(tmp_path):
+    assert make_embedder(tmp_path).load_index() is False